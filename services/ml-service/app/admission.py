@@ -0,0 +1,262 @@
+"""
+CyberSentinel AI – Admission Control
+======================================
+Keeps the service answering the requests that can still be useful when
+traffic spikes, instead of queueing everything and answering after the
+callers have timed out.
+
+Requests to the scoring endpoints carry a ``Ticket``:
+
+  priority – ``interactive`` < ``normal`` < ``bulk``, from the
+             ``X-Priority`` header or the endpoint's default (single login
+             checks are interactive, batches and streams bulk)
+  deadline – ``X-Deadline-Ms``: how long the caller is still waiting, in
+             milliseconds from arrival
+
+and pass three checks:
+
+  arrival    – once the queued work reaches a priority's shed depth the
+               request is answered 429 right away, before its body is read;
+               interactive requests are never shed on depth. A request whose
+               deadline is already over gets 503.
+  queue      – micro-batches are formed highest priority first, and at most
+               one model call per inference worker runs at a time
+               (``PriorityGate``); waiting calls are admitted by priority,
+               then arrival.
+  dispatch   – work whose deadline passed while queued is dropped before
+               inference (503) instead of computing an answer nobody reads.
+
+Shed counts and queue waits per priority are exposed on ``/metrics``.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .metrics import Histogram, current_timer
+
+INTERACTIVE, NORMAL, BULK = 0, 1, 2
+PRIORITIES = {"interactive": INTERACTIVE, "normal": NORMAL, "bulk": BULK}
+PRIORITY_NAMES = {value: name for name, value in PRIORITIES.items()}
+
+
+class DeadlineExceeded(Exception):
+    """The request's deadline passed before its model call could start."""
+
+
+class Ticket:
+    """Priority class and absolute deadline (``time.monotonic``) of a request."""
+
+    __slots__ = ("priority", "deadline", "arrived")
+
+    def __init__(self, priority: int = NORMAL, deadline: Optional[float] = None, arrived: Optional[float] = None):
+        self.priority = priority
+        self.deadline = deadline
+        self.arrived = time.monotonic() if arrived is None else arrived
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline; None without one."""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    @classmethod
+    def merge(cls, tickets: Iterable["Ticket"]) -> "Ticket":
+        """The ticket of a batch: its most urgent priority and latest deadline."""
+        tickets = list(tickets)
+        if not tickets:
+            return cls()
+        deadlines = [t.deadline for t in tickets]
+        return cls(
+            min(t.priority for t in tickets),
+            None if None in deadlines else max(deadlines),
+            min(t.arrived for t in tickets),
+        )
+
+
+_current_ticket: ContextVar[Optional[Ticket]] = ContextVar("admission_ticket", default=None)
+
+
+def current_ticket() -> Ticket:
+    """The running request's ticket; a normal-priority one without deadline otherwise."""
+    ticket = _current_ticket.get()
+    return ticket if ticket is not None else Ticket()
+
+
+class PriorityGate:
+    """At most ``capacity`` concurrent holders; waiters go by priority, then arrival.
+
+    A waiter whose deadline passes is removed and gets ``DeadlineExceeded``.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self.active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, ticket: Ticket):
+        if self.active < self.capacity and not self.waiting:
+            self.active += 1
+            return
+        if ticket.expired():
+            raise DeadlineExceeded("Deadline exceeded before inference")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (ticket.priority, next(self._order), future))
+        try:
+            await asyncio.wait({future}, timeout=ticket.remaining())
+        except asyncio.CancelledError:
+            self._abandon(future)
+            raise
+        if not future.done():
+            self._abandon(future)
+            raise DeadlineExceeded("Deadline exceeded before inference")
+
+    def _abandon(self, future: asyncio.Future):
+        if future.done() and not future.cancelled():
+            # The slot was handed over just now; pass it on
+            self.release()
+        else:
+            future.cancel()
+
+    def release(self):
+        # Hand the slot straight to the most urgent live waiter
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+
+class RequestShed(Exception):
+    """Raised to answer a request with ``status`` without doing its work."""
+
+    def __init__(self, status: int, reason: str, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.reason = reason
+
+
+class AdmissionController:
+    """Arrival checks, shed counters and per-priority queue waits."""
+
+    def __init__(
+        self,
+        depth: Callable[[], int],
+        shed_depths: Dict[int, int],
+        default_deadline_ms: float = 0.0,
+        retry_after_s: int = 1,
+    ):
+        self.depth = depth
+        # priority -> queued work at which it is shed (0 = never)
+        self.shed_depths = {priority: max(0, int(d)) for priority, d in shed_depths.items()}
+        self.default_deadline = max(0.0, float(default_deadline_ms)) / 1000.0
+        self.retry_after_s = retry_after_s
+
+        # Counters
+        self.admitted: Dict[int, int] = {p: 0 for p in PRIORITY_NAMES}
+        self.shed: Dict[Tuple[str, int], int] = {}
+        self.queue_waits: Dict[int, Histogram] = {p: Histogram() for p in PRIORITY_NAMES}
+
+    def ticket(self, priority_header: Optional[str], deadline_header: Optional[str], default_priority: int) -> Ticket:
+        """Build a ticket from the request headers; bad values fall back to the defaults."""
+        priority = PRIORITIES.get((priority_header or "").strip().lower(), default_priority)
+        arrived = time.monotonic()
+        budget = self.default_deadline or None
+        if deadline_header:
+            try:
+                budget = max(0.0, float(deadline_header)) / 1000.0
+            except ValueError:
+                pass
+        return Ticket(priority, None if budget is None else arrived + budget, arrived)
+
+    def admit(self, ticket: Ticket):
+        """Raise ``RequestShed`` if the request should not be started."""
+        if ticket.expired():
+            self.record_shed("deadline", ticket.priority)
+            raise RequestShed(503, "deadline", "Deadline exceeded before inference")
+        limit = self.shed_depths.get(ticket.priority, 0)
+        if limit and self.depth() >= limit:
+            self.record_shed("overload", ticket.priority)
+            raise RequestShed(
+                429, "overload", f"Service overloaded, {PRIORITY_NAMES[ticket.priority]} requests are being shed"
+            )
+        self.admitted[ticket.priority] += 1
+
+    def record_shed(self, reason: str, priority: int):
+        self.shed[(reason, priority)] = self.shed.get((reason, priority), 0) + 1
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.depth(),
+            "shed_depths": {PRIORITY_NAMES[p]: d for p, d in self.shed_depths.items()},
+            "default_deadline_ms": round(self.default_deadline * 1000, 3),
+            "admitted": {PRIORITY_NAMES[p]: n for p, n in self.admitted.items()},
+            "shed": {f"{reason}:{PRIORITY_NAMES[p]}": n for (reason, p), n in sorted(self.shed.items())},
+            "queue_wait_ms": {
+                PRIORITY_NAMES[p]: {
+                    "count": h.count,
+                    "avg": round(h.sum_ns / h.count / 1e6, 3) if h.count else 0.0,
+                }
+                for p, h in self.queue_waits.items()
+            },
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware: tickets, arrival checks and queue-wait recording for ``paths``."""
+
+    def __init__(self, app, controller: AdmissionController, paths: Dict[str, int]):
+        self.app = app
+        self.controller = controller
+        # path -> default priority
+        self.paths = dict(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        ticket = self.controller.ticket(
+            _header(headers, b"x-priority"), _header(headers, b"x-deadline-ms"), self.paths[scope["path"]]
+        )
+        try:
+            self.controller.admit(ticket)
+        except RequestShed as shed:
+            await _reject(send, shed, self.controller.retry_after_s)
+            return
+
+        token = _current_ticket.set(ticket)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_ticket.reset(token)
+            waited = current_timer().stages.get("queue")
+            if waited is not None:
+                self.controller.queue_waits[ticket.priority].observe(waited)
+
+
+def _header(headers: Dict[bytes, bytes], name: bytes) -> Optional[str]:
+    value = headers.get(name)
+    return value.decode("latin-1") if value is not None else None
+
+
+async def _reject(send, shed: RequestShed, retry_after_s: int):
+    body = json.dumps({"detail": str(shed), "reason": shed.reason}).encode()
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    if shed.status == 429:
+        headers.append((b"retry-after", str(retry_after_s).encode()))
+    await send({"type": "http.response.start", "status": shed.status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,108 @@
+"""
+CyberSentinel AI – Memory-Mapped Model Artifacts
+==================================================
+Exports the fitted models as flat arrays that the service can open with
+``mmap_mode="r"`` instead of unpickling a full copy into every worker:
+
+  models/compiled/phishing_forest.json + .{feature,threshold,...}.npy
+  models/compiled/anomaly_forest.json  + .{feature,threshold,...}.npy
+  models/tfidf_featurizer.json + models/tfidf_idf.npy
+
+Each header records the content fingerprint of the pickles it was built
+from, so stale artifacts are detected and ignored at load time.
+
+``train.py`` writes the artifacts after training; for existing pickles run
+``python -m app.artifacts`` from the ml-service directory.
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import warnings
+
+import joblib
+
+from .featurizer import TfidfFeaturizer
+from .forest import CompiledForestClassifier, CompiledIsolationForest
+
+COMPILED_DIR = "compiled"
+PHISHING_FOREST = "phishing_forest"
+ANOMALY_FOREST = "anomaly_forest"
+
+PHISHING_MODEL_FILE = "phishing_model.pkl"
+VECTORIZER_FILE = "tfidf_vectorizer.pkl"
+ANOMALY_MODEL_FILE = "anomaly_model.pkl"
+ANOMALY_FEATURES_FILE = "anomaly_features.pkl"
+
+
+def file_fingerprint(*paths: str) -> str:
+    """Short content hash identifying a set of model files."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def export_phishing(models_dir: str, model=None, vectorizer=None) -> str:
+    """Write the phishing forest + featurizer artifacts; returns the fingerprint."""
+    model_path = os.path.join(models_dir, PHISHING_MODEL_FILE)
+    vectorizer_path = os.path.join(models_dir, VECTORIZER_FILE)
+    model = model if model is not None else joblib.load(model_path)
+    vectorizer = vectorizer if vectorizer is not None else joblib.load(vectorizer_path)
+    fingerprint = file_fingerprint(model_path, vectorizer_path)
+
+    TfidfFeaturizer.from_vectorizer(vectorizer).save(models_dir, fingerprint=fingerprint)
+    CompiledForestClassifier.from_sklearn(model).save(
+        os.path.join(models_dir, COMPILED_DIR), PHISHING_FOREST, fingerprint=fingerprint
+    )
+    return fingerprint
+
+
+def export_anomaly(models_dir: str, model=None, features=None) -> str:
+    """Write the isolation forest artifacts; returns the fingerprint."""
+    model_path = os.path.join(models_dir, ANOMALY_MODEL_FILE)
+    features_path = os.path.join(models_dir, ANOMALY_FEATURES_FILE)
+    model = model if model is not None else joblib.load(model_path)
+    features = features if features is not None else joblib.load(features_path)
+    fingerprint = file_fingerprint(model_path, features_path)
+
+    CompiledIsolationForest.from_sklearn(model).save(
+        os.path.join(models_dir, COMPILED_DIR), ANOMALY_FOREST,
+        fingerprint=fingerprint, features=list(features),
+    )
+    return fingerprint
+
+
+def fresh_header(models_dir: str, name: str, *pickles: str):
+    """Return the saved header for ``name`` if it matches the pickles on disk."""
+    header = CompiledForestClassifier.read_header(os.path.join(models_dir, COMPILED_DIR), name)
+    if header is None:
+        return None
+    paths = [os.path.join(models_dir, p) for p in pickles]
+    if all(os.path.exists(p) for p in paths) and file_fingerprint(*paths) != header.get("fingerprint"):
+        print(f"[!] Warning: {COMPILED_DIR}/{name} is stale (pickles changed), ignoring it")
+        return None
+    return header
+
+
+def main(argv=None) -> int:
+    from .models import MODELS_DIR
+
+    parser = argparse.ArgumentParser(prog="python -m app.artifacts",
+                                     description="Export memory-mappable artifacts for existing model pickles")
+    parser.add_argument("models_dir", nargs="?", default=MODELS_DIR,
+                        help="directory with the model pickles (default: models/)")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore", category=UserWarning)
+    models_dir = args.models_dir
+    print(f"[+] Phishing artifacts exported ({export_phishing(models_dir)})")
+    print(f"[+] Anomaly artifacts exported ({export_anomaly(models_dir)})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
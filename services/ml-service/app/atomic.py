@@ -0,0 +1,50 @@
+"""
+CyberSentinel AI – Atomic Artifact Writes
+===========================================
+Model arrays are opened with ``mmap_mode="r"`` by every running worker, so
+they must never be rewritten in place: a same-size rewrite silently changes
+the values under the workers and a shorter one makes them fault (SIGBUS).
+
+Files are written to a temporary name in the same directory – unique per
+process and thread, so concurrent writers cannot interleave – and renamed
+over the target with ``os.replace``. Processes that mapped the old file keep
+its inode until they reopen it. Write headers last, so a header always
+describes arrays that are complete.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+
+
+def _temp_path(path: str) -> str:
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def save_array(path: str, array: np.ndarray):
+    """``np.save`` to ``path`` through a temporary file and ``os.replace``."""
+    tmp_path = _temp_path(path)
+    try:
+        # A file object keeps np.save from appending ".npy" to the temporary name
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_json(path: str, data, **kwargs):
+    """``json.dump`` to ``path`` through a temporary file and ``os.replace``."""
+    tmp_path = _temp_path(path)
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, **kwargs)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
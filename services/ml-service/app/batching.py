@@ -0,0 +1,191 @@
+"""
+CyberSentinel AI – Dynamic Micro-Batching
+===========================================
+Coalesces concurrent single-item inference requests into one vectorized
+model call.
+
+Each request is placed on an asyncio queue together with a future. A
+background task collects items until either ``max_batch_size`` is reached
+or ``max_wait_ms`` has elapsed since the first item of the batch arrived,
+runs the batch handler once, and resolves every caller's future with its
+own result and the size of the batch it rode in.
+
+Up to ``max_concurrency`` batches may be in flight at once so that a pool of
+inference workers can be kept busy; while every slot is taken, new requests
+keep accumulating into the next batch.
+
+Requests carry an admission ``Ticket``: the queue hands out the most urgent
+priority first, and requests whose deadline passed while queued fail with
+``DeadlineExceeded`` instead of joining a batch. The handler gets the
+merged ticket of the batch.
+"""
+
+import asyncio
+import itertools
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+from .admission import DeadlineExceeded, Ticket
+
+BatchHandler = Callable[[List[Any], Ticket], Awaitable[List[Any]]]
+
+
+class MicroBatcher:
+    """Queue-backed batcher that flushes on size or time window."""
+
+    def __init__(
+        self,
+        name: str,
+        handler: BatchHandler,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        max_concurrency: int = 1,
+    ):
+        self.name = name
+        self.handler = handler
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self._order = itertools.count()
+
+        # Counters
+        self.batches = 0
+        self.items = 0
+        self.expired = 0
+
+    # ── Lifecycle ──────────────────────────────────────────
+    def start(self):
+        """Start the background flush loop on the running event loop."""
+        if self._task is None:
+            self._queue = asyncio.PriorityQueue()
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop, failing any requests still queued."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        for task in list(self._inflight):
+            task.cancel()
+        await asyncio.gather(*self._inflight, return_exceptions=True)
+
+        while not self._queue.empty():
+            *_, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError(f"{self.name} batcher stopped"))
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    # ── Submission ─────────────────────────────────────────
+    async def submit(self, item: Any, ticket: Optional[Ticket] = None) -> Tuple[Any, int]:
+        """Queue one item and wait for ``(result, batch_size)``."""
+        if self._task is None:
+            raise RuntimeError(f"{self.name} batcher is not running")
+        ticket = ticket or Ticket()
+        future = asyncio.get_running_loop().create_future()
+        # Ordered by priority, then arrival; the counter keeps items uncompared
+        self._queue.put_nowait((ticket.priority, next(self._order), item, ticket, future))
+        return await future
+
+    # ── Flush Loop ─────────────────────────────────────────
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Wait for a free slot first so the batch keeps growing meanwhile
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            try:
+                await self._collect(batch, loop.time() + self.max_wait)
+            except asyncio.CancelledError:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError(f"{self.name} batcher stopped"))
+                raise
+
+            task = loop.create_task(self._flush(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._flush_done)
+
+    async def _collect(self, batch: List[tuple], deadline: float):
+        loop = asyncio.get_running_loop()
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without waiting
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                return
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                return
+
+    def _flush_done(self, task: asyncio.Task):
+        self._inflight.discard(task)
+        self._slots.release()
+
+    async def _flush(self, entries: List[tuple]):
+        # Skip callers that already gave up (client disconnects, timeouts)
+        # and those whose deadline passed while queued
+        batch = []
+        for _, _, item, ticket, future in entries:
+            if future.cancelled():
+                continue
+            if ticket.expired():
+                self.expired += 1
+                future.set_exception(DeadlineExceeded("Deadline exceeded before inference"))
+                continue
+            batch.append((item, ticket, future))
+        if not batch:
+            return
+
+        size = len(batch)
+        self.batches += 1
+        self.items += size
+
+        try:
+            results = await self.handler([item for item, _, _ in batch], Ticket.merge(t for _, t, _ in batch))
+        except asyncio.CancelledError:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError(f"{self.name} batcher stopped"))
+            raise
+        except Exception as exc:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (*_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result((result, size))
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self.queue_depth,
+            "inflight_batches": len(self._inflight),
+            "batches": self.batches,
+            "items": self.items,
+            "expired": self.expired,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
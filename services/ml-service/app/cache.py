@@ -0,0 +1,231 @@
+"""
+CyberSentinel AI – Phishing Verdict Cache
+===========================================
+Bounded cache of phishing verdicts in front of ``PhishingDetector``.
+
+  exact – keyed by a hash of the normalized message text
+  near  – a 64-bit SimHash of the message tokens, indexed by bands so any
+          cached message within ``max_distance`` bits (Hamming) is found;
+          by the pigeonhole principle one of ``max_distance + 1`` bands
+          must match exactly
+
+Entries are evicted LRU-first when the entry or memory cap is exceeded and
+expire after ``ttl_seconds``. The cache is bound to a model fingerprint and
+clears itself whenever the fingerprint changes.
+"""
+
+import hashlib
+import re
+import sys
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+import numpy as np
+
+_TOKEN = re.compile(r"\w+")
+_WHITESPACE = re.compile(r"\s+")
+_BITS = np.arange(64, dtype=np.uint64)
+
+# Rough per-entry bookkeeping cost (entry object, LRU links, band slots)
+_ENTRY_OVERHEAD = 512
+
+
+def normalize_text(text: str) -> str:
+    return _WHITESPACE.sub(" ", text.lower()).strip()
+
+
+def simhash(tokens) -> int:
+    """64-bit SimHash of a token sequence, weighted by term frequency."""
+    counts = Counter(tokens)
+    if not counts:
+        return 0
+    # blake2b rather than hash() so fingerprints do not depend on PYTHONHASHSEED
+    hashes = np.frombuffer(
+        b"".join(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest() for token in counts),
+        dtype="<u8",
+    )
+    weights = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+    bits = ((hashes[:, np.newaxis] >> _BITS) & np.uint64(1)).astype(np.int64)
+    votes = (bits * 2 - 1).T @ weights
+    return int(np.packbits((votes > 0)[::-1]).view(">u8")[0])
+
+
+class _Entry:
+    __slots__ = ("key", "verdict", "fingerprint", "expires_at", "size")
+
+    def __init__(self, key, verdict, fingerprint, expires_at, size):
+        self.key = key
+        self.verdict = verdict
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
+        self.size = size
+
+
+class VerdictCache:
+    """LRU/TTL verdict cache with exact and SimHash near-duplicate lookup."""
+
+    def __init__(
+        self,
+        max_entries: int = 100_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 3600.0,
+        near_duplicates: bool = True,
+        max_distance: int = 3,
+        min_tokens: int = 8,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.ttl = float(ttl_seconds)
+        self.near_duplicates = near_duplicates
+        self.max_distance = max(0, min(int(max_distance), 15))
+        self.min_tokens = int(min_tokens)
+
+        # Split the 64-bit SimHash into max_distance + 1 bands
+        n_bands = self.max_distance + 1
+        width = 64 // n_bands
+        self._bands = [(i * width, 64 if i == n_bands - 1 else (i + 1) * width) for i in range(n_bands)]
+
+        self._entries: "OrderedDict[bytes, _Entry]" = OrderedDict()
+        self._band_index: Dict[Tuple[int, int], Set[bytes]] = {}
+        self.model_fingerprint: Optional[str] = None
+        self.bytes_used = 0
+
+        # Counters
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    # ── Model Binding ──────────────────────────────────────
+    def bind(self, fingerprint: str):
+        """Tie cached verdicts to a model; a different model clears the cache."""
+        if fingerprint != self.model_fingerprint:
+            if self.model_fingerprint is not None:
+                self.invalidations += 1
+            self.clear()
+            self.model_fingerprint = fingerprint
+
+    def clear(self):
+        self._entries.clear()
+        self._band_index.clear()
+        self.bytes_used = 0
+
+    # ── Keys ───────────────────────────────────────────────
+    def _signature(self, text: str) -> Tuple[bytes, Optional[int]]:
+        normalized = normalize_text(text)
+        key = hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+        if not self.near_duplicates:
+            return key, None
+        tokens = _TOKEN.findall(normalized)
+        if len(tokens) < self.min_tokens:
+            return key, None
+        return key, simhash(tokens)
+
+    def _band_keys(self, fingerprint: int):
+        for i, (lo, hi) in enumerate(self._bands):
+            yield i, (fingerprint >> lo) & ((1 << (hi - lo)) - 1)
+
+    # ── Lookup ─────────────────────────────────────────────
+    def get(self, text: str) -> Tuple[Optional[dict], Optional[str]]:
+        """Return ``(verdict, "exact" | "near")`` or ``(None, None)`` on a miss."""
+        key, fingerprint = self._signature(text)
+        now = time.monotonic()
+
+        entry = self._live(key, now)
+        if entry is not None:
+            self.exact_hits += 1
+            return entry.verdict, "exact"
+
+        if fingerprint is not None:
+            entry = self._nearest(fingerprint, now)
+            if entry is not None:
+                self.near_hits += 1
+                return entry.verdict, "near"
+
+        self.misses += 1
+        return None, None
+
+    def _live(self, key: bytes, now: float) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._remove(entry)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _nearest(self, fingerprint: int, now: float) -> Optional[_Entry]:
+        best, best_distance = None, self.max_distance + 1
+        seen = set()
+        for band in self._band_keys(fingerprint):
+            for key in self._band_index.get(band, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                entry = self._entries[key]
+                distance = (entry.fingerprint ^ fingerprint).bit_count()
+                if distance < best_distance:
+                    best, best_distance = entry, distance
+        if best is None:
+            return None
+        return self._live(best.key, now)
+
+    # ── Insertion & Eviction ───────────────────────────────
+    def put(self, text: str, verdict: dict):
+        key, fingerprint = self._signature(text)
+        existing = self._entries.get(key)
+        if existing is not None:
+            self._remove(existing)
+
+        size = _ENTRY_OVERHEAD + sys.getsizeof(key) + sum(
+            sys.getsizeof(k) + sys.getsizeof(v) for k, v in verdict.items()
+        )
+        entry = _Entry(key, verdict, fingerprint, time.monotonic() + self.ttl, size)
+        self._entries[key] = entry
+        self.bytes_used += size
+        if fingerprint is not None:
+            for band in self._band_keys(fingerprint):
+                self._band_index.setdefault(band, set()).add(key)
+
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes_used > self.max_bytes):
+            _, oldest = next(iter(self._entries.items()))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, entry: _Entry):
+        del self._entries[entry.key]
+        self.bytes_used -= entry.size
+        if entry.fingerprint is not None:
+            for band in self._band_keys(entry.fingerprint):
+                keys = self._band_index.get(band)
+                if keys is not None:
+                    keys.discard(entry.key)
+                    if not keys:
+                        del self._band_index[band]
+
+    # ── Stats ──────────────────────────────────────────────
+    def stats(self) -> dict:
+        hits = self.exact_hits + self.near_hits
+        lookups = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes_used,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "near_duplicates": self.near_duplicates,
+            "max_distance": self.max_distance,
+            "exact_hits": self.exact_hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "model_fingerprint": self.model_fingerprint,
+        }
@@ -0,0 +1,256 @@
+"""
+CyberSentinel AI – Cascade Pre-Screen
+=======================================
+A logistic regression on the same TF-IDF features runs before the random
+forest and settles the messages it is confident about:
+
+  p < low          – Legitimate, decided by the linear screen
+  p > high         – Phishing, decided by the linear screen
+  low <= p <= high – escalated to the forest
+
+``train.py`` fits the screen next to the forest and calibrates ``(low,
+high)`` on the held-out split: each side takes the widest band in which the
+screen disagrees with the forest on at most half of ``max_disagreement``
+of all messages, so cascade verdicts differ from forest-only verdicts on at
+most that fraction of (held-out) traffic. The screen is saved as
+``models/compiled/phishing_linear.json`` + ``phishing_linear.coef.npy``,
+fingerprinted against the pickles like the compiled forest.
+
+Offline evaluation against the forest alone, on labeled CSV/NDJSON data or
+the built-in samples:
+
+  python -m app.cascade --data emails.csv
+  python -m app.cascade --low 0.2 --high 0.8
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .atomic import save_array, write_json
+
+PHISHING_LINEAR = "phishing_linear"
+DEFAULT_MAX_DISAGREEMENT = 0.005
+
+# Below this many held-out rows the calibrated band is a rough guess
+MIN_CALIBRATION_ROWS = 1000
+
+
+class LinearScreen:
+    """Logistic regression scorer with a confident-decision band."""
+
+    def __init__(self, coef: np.ndarray, intercept: float, low: float = 0.0, high: float = 1.0,
+                 calibration: Optional[dict] = None):
+        self.coef = coef
+        self.intercept = float(intercept)
+        self.low = float(low)
+        self.high = float(high)
+        self.calibration = calibration or {}
+
+    @classmethod
+    def from_sklearn(cls, model, low: float = 0.0, high: float = 1.0, calibration: Optional[dict] = None):
+        if list(model.classes_) != [0, 1]:
+            raise ValueError(f"Expected classes [0, 1], got {list(model.classes_)}")
+        return cls(model.coef_[0].astype(np.float32), model.intercept_[0], low, high, calibration)
+
+    @property
+    def n_features(self) -> int:
+        return len(self.coef)
+
+    # ── Scoring ────────────────────────────────────────────
+    def probability(self, X) -> np.ndarray:
+        """Phishing probability for the rows of a dense or sparse TF-IDF matrix."""
+        z = np.asarray(X @ self.coef, dtype=np.float64).ravel() + self.intercept
+        return 1.0 / (1.0 + np.exp(-z))
+
+    def decide(self, p: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """``(decided, predictions)``; predictions only mean something where decided."""
+        phishing = p > self.high
+        return phishing | (p < self.low), phishing.astype(np.int64)
+
+    # ── Persistence ────────────────────────────────────────
+    def save(self, directory: str, fingerprint: str):
+        """Replace the coefficients, then the header, atomically (workers map the coef)."""
+        os.makedirs(directory, exist_ok=True)
+        save_array(os.path.join(directory, f"{PHISHING_LINEAR}.coef.npy"), self.coef)
+        header = {
+            "type": type(self).__name__,
+            "intercept": self.intercept,
+            "low": self.low,
+            "high": self.high,
+            "n_features": self.n_features,
+            "calibration": self.calibration,
+            "fingerprint": fingerprint,
+        }
+        write_json(os.path.join(directory, f"{PHISHING_LINEAR}.json"), header)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = "r") -> "LinearScreen":
+        with open(os.path.join(directory, f"{PHISHING_LINEAR}.json"), encoding="utf-8") as f:
+            header = json.load(f)
+        if header.get("type") != cls.__name__:
+            raise ValueError(f"No saved {cls.__name__} in {directory}")
+        coef = np.load(os.path.join(directory, f"{PHISHING_LINEAR}.coef.npy"), mmap_mode=mmap_mode)
+        return cls(coef, header["intercept"], header["low"], header["high"], header.get("calibration"))
+
+
+# ── Calibration ────────────────────────────────────────────
+def calibrate_thresholds(p: np.ndarray, reference: np.ndarray,
+                         max_disagreement: float = DEFAULT_MAX_DISAGREEMENT) -> Tuple[float, float]:
+    """Widest ``(low, high)`` band edges whose decisions disagree with ``reference``
+    on at most ``max_disagreement`` of the messages (half per side).
+
+    Edges sit on observed scores and decisions are strict, so ties at an
+    edge are escalated rather than risked.
+    """
+    p, reference = np.asarray(p, dtype=np.float64), np.asarray(reference)
+    n = len(p)
+    if n == 0:
+        return 0.0, 1.0
+    budget = max_disagreement * n / 2
+
+    def edge(order: np.ndarray, wrong: np.ndarray, fallback: float) -> float:
+        errors = np.cumsum(wrong[order])
+        taken = int(np.searchsorted(errors, budget, side="right"))
+        return float(p[order[taken]]) if taken < n else fallback
+
+    high = edge(np.argsort(-p, kind="stable"), reference == 0, 0.0)
+    low = edge(np.argsort(p, kind="stable"), reference == 1, 1.0)
+    return min(low, high), high
+
+
+def cascade_predictions(p: np.ndarray, forest_predictions: np.ndarray, low: float, high: float) -> np.ndarray:
+    predictions = np.asarray(forest_predictions).copy()
+    predictions[p > high] = 1
+    predictions[p < low] = 0
+    return predictions
+
+
+def evaluate(p: np.ndarray, forest_predictions: np.ndarray, low: float, high: float,
+             labels: Optional[np.ndarray] = None) -> dict:
+    """Escalation rate and agreement with the forest (plus accuracies when labeled)."""
+    p, forest_predictions = np.asarray(p), np.asarray(forest_predictions)
+    escalated = (p >= low) & (p <= high)
+    cascade = cascade_predictions(p, forest_predictions, low, high)
+    report = {
+        "messages": int(len(p)),
+        "low": round(low, 6),
+        "high": round(high, 6),
+        "escalation_rate": round(float(escalated.mean()), 4) if len(p) else 0.0,
+        "agreement_with_forest": round(float((cascade == forest_predictions).mean()), 4) if len(p) else 1.0,
+    }
+    if labels is not None and len(p):
+        labels = np.asarray(labels)
+        report["accuracy_forest"] = round(float((forest_predictions == labels).mean()), 4)
+        report["accuracy_linear"] = round(float(((p > 0.5).astype(int) == labels).mean()), 4)
+        report["accuracy_cascade"] = round(float((cascade == labels).mean()), 4)
+        report["accuracy_loss"] = round(report["accuracy_forest"] - report["accuracy_cascade"], 4)
+    return report
+
+
+def format_report(report: dict) -> str:
+    line = (f"low {report['low']:.4f}, high {report['high']:.4f}: "
+            f"{report['escalation_rate']:.1%} escalated to the forest, "
+            f"{report['agreement_with_forest']:.2%} agreement with the forest")
+    if "accuracy_cascade" in report:
+        line += (f", accuracy {report['accuracy_cascade']:.2%} "
+                 f"(forest {report['accuracy_forest']:.2%}, linear alone {report['accuracy_linear']:.2%})")
+    return line
+
+
+# ── Offline Evaluation ─────────────────────────────────────
+def _load_texts(args):
+    if args.data:
+        from .training import iter_labeled_texts
+
+        texts, labels = [], []
+        for chunk_texts, chunk_labels in iter_labeled_texts(
+            args.data, 50_000, text_column=args.text_column, label_column=args.label_column
+        ):
+            texts.extend(chunk_texts)
+            labels.extend(chunk_labels)
+            if len(texts) >= args.limit:
+                break
+        return texts[:args.limit], np.asarray(labels[:args.limit])
+
+    from train import generate_phishing_dataset
+
+    print("[!] Warning: No --data given; evaluating on the built-in training samples")
+    texts, labels = generate_phishing_dataset()
+    return texts, np.asarray(labels)
+
+
+def main(argv=None) -> int:
+    from .models import MODELS_DIR, PhishingDetector
+
+    parser = argparse.ArgumentParser(prog="python -m app.cascade",
+                                     description="Evaluate the cascade against the forest alone")
+    parser.add_argument("--models-dir", default=MODELS_DIR)
+    parser.add_argument("--data", help="labeled CSV or NDJSON (default: built-in samples)")
+    parser.add_argument("--text-column", default="text")
+    parser.add_argument("--label-column", default="label")
+    parser.add_argument("--limit", type=int, default=200_000, help="messages to evaluate")
+    parser.add_argument("--low", type=float, help="override the calibrated lower threshold")
+    parser.add_argument("--high", type=float, help="override the calibrated upper threshold")
+    args = parser.parse_args(argv)
+
+    detector = PhishingDetector(args.models_dir, cascade=True)
+    if detector.screen is None:
+        print("[!] No linear screen for these models; retrain with train.py", file=sys.stderr)
+        return 1
+    screen = detector.screen
+    low = screen.low if args.low is None else args.low
+    high = screen.high if args.high is None else args.high
+
+    texts, labels = _load_texts(args)
+    print(f"[*] Evaluating {len(texts)} messages")
+
+    # Same featurization as the service
+    if detector.engine is not None:
+        X = detector.featurizer.transform_dense(texts).copy()
+    else:
+        X = detector.vectorizer.transform(texts)
+
+    start = time.perf_counter()
+    if detector.engine is not None:
+        _, forest_predictions = detector.engine.evaluate(X)
+    else:
+        forest_predictions = detector.model.predict(X)
+    forest_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    p = screen.probability(X)
+    escalated = (p >= low) & (p <= high)
+    if escalated.any():
+        if detector.engine is not None:
+            detector.engine.evaluate(X[escalated])
+        else:
+            detector.model.predict(X[escalated])
+    cascade_s = time.perf_counter() - start
+
+    report = evaluate(p, forest_predictions, low, high, labels)
+    print(f"[+] Cascade: {format_report(report)}")
+    if "accuracy_loss" in report:
+        print(f"[+] Accuracy loss against the forest alone: {report['accuracy_loss']:+.2%}")
+    print(f"[+] Model time: forest alone {forest_s * 1000:.1f} ms, cascade {cascade_s * 1000:.1f} ms "
+          f"({forest_s / cascade_s if cascade_s else float('inf'):.1f}x)")
+    if screen.calibration:
+        print(f"[+] Calibration at training time: {json.dumps(screen.calibration)}")
+
+    # How the trade-off moves with the disagreement budget (thresholds re-fitted on this data)
+    print("\n    budget   low      high     escalated  agreement  accuracy")
+    for budget in (0.0, 0.001, 0.005, 0.01, 0.02, 0.05):
+        lo, hi = calibrate_thresholds(p, forest_predictions, budget)
+        row = evaluate(p, forest_predictions, lo, hi, labels)
+        print(f"    {budget:<8.3f} {lo:<8.4f} {hi:<8.4f} {row['escalation_rate']:>9.1%}  "
+              f"{row['agreement_with_forest']:>9.2%}  {row.get('accuracy_cascade', float('nan')):>8.2%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
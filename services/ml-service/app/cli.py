@@ -0,0 +1,359 @@
+"""
+CyberSentinel AI – Offline Bulk Scoring
+=========================================
+Scores large archives with the same models the API serves, without going
+through HTTP.
+
+  python -m app.cli phishing mailbox.mbox -o verdicts.ndjson
+  python -m app.cli phishing messages.csv --text-column body --id-column id -o verdicts.csv
+  python -m app.cli anomaly logins.parquet -o anomalies.ndjson --workers 16
+
+Inputs:
+  phishing – CSV (one text column), NDJSON (strings or {"text", "id"}), mbox
+  anomaly  – CSV or Parquet with the model's feature columns (Parquet needs pyarrow)
+
+The input is read in chunks of ``--chunk-size`` records and fanned out to a
+process pool in which every worker loads the models once. Chunks are written
+to the output (NDJSON, or CSV for a ``.csv`` path) strictly in input order;
+at most two chunks per worker are in flight, so memory does not depend on
+the input size.
+"""
+
+import argparse
+import contextlib
+import csv
+import email
+import io
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from email import policy
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .executor import _init_worker, _worker_load
+
+INPUT_FORMATS = {
+    "phishing": ("csv", "ndjson", "mbox"),
+    "anomaly": ("csv", "parquet"),
+}
+_EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".mbox": "mbox", ".parquet": "parquet"}
+
+# Output columns for CSV; NDJSON lines carry the same keys
+OUTPUT_COLUMNS = {
+    "phishing": ["record", "id", "label", "risk_score", "confidence", "phishing_probability", "error"],
+    "anomaly": ["record", "id", "label", "is_anomaly", "risk_score", "anomaly_score", "error"],
+}
+
+_TAG = re.compile(r"<[^>]+>")
+_MBOXRD_FROM = re.compile(rb"^>(>*From )")
+
+
+# ── Readers ────────────────────────────────────────────────
+# Each reader yields raw chunks; the (costly) decoding happens in the workers.
+def read_csv(path: str, chunk_size: int, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    yield from pd.read_csv(path, chunksize=chunk_size, usecols=columns, keep_default_na=False)
+
+
+def read_ndjson(path: str, chunk_size: int) -> Iterator[List[bytes]]:
+    chunk = []
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                chunk.append(line)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+    if chunk:
+        yield chunk
+
+
+def read_mbox(path: str, chunk_size: int) -> Iterator[List[bytes]]:
+    """Split an mbox file into raw messages without indexing it first."""
+    chunk: List[bytes] = []
+    message: List[bytes] = []
+    previous_blank = True
+    with open(path, "rb") as f:
+        for line in f:
+            if line.startswith(b"From ") and previous_blank:
+                if message:
+                    chunk.append(b"".join(message))
+                    message = []
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
+            else:
+                if line.startswith(b">"):
+                    line = _MBOXRD_FROM.sub(rb"\1", line)
+                message.append(line)
+            previous_blank = not line.strip()
+    if message:
+        chunk.append(b"".join(message))
+    if chunk:
+        yield chunk
+
+
+def read_parquet(path: str, chunk_size: int, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("[!] Parquet input needs pyarrow (pip install pyarrow)")
+    parquet = pq.ParquetFile(path)
+    if columns is not None:
+        columns = [c for c in columns if c in parquet.schema_arrow.names]
+    for batch in parquet.iter_batches(batch_size=chunk_size, columns=columns):
+        yield batch.to_pandas()
+
+
+# ── Worker-side Decoding ───────────────────────────────────
+def _message_text(raw: bytes) -> Tuple[Optional[str], str]:
+    """Message-ID and subject + body text of one raw email."""
+    message = email.message_from_bytes(raw, policy=policy.default)
+    body = message.get_body(preferencelist=("plain", "html"))
+    content = ""
+    if body is not None:
+        try:
+            content = body.get_content()
+        except (LookupError, ValueError):
+            content = body.get_payload(decode=True).decode("utf-8", "replace")
+        if body.get_content_subtype() == "html":
+            content = _TAG.sub(" ", content)
+    return message.get("Message-ID"), f"{message.get('Subject', '')}\n{content}".strip()
+
+
+def _decode_texts(fmt: str, payload, options: dict):
+    """Yield ``(id, text, error)`` for every record of a phishing chunk."""
+    if fmt == "csv":
+        texts = payload[options["text_column"]].astype(str)
+        ids = payload[options["id_column"]] if options.get("id_column") else [None] * len(payload)
+        for record_id, text in zip(ids, texts):
+            yield record_id, text, None if text else "Empty text"
+    elif fmt == "ndjson":
+        for line in payload:
+            try:
+                value = json.loads(line)
+            except ValueError as e:
+                yield None, None, str(e)
+                continue
+            record_id = value.get("id") if isinstance(value, dict) else None
+            text = value.get("text") if isinstance(value, dict) else value
+            if isinstance(text, str) and text:
+                yield record_id, text, None
+            else:
+                yield record_id, None, "Expected a non-empty JSON string or an object with a 'text' field"
+    else:
+        for raw in payload:
+            try:
+                record_id, text = _message_text(raw)
+                yield record_id, text, None if text else "Empty message"
+            except Exception as e:
+                yield None, None, f"Unparseable message: {e}"
+
+
+def _phishing_rows(detector, fmt: str, payload, options: dict):
+    decoded = list(_decode_texts(fmt, payload, options))
+    texts = [text for _, text, error in decoded if error is None]
+    results = iter(detector.predict_batch(texts))
+    for record_id, _, error in decoded:
+        if error is not None:
+            yield {"id": record_id, "error": error}
+            continue
+        result = next(results)
+        yield {
+            "id": record_id,
+            "label": result["label"],
+            "risk_score": result["risk_score"],
+            "confidence": result["confidence"],
+            "phishing_probability": result["probabilities"]["phishing"],
+        }
+
+
+def _anomaly_rows(detector, payload: pd.DataFrame, options: dict):
+    # Missing feature columns default to 0, as in AnomalyDetector.predict_batch
+    X = payload.reindex(columns=detector.features, fill_value=0)
+    X = X.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    invalid = np.isnan(X).any(axis=1)
+    results = iter(detector.predict_matrix(X[~invalid]))
+    ids = payload[options["id_column"]] if options.get("id_column") else [None] * len(payload)
+    for record_id, bad in zip(ids, invalid):
+        if bad:
+            yield {"id": record_id, "error": "Non-numeric feature value"}
+            continue
+        result = next(results)
+        yield {
+            "id": record_id,
+            "label": result["label"],
+            "is_anomaly": result["is_anomaly"],
+            "risk_score": result["risk_score"],
+            "anomaly_score": result["anomaly_score"],
+        }
+
+
+def _json_value(value):
+    # pandas hands back numpy scalars for id columns
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _init_cli_worker(models_dir: str):
+    # Model loading logs to stdout, which may be the output stream
+    sys.stdout = sys.stderr
+    _init_worker(models_dir)
+
+
+def _score_chunk(kind: str, fmt: str, payload, start: int, output: str, options: dict, models_dir: str):
+    """Worker task: score one chunk and return it already serialized."""
+    detector = _worker_load(models_dir)[kind]
+    if kind == "phishing":
+        rows = _phishing_rows(detector, fmt, payload, options)
+    else:
+        rows = _anomaly_rows(detector, payload, options)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if output == "csv" else None
+    count = errors = 0
+    for count, row in enumerate(rows, 1):
+        row = {"record": start + count, **{k: _json_value(v) for k, v in row.items()}}
+        errors += "error" in row
+        if writer is not None:
+            writer.writerow([row.get(column, "") for column in OUTPUT_COLUMNS[kind]])
+        else:
+            buffer.write(json.dumps(row) + "\n")
+    return buffer.getvalue(), count, errors
+
+
+# ── Driver ─────────────────────────────────────────────────
+def _chunks(kind: str, fmt: str, path: str, chunk_size: int, options: dict, features: List[str]):
+    if fmt == "ndjson":
+        return read_ndjson(path, chunk_size)
+    if fmt == "mbox":
+        return read_mbox(path, chunk_size)
+    id_columns = [options["id_column"]] if options.get("id_column") else []
+    columns = [options["text_column"]] + id_columns if kind == "phishing" else None
+    if fmt == "csv":
+        if columns is None:
+            # usecols must not name missing columns; anomaly features may be absent
+            header = pd.read_csv(path, nrows=0).columns
+            columns = [c for c in features + id_columns if c in header]
+        return read_csv(path, chunk_size, columns)
+    return read_parquet(path, chunk_size, columns or features + id_columns)
+
+
+def score_file(
+    kind: str,
+    path: str,
+    output,
+    fmt: str,
+    output_format: str,
+    models_dir: str,
+    features: List[str],
+    chunk_size: int = 2048,
+    workers: int = 0,
+    options: Optional[dict] = None,
+) -> dict:
+    """Score ``path`` into the open text stream ``output``; returns run stats."""
+    options = options or {}
+    workers = max(1, workers or os.cpu_count() or 1)
+    start_time = time.perf_counter()
+    records = errors = chunks = 0
+
+    if output_format == "csv":
+        csv.writer(output).writerow(OUTPUT_COLUMNS[kind])
+
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_cli_worker,
+        initargs=(models_dir,),
+    )
+    pending = deque()
+    submitted = 0
+    try:
+        for payload in _chunks(kind, fmt, path, chunk_size, options, features):
+            pending.append(pool.submit(_score_chunk, kind, fmt, payload, submitted, output_format, options, models_dir))
+            submitted += len(payload)
+            # Bounded look-ahead; results are written strictly in order
+            while len(pending) >= workers * 2:
+                text, count, failed = pending.popleft().result()
+                output.write(text)
+                records, errors, chunks = records + count, errors + failed, chunks + 1
+        while pending:
+            text, count, failed = pending.popleft().result()
+            output.write(text)
+            records, errors, chunks = records + count, errors + failed, chunks + 1
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    elapsed = time.perf_counter() - start_time
+    return {
+        "records": records,
+        "errors": errors,
+        "chunks": chunks,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "records_per_sec": round(records / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+def _detect_format(path: str, kind: str, explicit: Optional[str]) -> str:
+    fmt = explicit or _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt not in INPUT_FORMATS[kind]:
+        raise SystemExit(
+            f"[!] Cannot score {kind} from '{path}': pass --format ({', '.join(INPUT_FORMATS[kind])})"
+        )
+    return fmt
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .registry import ModelRegistry
+    from .models import MODELS_DIR
+
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Bulk-score archives offline")
+    parser.add_argument("kind", choices=sorted(INPUT_FORMATS), help="detector to run")
+    parser.add_argument("input", help="input file")
+    parser.add_argument("-o", "--output", default="-", help="output file, .csv for CSV, else NDJSON (default: stdout)")
+    parser.add_argument("--format", choices=sorted(set(_EXTENSIONS.values())), help="input format (default: from extension)")
+    parser.add_argument("--text-column", default="text", help="CSV column holding the message text")
+    parser.add_argument("--id-column", help="column copied to the output as 'id'")
+    parser.add_argument("--chunk-size", type=int, default=2048, help="records per model call")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (default: one per CPU)")
+    parser.add_argument("--model-version", help="registry version to use (default: the one the API serves)")
+    args = parser.parse_args(argv)
+
+    fmt = _detect_format(args.input, args.kind, args.format)
+    output_format = "csv" if args.output.lower().endswith(".csv") else "ndjson"
+
+    # Resolve and verify the version once here; workers then load it from disk
+    registry = ModelRegistry(MODELS_DIR)
+    with contextlib.redirect_stdout(sys.stderr):
+        bundle = registry.load(args.model_version or registry.desired_version())
+    features = list(bundle.anomaly.features)
+
+    options = {"text_column": args.text_column, "id_column": args.id_column}
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        stats = score_file(
+            args.kind, args.input, output, fmt, output_format, bundle.path, features,
+            chunk_size=max(1, args.chunk_size), workers=args.workers, options=options,
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(
+        f"[+] Scored {stats['records']} records ({stats['errors']} errors) with model "
+        f"'{bundle.version}' in {stats['seconds']}s – {stats['records_per_sec']} records/sec "
+        f"({stats['workers']} workers)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
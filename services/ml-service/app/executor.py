@@ -0,0 +1,229 @@
+"""
+CyberSentinel AI – Inference Execution Layer
+==============================================
+Runs CPU-bound model inference off the asyncio event loop.
+
+Two modes are supported:
+  thread  – a thread pool sharing the detectors already loaded in this process
+  process – a process pool; every worker loads its own detectors once in the
+            pool initializer and keeps them for its lifetime. After a model
+            hot swap workers load the new version on first use and keep the
+            most recent ``worker_models`` of them (default
+            ``_WORKER_VERSIONS``; more when tenant models are served)
+
+The number of submitted-but-unfinished tasks is bounded; once the limit is
+reached ``run`` raises ``InferenceQueueFull`` instead of queueing more work.
+At most ``workers`` calls are handed to the pool at a time; the others wait
+in a ``PriorityGate`` ordered by their admission ticket and are dropped with
+``DeadlineExceeded`` once their deadline passes.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from .admission import DeadlineExceeded, PriorityGate, Ticket
+
+EXECUTOR_MODES = ("thread", "process")
+
+
+class InferenceQueueFull(Exception):
+    """Raised when the executor already holds ``max_pending`` tasks."""
+
+
+def _score(detectors: Dict[str, Any], kind: str, items: List[Any]) -> Tuple[List[dict], Dict[str, int]]:
+    detector = detectors.get(kind)
+    if detector is None:
+        raise ValueError(f"Unknown detector: {kind}")
+    # Stage timings travel back with the results, also from process workers
+    timings: Dict[str, int] = {}
+    return detector.predict_batch(items, timings), timings
+
+
+# ── Process Worker State ───────────────────────────────────
+# models_dir -> detectors; the old version stays until in-flight work drains
+_WORKER_VERSIONS = 2
+_worker_max_models = _WORKER_VERSIONS
+_worker_detectors: "OrderedDict[Optional[str], Dict[str, Any]]" = OrderedDict()
+_worker_startup_ms: Optional[float] = None
+
+
+def _worker_load(models_dir: Optional[str]) -> Dict[str, Any]:
+    detectors = _worker_detectors.get(models_dir)
+    if detectors is None:
+        from .models import MODELS_DIR, PhishingDetector, AnomalyDetector
+
+        path = models_dir or MODELS_DIR
+        detectors = {"phishing": PhishingDetector(path), "anomaly": AnomalyDetector(path)}
+        _worker_detectors[models_dir] = detectors
+        while len(_worker_detectors) > _worker_max_models:
+            _worker_detectors.popitem(last=False)
+    else:
+        _worker_detectors.move_to_end(models_dir)
+    return detectors
+
+
+def _init_worker(models_dir: Optional[str] = None, max_models: int = _WORKER_VERSIONS):
+    """Process pool initializer: load the models once per worker."""
+    global _worker_startup_ms, _worker_max_models
+    _worker_max_models = max(1, max_models)
+    start = time.perf_counter()
+    _worker_load(models_dir)
+    _worker_startup_ms = round((time.perf_counter() - start) * 1000, 2)
+
+
+def _worker_score(kind: str, items: List[Any], models_dir: Optional[str] = None) -> Tuple[List[dict], Dict[str, int]]:
+    return _score(_worker_load(models_dir), kind, items)
+
+
+def _worker_preload(models_dir: Optional[str]):
+    _worker_load(models_dir)
+
+
+def _worker_ping() -> dict:
+    from .runtime import process_info
+
+    return process_info(_worker_startup_ms)
+
+
+class InferenceExecutor:
+    """Thread- or process-pool backed inference runner with bounded depth."""
+
+    def __init__(
+        self,
+        mode: str = "thread",
+        workers: Optional[int] = None,
+        max_pending: int = 256,
+        worker_models: int = _WORKER_VERSIONS,
+    ):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Executor mode must be one of {EXECUTOR_MODES}, got '{mode}'")
+        self.mode = mode
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.max_pending = max(1, int(max_pending))
+        # Process mode: model directories each worker keeps loaded
+        self.worker_models = max(1, int(worker_models))
+        self._pool: Optional[Executor] = None
+        self._gate = PriorityGate(self.workers)
+        self._detectors: Dict[str, Any] = {}
+        self.worker_info: Dict[int, dict] = {}
+
+        # Counters
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.expired = 0
+
+    # ── Lifecycle ──────────────────────────────────────────
+    def start(self, detectors: Optional[Dict[str, Any]] = None, models_dir: Optional[str] = None):
+        """Create the pool. Thread mode scores with ``detectors``, process
+        workers preload the models in ``models_dir``."""
+        if self._pool is not None:
+            return
+        if self.mode == "thread":
+            self._detectors = dict(detectors or {})
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        else:
+            # spawn keeps workers independent of the server's threads and sockets
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(models_dir, self.worker_models),
+            )
+            # Bring the workers up now so model loading is not paid by the first requests
+            for _ in range(self.workers):
+                self._pool.submit(_worker_ping).add_done_callback(self._record_worker)
+        print(f"[+] Inference executor started ({self.mode} mode, {self.workers} workers)")
+
+    def _record_worker(self, future):
+        if not future.cancelled() and future.exception() is None:
+            info = future.result()
+            self.worker_info[info["pid"]] = info
+
+    def preload(self, models_dir: str, timeout: float = 120.0):
+        """Process mode: have the workers load ``models_dir`` before it takes traffic.
+
+        Best effort – the pool picks the workers, so one may be asked twice
+        and another load on its first request instead.
+        """
+        if self.mode != "process" or self._pool is None:
+            return
+        futures = [self._pool.submit(_worker_preload, models_dir) for _ in range(self.workers)]
+        for future in futures:
+            future.result(timeout=timeout)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # ── Execution ──────────────────────────────────────────
+    async def run(
+        self,
+        kind: str,
+        items: List[Any],
+        detectors: Optional[Dict[str, Any]] = None,
+        models_dir: Optional[str] = None,
+        timings: Optional[Dict[str, int]] = None,
+        ticket: Optional[Ticket] = None,
+    ) -> List[dict]:
+        """Score ``items`` with the ``kind`` detector in the pool.
+
+        ``detectors`` (thread mode) and ``models_dir`` (process mode) pin the
+        call to one model version; by default the ones given to ``start`` are used.
+        ``timings`` is updated with the detector's per-stage durations (ns).
+        ``ticket`` orders the call among those waiting for a worker.
+        """
+        if self._pool is None:
+            raise RuntimeError("Inference executor is not running")
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise InferenceQueueFull(f"Inference queue is full ({self.max_pending} pending)")
+
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        try:
+            try:
+                await self._gate.acquire(ticket or Ticket())
+            except DeadlineExceeded:
+                self.expired += 1
+                raise
+            try:
+                if self.mode == "thread":
+                    results, stages = await loop.run_in_executor(
+                        self._pool, _score, detectors or self._detectors, kind, items
+                    )
+                else:
+                    results, stages = await loop.run_in_executor(self._pool, _worker_score, kind, items, models_dir)
+            finally:
+                self._gate.release()
+                self.completed += 1
+        finally:
+            self.pending -= 1
+        if timings is not None:
+            timings.update(stages)
+        return results
+
+    @property
+    def waiting(self) -> int:
+        """Calls waiting for a free worker."""
+        return self._gate.waiting
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "worker_models": self.worker_models if self.mode == "process" else None,
+            "pending": self.pending,
+            "waiting": self._gate.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "workers_info": list(self.worker_info.values()) if self.mode == "process" else None,
+        }
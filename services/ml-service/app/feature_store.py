@@ -0,0 +1,179 @@
+"""
+CyberSentinel AI – Login Feature Store
+========================================
+Derives the ``AnomalyDetector`` feature vector from raw login events
+(user, IP, device, success, timestamp) so callers no longer aggregate
+login history themselves.
+
+Per-user state is a fixed-size ``__slots__`` record, updated in O(1):
+
+  login_hour       – UTC hour of the event
+  ip_frequency     – how many of the user's last ``ip_window`` logins came
+                     from this IP, the current one included (1 = new IP), the
+                     scale the model was trained on (ring buffer of 32-bit IP
+                     hashes + running per-IP counts)
+  device_change    – 1 when the device differs from the previous login's
+  failed_attempts  – failed logins within the last ``failure_window`` seconds
+  session_duration – taken from the event when given, otherwise the user's
+                     running average of reported durations (default 30 min)
+
+IPs are keyed by their CRC-32, not ``hash()``, so the keys do not change with
+``PYTHONHASHSEED`` between processes and restarts.
+
+A user's first ``warmup_logins`` logins are flagged ``warming_up``: without a
+history every IP looks new (``ip_frequency`` 1–5), so callers report those
+events without raising them as anomalies.
+
+Memory is bounded: at most ``max_users`` users are tracked (least recently
+seen evicted first) and users idle for ``idle_ttl`` seconds are dropped.
+State lives in this process; with several replicas, route a user's events
+to the same one.
+"""
+
+import time
+import zlib
+from array import array
+from collections import OrderedDict, deque
+from typing import Dict, Optional
+
+DEFAULT_SESSION_MINUTES = 30.0
+_SESSION_SMOOTHING = 0.2
+
+
+class _UserState:
+    __slots__ = ("ips", "ip_counts", "cursor", "logins", "device", "failures", "session", "last_seen")
+
+    def __init__(self, ip_window: int):
+        self.ips = array("I", bytes(4 * ip_window))
+        self.ip_counts: Dict[int, int] = {}
+        self.cursor = 0
+        self.logins = 0
+        self.device: Optional[str] = None
+        # Created on the first failure; most users never need one
+        self.failures: Optional[deque] = None
+        self.session = DEFAULT_SESSION_MINUTES
+        self.last_seen = 0.0
+
+
+class LoginFeatureStore:
+    """Bounded per-user sliding-window state for login anomaly features."""
+
+    def __init__(
+        self,
+        max_users: int = 100_000,
+        idle_ttl: float = 86_400.0,
+        ip_window: int = 100,
+        failure_window: float = 3_600.0,
+        max_failures: int = 100,
+        warmup_logins: int = 5,
+    ):
+        self.max_users = max(1, int(max_users))
+        self.idle_ttl = float(idle_ttl)
+        self.ip_window = max(1, int(ip_window))
+        self.failure_window = float(failure_window)
+        self.max_failures = max(1, int(max_failures))
+        # Counted in the IP window, so it cannot exceed it
+        self.warmup_logins = min(max(0, int(warmup_logins)), self.ip_window)
+        self._users: "OrderedDict[str, _UserState]" = OrderedDict()
+
+        # Counters
+        self.events = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # ── Ingestion ──────────────────────────────────────────
+    def observe(
+        self,
+        user: str,
+        ip: str,
+        device: str = "",
+        success: bool = True,
+        timestamp: Optional[float] = None,
+        session_duration: Optional[float] = None,
+    ) -> dict:
+        """Fold one login event into the user's state and return its features."""
+        now = time.time() if timestamp is None else timestamp
+        self.events += 1
+
+        users = self._users
+        state = users.get(user)
+        if state is None:
+            state = users[user] = _UserState(self.ip_window)
+            state.last_seen = now
+            self._evict(now)
+        else:
+            users.move_to_end(user)
+            state.last_seen = max(state.last_seen, now)
+
+        # IP ring buffer: replace the oldest slot once full, adjusting the counts
+        counts = state.ip_counts
+        key = zlib.crc32(ip.encode("utf-8"))
+        if state.logins == self.ip_window:
+            evicted = state.ips[state.cursor]
+            remaining = counts[evicted] - 1
+            if remaining:
+                counts[evicted] = remaining
+            else:
+                del counts[evicted]
+        else:
+            state.logins += 1
+        state.ips[state.cursor] = key
+        state.cursor = (state.cursor + 1) % self.ip_window
+        counts[key] = counts.get(key, 0) + 1
+
+        device_change = int(state.device is not None and device != state.device)
+        state.device = device
+
+        # Failure timestamps older than the window fall off the left
+        failures = state.failures
+        if not success:
+            if failures is None:
+                failures = state.failures = deque(maxlen=self.max_failures)
+            failures.append(now)
+        if failures:
+            horizon = now - self.failure_window
+            while failures and failures[0] <= horizon:
+                failures.popleft()
+
+        if session_duration is not None:
+            state.session += _SESSION_SMOOTHING * (session_duration - state.session)
+            session = session_duration
+        else:
+            session = state.session
+
+        return {
+            "login_hour": time.gmtime(now).tm_hour,
+            "ip_frequency": counts[key],
+            "device_change": device_change,
+            "failed_attempts": len(failures) if failures else 0,
+            "session_duration": round(session, 2),
+            "warming_up": state.logins <= self.warmup_logins,
+        }
+
+    # ── Eviction ───────────────────────────────────────────
+    def _evict(self, now: float):
+        users = self._users
+        # Least recently seen users sit at the front
+        horizon = now - self.idle_ttl
+        while users:
+            user, state = next(iter(users.items()))
+            if state.last_seen > horizon:
+                break
+            del users[user]
+            self.expirations += 1
+        while len(users) > self.max_users:
+            users.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._users),
+            "max_users": self.max_users,
+            "events": self.events,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "ip_window": self.ip_window,
+            "warmup_logins": self.warmup_logins,
+            "failure_window_seconds": self.failure_window,
+            "idle_ttl_seconds": self.idle_ttl,
+        }
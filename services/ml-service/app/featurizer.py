@@ -0,0 +1,381 @@
+"""
+CyberSentinel AI – Fast TF-IDF Featurizer
+===========================================
+A frozen, inference-only replacement for ``TfidfVectorizer.transform``.
+
+The fitted vocabulary is compiled into a token index: every token that
+occurs in a vocabulary term gets an integer id, unigrams resolve through an
+array and n-grams through a sorted array of integer keys searched in bulk,
+so no n-gram strings are built per message. The idf weights are baked in, the tokenizer is
+compiled once (with an ASCII fast path), and dense rows are written straight into a reusable buffer.
+
+``train.py`` exports the featurizer next to the vectorizer pickle
+(``tfidf_featurizer.json`` + ``tfidf_idf.npy``). Run ``python -m
+app.featurizer`` from the ml-service directory to check parity against the
+shipped ``models/tfidf_vectorizer.pkl``.
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from .atomic import save_array, write_json
+
+FEATURIZER_FILE = "tfidf_featurizer.json"
+IDF_FILE = "tfidf_idf.npy"
+
+_UNKNOWN = -1
+
+# Rows in the per-thread dense buffer; larger batches are featurized in blocks
+MAX_BUFFER_ROWS = 1024
+
+# sklearn's default token pattern. A greedy \w run always ends on a word
+# boundary, so "\w\w+" finds exactly the same tokens with less work, and for
+# pure-ASCII text a byte translation table plus split() is faster still.
+DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+_ASCII_WORD = frozenset(b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_")
+_ASCII_SEPARATORS = bytes(c if c in _ASCII_WORD else 0x20 for c in range(256))
+
+
+class TfidfFeaturizer:
+    """Precompiled word n-gram TF-IDF featurizer with a frozen vocabulary."""
+
+    def __init__(
+        self,
+        terms: List[str],
+        idf: Optional[np.ndarray],
+        stop_words: Iterable[str] = (),
+        token_pattern: str = DEFAULT_TOKEN_PATTERN,
+        ngram_range=(1, 1),
+        lowercase: bool = True,
+        norm: Optional[str] = "l2",
+        sublinear_tf: bool = False,
+        binary: bool = False,
+    ):
+        if norm not in ("l1", "l2", None):
+            raise ValueError(f"Unsupported norm: {norm}")
+        self.terms = list(terms)
+        self.idf = None if idf is None else np.asarray(idf, dtype=np.float64)
+        # Export fingerprint of the pickles it was compiled from (set by ``load``)
+        self.fingerprint: Optional[str] = None
+        self.stop_words = frozenset(stop_words)
+        self.token_pattern = token_pattern
+        self.ngram_range = (int(ngram_range[0]), int(ngram_range[1]))
+        self.lowercase = lowercase
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+        self.binary = binary
+
+        if token_pattern == DEFAULT_TOKEN_PATTERN:
+            self._findall = re.compile(r"\w\w+").findall
+            self._tokenize = self._tokenize_default
+        else:
+            self._findall = re.compile(token_pattern).findall
+            self._tokenize = self._findall
+        self._compile_index()
+        self._local = threading.local()
+
+    @property
+    def n_features(self) -> int:
+        return len(self.terms)
+
+    # ── Construction ───────────────────────────────────────
+    def _compile_index(self):
+        """Build the token id table, unigram array and sorted n-gram key index."""
+        token_ids = {}
+        for term in self.terms:
+            for token in term.split(" "):
+                token_ids.setdefault(token, len(token_ids))
+        self._token_ids = token_ids
+        self._n_tokens = max(1, len(token_ids))
+
+        self._unigrams = np.full(self._n_tokens, _UNKNOWN, dtype=np.int64)
+        ngram_keys = {}
+        for index, term in enumerate(self.terms):
+            ids = [token_ids[token] for token in term.split(" ")]
+            if len(ids) == 1:
+                self._unigrams[ids[0]] = index
+            else:
+                ngram_keys.setdefault(len(ids), []).append((self._ngram_key(ids), index))
+
+        # n-gram keys are positional integers in base n_tokens; they only fit
+        # int64 while n_tokens ** n does
+        self._ngrams = {}
+        for n, pairs in ngram_keys.items():
+            if self._n_tokens ** n >= 2 ** 63:
+                raise ValueError(f"{n}-gram keys overflow int64 for {self._n_tokens} tokens")
+            pairs.sort()
+            keys = np.array([key for key, _ in pairs], dtype=np.int64)
+            indices = np.array([index for _, index in pairs], dtype=np.int64)
+            self._ngrams[n] = (keys, indices)
+
+    def _ngram_key(self, ids) -> int:
+        key = 0
+        for token_id in ids:
+            key = key * self._n_tokens + token_id
+        return key
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer) -> "TfidfFeaturizer":
+        """Compile a fitted sklearn ``TfidfVectorizer``."""
+        unsupported = (
+            vectorizer.analyzer != "word"
+            or vectorizer.preprocessor is not None
+            or vectorizer.tokenizer is not None
+            or vectorizer.strip_accents is not None
+            or vectorizer.input != "content"
+        )
+        if unsupported:
+            raise ValueError("Only the default word analyzer can be compiled")
+
+        terms = [None] * len(vectorizer.vocabulary_)
+        for term, index in vectorizer.vocabulary_.items():
+            terms[index] = term
+
+        return cls(
+            terms=terms,
+            idf=vectorizer.idf_ if vectorizer.use_idf else None,
+            stop_words=vectorizer.get_stop_words() or (),
+            token_pattern=vectorizer.token_pattern,
+            ngram_range=vectorizer.ngram_range,
+            lowercase=vectorizer.lowercase,
+            norm=vectorizer.norm,
+            sublinear_tf=vectorizer.sublinear_tf,
+            binary=vectorizer.binary,
+        )
+
+    # ── Export ─────────────────────────────────────────────
+    def save(self, directory: str, fingerprint: Optional[str] = None):
+        """Write ``tfidf_featurizer.json`` and ``tfidf_idf.npy`` to ``directory``.
+
+        ``fingerprint`` identifies the pickles it was compiled from, so a
+        retrained vectorizer is detected even when its vocabulary size is unchanged.
+        Both files are replaced atomically, since workers may have the idf mapped.
+        """
+        meta = {
+            "fingerprint": fingerprint,
+            "terms": self.terms,
+            "stop_words": sorted(self.stop_words),
+            "token_pattern": self.token_pattern,
+            "ngram_range": list(self.ngram_range),
+            "lowercase": self.lowercase,
+            "norm": self.norm,
+            "sublinear_tf": self.sublinear_tf,
+            "binary": self.binary,
+            "use_idf": self.idf is not None,
+        }
+        # idf first: the header is what marks the export complete
+        if self.idf is not None:
+            save_array(os.path.join(directory, IDF_FILE), self.idf)
+        write_json(os.path.join(directory, FEATURIZER_FILE), meta)
+
+    @classmethod
+    def exists(cls, directory: str) -> bool:
+        return os.path.exists(os.path.join(directory, FEATURIZER_FILE))
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = None) -> "TfidfFeaturizer":
+        with open(os.path.join(directory, FEATURIZER_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        fingerprint = meta.pop("fingerprint", None)
+        idf = None
+        if meta.pop("use_idf"):
+            idf = np.load(os.path.join(directory, IDF_FILE), mmap_mode=mmap_mode)
+        featurizer = cls(idf=idf, **meta)
+        featurizer.fingerprint = fingerprint
+        return featurizer
+
+    # ── Featurization ──────────────────────────────────────
+    def _tokenize_default(self, text: str) -> List[str]:
+        if text.isascii():
+            words = text.encode("ascii").translate(_ASCII_SEPARATORS).decode("ascii").split()
+            return [word for word in words if len(word) > 1]
+        return self._findall(text)
+
+    def _features(self, text: str) -> np.ndarray:
+        """Vocabulary indices of every n-gram in ``text`` (with repeats)."""
+        if self.lowercase:
+            text = text.lower()
+        stop_words = self.stop_words
+        get = self._token_ids.get
+        ids = np.array(
+            [get(token, _UNKNOWN) for token in self._tokenize(text) if token not in stop_words],
+            dtype=np.int64,
+        )
+
+        min_n, max_n = self.ngram_range
+        found = []
+        if min_n == 1:
+            unigrams = self._unigrams[ids[ids != _UNKNOWN]]
+            found.append(unigrams[unigrams != _UNKNOWN])
+
+        # Every window of n known tokens is encoded and looked up at once
+        known = ids != _UNKNOWN
+        for n in range(max(min_n, 2), min(max_n, len(ids)) + 1):
+            if n not in self._ngrams:
+                continue
+            span = len(ids) - n + 1
+            valid = known[:span].copy()
+            keys = ids[:span].copy()
+            for offset in range(1, n):
+                valid &= known[offset:offset + span]
+                keys = keys * self._n_tokens + ids[offset:offset + span]
+            keys = keys[valid]
+
+            sorted_keys, indices = self._ngrams[n]
+            positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+            hits = sorted_keys[positions] == keys
+            found.append(indices[positions[hits]])
+
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(found) if len(found) > 1 else found[0]
+
+    def _weights(self, features: np.ndarray):
+        """Return ``(indices, tf-idf weights)`` for one document."""
+        indices, counts = np.unique(features, return_counts=True)
+        if self.binary:
+            weights = np.ones(len(indices), dtype=np.float64)
+        else:
+            weights = counts.astype(np.float64)
+            if self.sublinear_tf:
+                weights = np.log(weights) + 1.0
+        if self.idf is not None:
+            weights *= self.idf[indices]
+
+        if self.norm == "l2":
+            total = np.sqrt(np.dot(weights, weights))
+        elif self.norm == "l1":
+            total = np.abs(weights).sum()
+        else:
+            total = 0.0
+        if total > 0:
+            weights /= total
+        return indices, weights
+
+    def _buffer(self, n_rows: int) -> np.ndarray:
+        # One buffer per thread, grown up to MAX_BUFFER_ROWS; callers use the
+        # rows before the next call
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None or buffer.shape[0] < n_rows:
+            buffer = np.zeros((min(max(n_rows, 64), MAX_BUFFER_ROWS), self.n_features), dtype=np.float32)
+            self._local.buffer = buffer
+        return buffer[:n_rows]
+
+    def transform_dense(self, texts: List[str], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Write float32 TF-IDF rows for ``texts`` into ``out`` (or a reused buffer).
+
+        Without ``out``, more than ``MAX_BUFFER_ROWS`` texts get a fresh array
+        instead of the per-thread buffer, so one large call does not pin memory
+        for the thread's lifetime; ``iter_dense`` keeps it bounded throughout.
+        """
+        if out is None:
+            if len(texts) <= MAX_BUFFER_ROWS:
+                out = self._buffer(len(texts))
+            else:
+                out = np.zeros((len(texts), self.n_features), dtype=np.float32)
+        out[:len(texts)] = 0.0
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            if len(features):
+                indices, weights = self._weights(features)
+                out[row, indices] = weights
+        return out[:len(texts)]
+
+    def iter_dense(self, texts: List[str], block_rows: int = MAX_BUFFER_ROWS) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield ``(offset, rows)`` for blocks of at most ``block_rows`` texts.
+
+        The rows share the per-thread buffer and are overwritten by the next block.
+        """
+        block_rows = max(1, min(block_rows, MAX_BUFFER_ROWS))
+        for offset in range(0, len(texts), block_rows):
+            yield offset, self.transform_dense(texts[offset:offset + block_rows])
+
+    def transform(self, texts: List[str]) -> sp.csr_matrix:
+        """Return the same CSR matrix as ``TfidfVectorizer.transform``."""
+        indptr = [0]
+        indices, data = [], []
+        for text in texts:
+            features = self._features(text)
+            if len(features):
+                row_indices, row_weights = self._weights(features)
+                indices.append(row_indices)
+                data.append(row_weights)
+                indptr.append(indptr[-1] + len(row_indices))
+            else:
+                indptr.append(indptr[-1])
+
+        return sp.csr_matrix(
+            (
+                np.concatenate(data) if data else np.zeros(0, dtype=np.float64),
+                np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64),
+                np.asarray(indptr, dtype=np.int64),
+            ),
+            shape=(len(texts), self.n_features),
+        )
+
+
+# ── Parity Checks ──────────────────────────────────────────
+def check_parity(vectorizer, featurizer: TfidfFeaturizer, texts: List[str], atol: float = 1e-9) -> dict:
+    """Compare the featurizer against the fitted vectorizer on ``texts``."""
+    expected = vectorizer.transform(texts).toarray()
+    sparse = featurizer.transform(texts).toarray()
+    dense = featurizer.transform_dense(texts, out=np.zeros((len(texts), featurizer.n_features), np.float32))
+    return {
+        "samples": len(texts),
+        "max_abs_diff": float(np.max(np.abs(sparse - expected))) if len(texts) else 0.0,
+        "max_abs_diff_float32": float(np.max(np.abs(dense - expected))) if len(texts) else 0.0,
+        "ok": bool(
+            np.allclose(sparse, expected, atol=atol, rtol=0)
+            and np.allclose(dense, expected, atol=1e-6, rtol=0)
+        ),
+    }
+
+
+def _sample_texts(vectorizer, n: int, rng: np.random.Generator) -> List[str]:
+    # Shuffled vocabulary terms mixed with stop words, noise and punctuation
+    vocab = np.array(sorted(vectorizer.vocabulary_))
+    stop_words = np.array(sorted(vectorizer.get_stop_words() or ["the"]))
+    noise = np.array(["Click!", "URGENT", "$1,000", "e-mail", "naïve", "x", "2024", "ÜBER", "\n", "..."])
+    texts = []
+    for _ in range(n):
+        words = list(rng.choice(vocab, size=rng.integers(0, 40)))
+        words += list(rng.choice(stop_words, size=rng.integers(0, 10)))
+        words += list(rng.choice(noise, size=rng.integers(0, 5)))
+        rng.shuffle(words)
+        texts.append(" ".join(word.upper() if rng.random() < 0.2 else word for word in words))
+    return texts
+
+
+def main() -> int:
+    """Check the featurizer against the shipped vectorizer pickle."""
+    import warnings
+
+    import joblib
+
+    from .models import MODELS_DIR
+
+    warnings.filterwarnings("ignore", category=UserWarning)
+    vectorizer = joblib.load(os.path.join(MODELS_DIR, "tfidf_vectorizer.pkl"))
+    featurizer = TfidfFeaturizer.from_vectorizer(vectorizer)
+    texts = _sample_texts(vectorizer, 2000, np.random.default_rng(42)) + ["", "   ", "the and of"]
+
+    report = check_parity(vectorizer, featurizer, texts)
+    print(f"[{'+' if report['ok'] else '!'}] TF-IDF featurizer parity: {report}")
+    ok = report["ok"]
+
+    if TfidfFeaturizer.exists(MODELS_DIR):
+        report = check_parity(vectorizer, TfidfFeaturizer.load(MODELS_DIR), texts)
+        print(f"[{'+' if report['ok'] else '!'}] Exported featurizer parity: {report}")
+        ok &= report["ok"]
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
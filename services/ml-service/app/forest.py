@@ -0,0 +1,375 @@
+"""
+CyberSentinel AI – Compiled Forest Inference Engine
+=====================================================
+Flattens fitted scikit-learn tree ensembles into contiguous NumPy arrays
+(feature, threshold, left, right, value) and evaluates every tree of the
+forest in one vectorized traversal.
+
+  CompiledForestClassifier – RandomForestClassifier → class probabilities
+  CompiledIsolationForest  – IsolationForest → path-length anomaly scores
+
+Labels are derived from the same pass, so a prediction never walks the
+forest twice. Run ``python -m app.forest`` from the ml-service directory to
+check parity against the shipped ``models/*.pkl``.
+
+Compiled forests can be saved as raw ``.npy`` arrays plus a JSON header and
+loaded back with ``mmap_mode="r"`` so that every worker process maps the
+same physical pages from the OS page cache.
+"""
+
+import json
+import os
+import sys
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .atomic import save_array, write_json
+
+# sklearn's child id for leaves; compiled leaves instead loop back onto
+# themselves so extra traversal steps are no-ops
+_LEAF = -1
+
+
+def _float32_thresholds(threshold: np.ndarray) -> np.ndarray:
+    """Round thresholds down to float32 without changing any comparison.
+
+    Trees compare float32 inputs against float64 thresholds; for a float32
+    ``x``, ``x <= t`` is equivalent to ``x <= t32`` where ``t32`` is the
+    largest float32 not greater than ``t``.
+    """
+    t32 = threshold.astype(np.float32)
+    over = t32.astype(np.float64) > threshold
+    t32[over] = np.nextafter(t32[over], np.float32(-np.inf))
+    return t32
+
+
+def _node_depths(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    depths = np.zeros(len(left), dtype=np.int32)
+    for node in range(len(left)):
+        # sklearn numbers children after their parent (depth-first build)
+        if left[node] != _LEAF:
+            depths[left[node]] = depths[node] + 1
+            depths[right[node]] = depths[node] + 1
+    return depths
+
+
+_ARRAYS = ("feature", "threshold", "left", "right", "value", "roots")
+
+
+class _FlatForest:
+    """All trees of an ensemble packed into one set of node arrays."""
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float32)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.right = np.ascontiguousarray(right, dtype=np.int32)
+        self.value = np.ascontiguousarray(value, dtype=np.float32)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.max_depth = int(max_depth)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @staticmethod
+    def _pack(trees, feature_maps=None) -> Tuple[np.ndarray, ...]:
+        """Concatenate sklearn ``Tree`` objects into flat, offset node arrays."""
+        features, thresholds, lefts, rights, roots, depths = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for i, tree in enumerate(trees):
+            n = tree.node_count
+            left = tree.children_left.astype(np.int64)
+            right = tree.children_right.astype(np.int64)
+            is_leaf = left == _LEAF
+            node_ids = np.arange(n)
+
+            feature = tree.feature.astype(np.int64)
+            if feature_maps is not None:
+                feature = np.asarray(feature_maps[i])[np.where(is_leaf, 0, feature)]
+            feature[is_leaf] = 0
+
+            threshold = _float32_thresholds(tree.threshold)
+            threshold[is_leaf] = np.inf
+
+            depths.append(_node_depths(left, right))
+            features.append(feature)
+            thresholds.append(threshold)
+            lefts.append(np.where(is_leaf, node_ids, left) + offset)
+            rights.append(np.where(is_leaf, node_ids, right) + offset)
+            roots.append(offset)
+            max_depth = max(max_depth, int(tree.max_depth))
+            offset += n
+
+        return (
+            np.concatenate(features),
+            np.concatenate(thresholds),
+            np.concatenate(lefts),
+            np.concatenate(rights),
+            np.asarray(roots),
+            np.concatenate(depths),
+            max_depth,
+        )
+
+    # ── Persistence ────────────────────────────────────────
+    def _header(self) -> dict:
+        return {"max_depth": self.max_depth}
+
+    def save(self, directory: str, name: str, **meta):
+        """Write ``<name>.<array>.npy`` files and a ``<name>.json`` header.
+
+        Files are replaced atomically (workers may have the old arrays mapped)
+        and the header goes last, once every array it describes is in place.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for array in _ARRAYS:
+            save_array(os.path.join(directory, f"{name}.{array}.npy"), getattr(self, array))
+        header = {"type": type(self).__name__, **self._header(), **meta}
+        write_json(os.path.join(directory, f"{name}.json"), header)
+
+    @staticmethod
+    def read_header(directory: str, name: str) -> Optional[dict]:
+        path = os.path.join(directory, f"{name}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    @classmethod
+    def load(cls, directory: str, name: str, mmap_mode: Optional[str] = "r"):
+        """Load a saved forest; arrays stay memory-mapped when ``mmap_mode`` is set."""
+        header = cls.read_header(directory, name)
+        if header is None or header["type"] != cls.__name__:
+            raise ValueError(f"No saved {cls.__name__} named '{name}' in {directory}")
+        arrays = {
+            array: np.load(os.path.join(directory, f"{name}.{array}.npy"), mmap_mode=mmap_mode)
+            for array in _ARRAYS
+        }
+        return cls._from_saved(arrays, header)
+
+    @staticmethod
+    def _as_matrix(X) -> np.ndarray:
+        if hasattr(X, "toarray"):
+            X = X.toarray()
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def apply(self, X) -> np.ndarray:
+        """Return the leaf node reached in every tree, shape (n_samples, n_trees)."""
+        X = self._as_matrix(X)
+        n = X.shape[0]
+        node = np.repeat(self.roots[np.newaxis, :], n, axis=0)
+        rows = np.arange(n)[:, np.newaxis]
+
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            next_node = np.where(go_left, self.left[node], self.right[node])
+            if np.array_equal(next_node, node):
+                break
+            node = next_node
+        return node
+
+
+class CompiledForestClassifier(_FlatForest):
+    """Flat-array RandomForestClassifier; ``value`` holds leaf class fractions."""
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes):
+        super().__init__(feature, threshold, left, right, value, roots, max_depth)
+        self.classes = np.asarray(classes)
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledForestClassifier":
+        trees = [est.tree_ for est in model.estimators_]
+        feature, threshold, left, right, roots, _, max_depth = cls._pack(trees)
+
+        # Per-tree predict_proba normalizes the leaf class weights
+        values = []
+        for tree in trees:
+            value = tree.value[:, 0, :].astype(np.float64)
+            totals = value.sum(axis=1, keepdims=True)
+            totals[totals == 0] = 1.0
+            values.append(value / totals)
+
+        return cls(
+            feature, threshold, left, right, np.concatenate(values), roots, max_depth, model.classes_
+        )
+
+    def _header(self) -> dict:
+        return {"max_depth": self.max_depth, "classes": self.classes.tolist()}
+
+    @classmethod
+    def _from_saved(cls, arrays: dict, header: dict) -> "CompiledForestClassifier":
+        return cls(max_depth=header["max_depth"], classes=header["classes"], **arrays)
+
+    def evaluate(self, X) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(probabilities, labels)`` from a single forest pass."""
+        leaves = self.apply(X)
+        proba = self.value[leaves].mean(axis=1, dtype=np.float64)
+        labels = self.classes.take(np.argmax(proba, axis=1))
+        return proba, labels
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self.evaluate(X)[0]
+
+    def predict(self, X) -> np.ndarray:
+        return self.evaluate(X)[1]
+
+
+def _average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """Average path length of an unsuccessful BST search (iForest c(n))."""
+    n_samples = np.asarray(n_samples, dtype=np.float64)
+    result = np.zeros_like(n_samples)
+    result[n_samples == 2] = 1.0
+    mask = n_samples > 2
+    result[mask] = (
+        2.0 * (np.log(n_samples[mask] - 1.0) + np.euler_gamma)
+        - 2.0 * (n_samples[mask] - 1.0) / n_samples[mask]
+    )
+    return result
+
+
+class CompiledIsolationForest(_FlatForest):
+    """Flat-array IsolationForest; ``value`` holds each node's path length."""
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, normalizer, offset):
+        super().__init__(feature, threshold, left, right, value, roots, max_depth)
+        self.normalizer = float(normalizer)
+        self.offset = float(offset)
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledIsolationForest":
+        trees = [est.tree_ for est in model.estimators_]
+
+        # sklearn only remaps columns when trees were fit on a feature subset
+        feature_maps = None
+        if getattr(model, "_max_features", model.n_features_in_) != model.n_features_in_:
+            feature_maps = model.estimators_features_
+
+        feature, threshold, left, right, roots, depths, max_depth = cls._pack(trees, feature_maps)
+        n_node_samples = np.concatenate([tree.n_node_samples for tree in trees])
+        path_length = depths + _average_path_length(n_node_samples)
+
+        max_samples = getattr(model, "_max_samples", model.max_samples_)
+        normalizer = len(trees) * _average_path_length(np.array([max_samples]))[0]
+        return cls(
+            feature, threshold, left, right, path_length, roots, max_depth, normalizer, model.offset_
+        )
+
+    def _header(self) -> dict:
+        return {"max_depth": self.max_depth, "normalizer": self.normalizer, "offset": self.offset}
+
+    @classmethod
+    def _from_saved(cls, arrays: dict, header: dict) -> "CompiledIsolationForest":
+        return cls(
+            max_depth=header["max_depth"],
+            normalizer=header["normalizer"],
+            offset=header["offset"],
+            **arrays,
+        )
+
+    def evaluate(self, X) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(score_samples, labels)`` from a single forest pass.
+
+        Scores follow sklearn's convention (negative, lower = more anomalous);
+        labels are -1 for anomalies and 1 for inliers.
+        """
+        leaves = self.apply(X)
+        depths = self.value[leaves].sum(axis=1, dtype=np.float64)
+        if self.normalizer > 0:
+            scores = -(2.0 ** (-depths / self.normalizer))
+        else:
+            scores = -np.ones_like(depths)
+        labels = np.where(scores - self.offset < 0, -1, 1)
+        return scores, labels
+
+    def score_samples(self, X) -> np.ndarray:
+        return self.evaluate(X)[0]
+
+    def predict(self, X) -> np.ndarray:
+        return self.evaluate(X)[1]
+
+
+# ── Parity Checks ──────────────────────────────────────────
+def check_classifier_parity(model, compiled: CompiledForestClassifier, X, atol: float = 1e-6) -> dict:
+    """Compare a compiled classifier against its sklearn model on ``X``."""
+    proba, labels = compiled.evaluate(X)
+    expected = model.predict_proba(X)
+    return {
+        "samples": int(X.shape[0]),
+        "max_abs_diff": float(np.max(np.abs(proba - expected))) if len(expected) else 0.0,
+        "label_mismatches": int(np.sum(labels != model.predict(X))),
+        "ok": bool(np.allclose(proba, expected, atol=atol, rtol=0)),
+    }
+
+
+def check_isolation_parity(model, compiled: CompiledIsolationForest, X, atol: float = 1e-6) -> dict:
+    """Compare a compiled isolation forest against its sklearn model on ``X``."""
+    scores, labels = compiled.evaluate(X)
+    expected = model.score_samples(X)
+    mismatched = labels != model.predict(X)
+    # Rows scoring exactly at the threshold (common with discrete features)
+    # may flip on float rounding; they are counted separately
+    ties = np.abs(expected - model.offset_) <= atol
+    return {
+        "samples": int(X.shape[0]),
+        "max_abs_diff": float(np.max(np.abs(scores - expected))) if len(expected) else 0.0,
+        "label_mismatches": int(np.sum(mismatched & ~ties)),
+        "boundary_ties": int(np.sum(mismatched & ties)),
+        "ok": bool(np.allclose(scores, expected, atol=atol, rtol=0)),
+    }
+
+
+def _sample_texts(vectorizer, n: int, rng: np.random.Generator) -> List[str]:
+    # Random bags of vocabulary terms exercise many different tree paths
+    vocab = np.array(sorted(vectorizer.vocabulary_))
+    return [" ".join(rng.choice(vocab, size=rng.integers(1, 25))) for _ in range(n)]
+
+
+def _sample_logins(n: int, rng: np.random.Generator) -> np.ndarray:
+    return np.column_stack([
+        rng.uniform(0, 23, n),
+        rng.uniform(0, 100, n),
+        rng.integers(0, 2, n),
+        rng.integers(0, 20, n),
+        rng.uniform(0, 120, n),
+    ])
+
+
+def main() -> int:
+    """Check the compiled engine against the shipped model pickles."""
+    import os
+    import warnings
+
+    import joblib
+    import pandas as pd
+
+    from .models import MODELS_DIR
+
+    warnings.filterwarnings("ignore", category=UserWarning)
+    rng = np.random.default_rng(42)
+    ok = True
+
+    phishing_model = joblib.load(os.path.join(MODELS_DIR, "phishing_model.pkl"))
+    vectorizer = joblib.load(os.path.join(MODELS_DIR, "tfidf_vectorizer.pkl"))
+    X = vectorizer.transform(_sample_texts(vectorizer, 2000, rng))
+    report = check_classifier_parity(phishing_model, CompiledForestClassifier.from_sklearn(phishing_model), X)
+    print(f"[{'+' if report['ok'] else '!'}] Phishing forest parity: {report}")
+    ok &= report["ok"] and report["label_mismatches"] == 0
+
+    anomaly_model = joblib.load(os.path.join(MODELS_DIR, "anomaly_model.pkl"))
+    features = joblib.load(os.path.join(MODELS_DIR, "anomaly_features.pkl"))
+    X = pd.DataFrame(_sample_logins(5000, rng), columns=features)
+    report = check_isolation_parity(anomaly_model, CompiledIsolationForest.from_sklearn(anomaly_model), X)
+    print(f"[{'+' if report['ok'] else '!'}] Anomaly forest parity: {report}")
+    ok &= report["ok"] and report["label_mismatches"] == 0
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
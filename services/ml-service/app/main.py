@@ -5,17 +5,68 @@ FastAPI service providing threat detection endpoints.
 
 Endpoints:
   POST /predict       – Phishing detection
+  POST /predict/batch – Batched phishing detection
   POST /anomaly       – Login anomaly detection
+  POST /anomaly/batch – Batched login anomaly detection
+  POST /predict/stream – NDJSON-streamed phishing detection
+  POST /anomaly/stream – NDJSON-streamed login anomaly detection
+  POST /anomaly/event – Login anomaly detection from a raw login event
+  POST /anomaly/events – Batched raw login event scoring
+  POST /similar       – Similar previously scored messages
   GET  /health        – Service health check
+  GET  /metrics       – Prometheus metrics (per-stage latency histograms)
+  GET  /admin/models  – Model registry status
+  POST /admin/models/activate – Hot-swap to a model version
+  POST /admin/profiler/start  – Start the sampling profiler
+  POST /admin/profiler/stop   – Stop the sampling profiler
+  GET  /admin/profiler        – Sampling profiler results
+  POST /admin/reputation/reload – Reload the domain reputation lists
+  GET  /admin/tenants           – Tenant model pool status
+  POST /admin/tenants/{tenant}/unload – Drop a tenant's models from memory
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Optional
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import hmac
+import os
 import time
 
-from .models import PhishingDetector, AnomalyDetector
+from .admission import (
+    BULK,
+    INTERACTIVE,
+    NORMAL,
+    PRIORITY_NAMES,
+    AdmissionController,
+    AdmissionMiddleware,
+    DeadlineExceeded,
+    Ticket,
+    current_ticket,
+)
+from .batching import MicroBatcher
+from .cache import VerdictCache
+from .executor import InferenceExecutor, InferenceQueueFull
+from .feature_store import LoginFeatureStore
+from .metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    InferenceMetrics,
+    MetricsMiddleware,
+    current_timer,
+    format_histogram,
+    format_metric,
+)
+from .models import MODELS_DIR, PhishingDetector, AnomalyDetector
+from .profiler import SamplingProfiler
+from .registry import LEGACY_VERSION, ModelBundle, ModelRegistry, ModelRegistryError
+from .reputation import ReputationFilter
+from .runtime import process_info, process_memory
+from .similarity import SimilarityIndex
+from .streaming import NDJSONScorer, NDJSONStreamingResponse
+from .tenants import TenantModelPool, TenantNotFound
 
 # ── App Configuration ──────────────────────────────────────
 app = FastAPI(
@@ -32,32 +83,318 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-stage latency histograms for the scoring endpoints, served at /metrics
+SCORING_PATHS = (
+    "/predict", "/predict/batch", "/predict/stream",
+    "/anomaly", "/anomaly/batch", "/anomaly/stream", "/anomaly/event", "/anomaly/events",
+)
+inference_metrics = InferenceMetrics()
+
+# Admission control: X-Priority / X-Deadline-Ms tickets, depth-based shedding
+# of normal and bulk traffic (0 = never), optional default deadline.
+SHED_NORMAL_DEPTH = int(os.environ.get("ML_SHED_NORMAL_DEPTH", "256"))
+SHED_BULK_DEPTH = int(os.environ.get("ML_SHED_BULK_DEPTH", "64"))
+DEFAULT_DEADLINE_MS = float(os.environ.get("ML_DEFAULT_DEADLINE_MS", "0"))
+
+# Default priority per endpoint; single login checks are what users wait on
+ENDPOINT_PRIORITIES = {
+    "/predict": NORMAL,
+    "/predict/batch": BULK,
+    "/predict/stream": BULK,
+    "/anomaly": INTERACTIVE,
+    "/anomaly/batch": BULK,
+    "/anomaly/stream": BULK,
+    "/anomaly/event": INTERACTIVE,
+    "/anomaly/events": BULK,
+}
+
+
+def _queued_work() -> int:
+    """Requests waiting for a micro-batch plus model calls waiting for a worker."""
+    return phishing_batcher.queue_depth + anomaly_batcher.queue_depth + executor.waiting
+
+
+admission = AdmissionController(
+    _queued_work,
+    {NORMAL: SHED_NORMAL_DEPTH, BULK: SHED_BULK_DEPTH},
+    default_deadline_ms=DEFAULT_DEADLINE_MS,
+)
+# Added first so the metrics middleware (outermost) also times shed requests
+app.add_middleware(AdmissionMiddleware, controller=admission, paths=ENDPOINT_PRIORITIES)
+app.add_middleware(MetricsMiddleware, metrics=inference_metrics, paths=SCORING_PATHS)
+profiler = SamplingProfiler()
+
+# Micro-batching: concurrent /predict and /anomaly calls are coalesced into
+# one vectorized model call, flushed on size or time window.
+BATCH_MAX_SIZE = int(os.environ.get("ML_BATCH_MAX_SIZE", "64"))
+BATCH_WINDOW_MS = float(os.environ.get("ML_BATCH_WINDOW_MS", "2"))
+# Largest texts / records / events list the batch endpoints accept (422 above)
+BATCH_MAX_ITEMS = int(os.environ.get("ML_BATCH_MAX_ITEMS", "10000"))
+
+# Inference runs in a thread or process pool so the event loop stays free.
+EXECUTOR_MODE = os.environ.get("ML_EXECUTOR_MODE", "thread")
+EXECUTOR_WORKERS = int(os.environ.get("ML_EXECUTOR_WORKERS", "0")) or os.cpu_count() or 1
+EXECUTOR_MAX_PENDING = int(os.environ.get("ML_EXECUTOR_MAX_PENDING", "256"))
+
+# Verdict cache: repeated and near-duplicate phishing texts skip the model.
+CACHE_ENABLED = os.environ.get("ML_CACHE_ENABLED", "1") != "0"
+CACHE_MAX_ENTRIES = int(os.environ.get("ML_CACHE_MAX_ENTRIES", "100000"))
+CACHE_MAX_MB = float(os.environ.get("ML_CACHE_MAX_MB", "64"))
+CACHE_TTL_SECONDS = float(os.environ.get("ML_CACHE_TTL_SECONDS", "3600"))
+CACHE_NEAR_DUPLICATES = os.environ.get("ML_CACHE_NEAR_DUPLICATES", "1") != "0"
+CACHE_MAX_DISTANCE = int(os.environ.get("ML_CACHE_MAX_DISTANCE", "3"))
+
+# Model registry: models/<version>/ is polled and hot-swapped; 0 disables polling.
+MODEL_WATCH_INTERVAL = float(os.environ.get("ML_MODEL_WATCH_INTERVAL", "10"))
+# Required as X-Admin-Token on /admin/*; unset disables the admin endpoints
+ADMIN_TOKEN = os.environ.get("ML_ADMIN_TOKEN", "")
+
+# NDJSON streaming: records are scored in fixed-size chunks; at most
+# ML_STREAM_PREFETCH_CHUNKS parsed chunks are buffered per upload.
+STREAM_CHUNK_SIZE = int(os.environ.get("ML_STREAM_CHUNK_SIZE", "256"))
+STREAM_MAX_LINE_BYTES = int(os.environ.get("ML_STREAM_MAX_LINE_BYTES", str(1024 * 1024)))
+STREAM_PREFETCH_CHUNKS = int(os.environ.get("ML_STREAM_PREFETCH_CHUNKS", "2"))
+STREAM_SEND_TIMEOUT_S = float(os.environ.get("ML_STREAM_SEND_TIMEOUT_S", "60"))
+
+# Login feature store: per-user sliding-window state for raw login events.
+FEATURES_MAX_USERS = int(os.environ.get("ML_FEATURES_MAX_USERS", "100000"))
+FEATURES_IDLE_TTL_SECONDS = float(os.environ.get("ML_FEATURES_IDLE_TTL_SECONDS", "86400"))
+FEATURES_IP_WINDOW = int(os.environ.get("ML_FEATURES_IP_WINDOW", "100"))
+FEATURES_FAILURE_WINDOW_SECONDS = float(os.environ.get("ML_FEATURES_FAILURE_WINDOW_SECONDS", "3600"))
+# A user's first N logins are scored but never flagged: every IP is new to them
+FEATURES_WARMUP_LOGINS = int(os.environ.get("ML_FEATURES_WARMUP_LOGINS", "5"))
+
+# Similar-message search: TF-IDF index over the most recently scored messages,
+# ~1 KB per entry in every worker process (50 MB per worker by default).
+SIMILARITY_ENABLED = os.environ.get("ML_SIMILARITY_ENABLED", "1") != "0"
+SIMILARITY_MAX_ENTRIES = int(os.environ.get("ML_SIMILARITY_MAX_ENTRIES", "50000"))
+SIMILARITY_MAX_POSTINGS = int(os.environ.get("ML_SIMILARITY_MAX_POSTINGS", "1024"))
+
+# Domain reputation pre-filter: blocklist hits skip the phishing model,
+# allowlist hits are attached to its verdict.
+REPUTATION_ENABLED = os.environ.get("ML_REPUTATION_ENABLED", "1") != "0"
+REPUTATION_DIR = os.environ.get("ML_REPUTATION_DIR", "") or os.path.join(MODELS_DIR, "reputation")
+
+# Tenant model pool: X-Tenant requests use models/tenants/<tenant>/, loaded on
+# first use and LRU-evicted under ML_TENANT_MAX_MB (0 = no limit). A failed
+# load is not retried for ML_TENANT_RETRY_SECONDS.
+TENANTS_ENABLED = os.environ.get("ML_TENANTS_ENABLED", "1") != "0"
+TENANTS_DIR = os.environ.get("ML_TENANTS_DIR", "") or os.path.join(MODELS_DIR, "tenants")
+TENANT_MAX_MB = float(os.environ.get("ML_TENANT_MAX_MB", "1024"))
+TENANT_WORKER_MODELS = int(os.environ.get("ML_TENANT_WORKER_MODELS", "4"))
+TENANT_RETRY_SECONDS = float(os.environ.get("ML_TENANT_RETRY_SECONDS", "30"))
+
 # ── Load Models on Startup ─────────────────────────────────
 phishing_detector: Optional[PhishingDetector] = None
 anomaly_detector: Optional[AnomalyDetector] = None
+startup_ms: Optional[float] = None
+
+# Phishing verdicts by cascade stage (ML_CASCADE_ENABLED)
+cascade_decisions = {"linear": 0, "forest": 0}
+
+
+def _on_model_activated(bundle: ModelBundle):
+    global phishing_detector, anomaly_detector
+    phishing_detector = bundle.phishing
+    anomaly_detector = bundle.anomaly
+    if similarity_index is not None:
+        similarity_index.bind(bundle.phishing)
+
+
+executor = InferenceExecutor(
+    EXECUTOR_MODE,
+    EXECUTOR_WORKERS,
+    EXECUTOR_MAX_PENDING,
+    # Process workers keep the default versions plus recently used tenants
+    worker_models=2 + (TENANT_WORKER_MODELS if TENANTS_ENABLED else 0),
+)
+feature_store = LoginFeatureStore(
+    max_users=FEATURES_MAX_USERS,
+    idle_ttl=FEATURES_IDLE_TTL_SECONDS,
+    ip_window=FEATURES_IP_WINDOW,
+    failure_window=FEATURES_FAILURE_WINDOW_SECONDS,
+    warmup_logins=FEATURES_WARMUP_LOGINS,
+)
+registry = ModelRegistry(
+    MODELS_DIR,
+    on_activate=_on_model_activated,
+    prepare=lambda bundle: executor.preload(bundle.path),
+)
+verdict_cache: Optional[VerdictCache] = (
+    VerdictCache(
+        max_entries=CACHE_MAX_ENTRIES,
+        max_bytes=int(CACHE_MAX_MB * 1024 * 1024),
+        ttl_seconds=CACHE_TTL_SECONDS,
+        near_duplicates=CACHE_NEAR_DUPLICATES,
+        max_distance=CACHE_MAX_DISTANCE,
+    )
+    if CACHE_ENABLED
+    else None
+)
+similarity_index: Optional[SimilarityIndex] = (
+    SimilarityIndex(max_entries=SIMILARITY_MAX_ENTRIES, max_postings=SIMILARITY_MAX_POSTINGS)
+    if SIMILARITY_ENABLED
+    else None
+)
+reputation_filter: Optional[ReputationFilter] = ReputationFilter(REPUTATION_DIR) if REPUTATION_ENABLED else None
+tenant_pool: Optional[TenantModelPool] = (
+    TenantModelPool(
+        TENANTS_DIR,
+        max_bytes=int(TENANT_MAX_MB * 1024 * 1024),
+        prepare=lambda bundle: executor.preload(bundle.path),
+        retry_after=TENANT_RETRY_SECONDS,
+    )
+    if TENANTS_ENABLED
+    else None
+)
+
+
+async def _score(
+    kind: str,
+    items: list,
+    timings: Optional[dict] = None,
+    ticket: Optional[Ticket] = None,
+    bundle: Optional[ModelBundle] = None,
+) -> List[dict]:
+    # The default bundle is captured once, so a swap mid-call finishes on the old version
+    bundle = bundle or registry.active
+    if bundle is None:
+        return [{"error": "Model not loaded"}] * len(items)
+    results = await executor.run(kind, items, bundle.detectors, bundle.path, timings, ticket)
+    results = [{**result, "model_version": bundle.served_version} for result in results]
+    if kind == "phishing":
+        for result in results:
+            stage = result.get("decided_by")
+            if stage is not None:
+                cascade_decisions[stage] += 1
+        # The index embeds with the default model's vocabulary
+        if similarity_index is not None and bundle.tenant is None:
+            similarity_index.submit(items, results)
+    return results
+
+
+async def _score_batched(kind: str, entries: List[tuple], ticket: Ticket) -> List[tuple]:
+    """Score micro-batched ``(bundle, item)`` entries, one model call per bundle.
+
+    ``bundle`` is None for the default models. Callers get ``(result,
+    stage_timings)``; the timings dict is shared by the entries of a call.
+    """
+    groups: Dict[int, tuple] = {}
+    for position, (bundle, item) in enumerate(entries):
+        group = groups.setdefault(id(bundle), (bundle, [], []))
+        group[1].append(position)
+        group[2].append(item)
+
+    async def score(bundle: Optional[ModelBundle], items: list) -> tuple:
+        timings = {}
+        return await _score(kind, items, timings, ticket, bundle), timings
+
+    scored = await asyncio.gather(*(score(bundle, items) for bundle, _, items in groups.values()))
+    results: List[Optional[tuple]] = [None] * len(entries)
+    for (_, positions, _), (group_results, timings) in zip(groups.values(), scored):
+        for position, result in zip(positions, group_results):
+            results[position] = (result, timings)
+    return results
+
+
+async def _score_phishing_batch(entries: List[tuple], ticket: Ticket) -> List[tuple]:
+    return await _score_batched("phishing", entries, ticket)
+
+
+async def _score_anomaly_batch(entries: List[tuple], ticket: Ticket) -> List[tuple]:
+    return await _score_batched("anomaly", entries, ticket)
+
+
+phishing_batcher = MicroBatcher(
+    "phishing", _score_phishing_batch, BATCH_MAX_SIZE, BATCH_WINDOW_MS, EXECUTOR_WORKERS
+)
+anomaly_batcher = MicroBatcher(
+    "anomaly", _score_anomaly_batch, BATCH_MAX_SIZE, BATCH_WINDOW_MS, EXECUTOR_WORKERS
+)
 
 
 @app.on_event("startup")
 async def load_models():
     """Load ML models into memory on application startup."""
-    global phishing_detector, anomaly_detector
+    global startup_ms
     print("🛡️  CyberSentinel AI – ML Service Starting...")
-    phishing_detector = PhishingDetector()
-    anomaly_detector = AnomalyDetector()
+    start = time.perf_counter()
+    version = registry.desired_version()
+    try:
+        registry.load_and_activate(version)
+    except Exception as e:
+        print(f"[!] Warning: Could not load model version '{version}': {e}")
+        if version != LEGACY_VERSION:
+            try:
+                registry.load_and_activate(LEGACY_VERSION)
+            except Exception as e:
+                print(f"[!] Warning: Could not load legacy models: {e}")
+    if reputation_filter is not None:
+        try:
+            reputation_filter.load()
+        except (OSError, ValueError) as e:
+            print(f"[!] Warning: Could not load reputation lists: {e}")
+    startup_ms = round((time.perf_counter() - start) * 1000, 2)
+    active = registry.active
+    executor.start(active.detectors if active else None, active.path if active else None)
+    phishing_batcher.start()
+    anomaly_batcher.start()
+    if similarity_index is not None:
+        similarity_index.start()
+    registry.start_watching(MODEL_WATCH_INTERVAL)
     print("✅ All ML models loaded and ready")
 
 
+@app.on_event("shutdown")
+async def stop_batchers():
+    """Flush loops are stopped so queued requests fail fast instead of hanging."""
+    await registry.stop_watching()
+    await phishing_batcher.stop()
+    await anomaly_batcher.stop()
+    executor.shutdown()
+    if similarity_index is not None:
+        similarity_index.stop()
+
+
+@app.exception_handler(InferenceQueueFull)
+async def inference_queue_full(request: Request, exc: InferenceQueueFull):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded(request: Request, exc: DeadlineExceeded):
+    admission.record_shed("deadline", current_ticket().priority)
+    return JSONResponse(status_code=503, content={"detail": str(exc), "reason": "deadline"})
+
+
 # ── Request/Response Schemas ───────────────────────────────
 class PhishingRequest(BaseModel):
     text: str = Field(..., min_length=1, description="Message text to analyze")
 
 
+class ReputationRule(BaseModel):
+    name: str = Field(..., description="'blocklist' or 'allowlist'")
+    domains: List[str] = Field(..., description="Listed domains that matched hosts in the message")
+
+
 class PhishingResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
     risk_score: int
     label: str
     confidence: float
     probabilities: dict
     processing_time_ms: float
+    batch_size: int = Field(1, description="Number of requests scored in the same model call (0 on cache hits)")
+    cache_hit: bool = False
+    cache_match: Optional[str] = Field(None, description="'exact' or 'near' when served from the verdict cache")
+    model_version: Optional[str] = Field(None, description="Model registry version that produced the verdict")
+    decided_by: Optional[str] = Field(
+        None, description="'reputation' for list hits, 'linear' or 'forest' when the cascade is enabled"
+    )
+    rule: Optional[ReputationRule] = Field(
+        None, description="Reputation rule that matched; only a blocklist rule decides the verdict"
+    )
 
 
 class AnomalyRequest(BaseModel):
@@ -68,12 +405,124 @@ class AnomalyRequest(BaseModel):
     session_duration: float = Field(30, ge=0, description="Session duration in minutes")
 
 
-class AnomalyResponse(BaseModel):
+class AnomalyResult(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
     is_anomaly: bool
     risk_score: int
     anomaly_score: float
     label: str
     features_analyzed: list
+    model_version: Optional[str] = None
+
+
+class AnomalyResponse(AnomalyResult):
+    processing_time_ms: float
+    batch_size: int = Field(1, description="Number of requests scored in the same model call")
+
+
+class LoginEvent(BaseModel):
+    user: str = Field(..., min_length=1, description="User identifier")
+    ip: str = Field(..., min_length=1, description="Source IP address")
+    device: str = Field("", description="Device fingerprint or user agent")
+    success: bool = Field(True, description="Whether the login succeeded")
+    timestamp: Optional[datetime] = Field(None, description="Event time (ISO 8601 or epoch seconds), default now")
+    session_duration: Optional[float] = Field(None, ge=0, description="Session duration in minutes, if known")
+
+
+class AnomalyEventResponse(AnomalyResponse):
+    features: dict = Field(..., description="Feature vector derived from the user's login history")
+    warming_up: bool = Field(
+        False, description="The user has too few logins for a history; the event is not flagged as an anomaly"
+    )
+
+
+class AnomalyEventBatchRequest(BaseModel):
+    events: List[LoginEvent] = Field(
+        ..., min_length=1, max_length=BATCH_MAX_ITEMS, description="Login events in arrival order"
+    )
+
+
+class AnomalyEventItem(AnomalyResult):
+    features: dict
+    warming_up: bool = False
+
+
+class AnomalyEventBatchResponse(BaseModel):
+    results: List[AnomalyEventItem]
+    count: int
+    processing_time_ms: float
+
+
+class PhishingBatchRequest(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS, description="Message texts to analyze")
+
+
+class PhishingBatchItem(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    risk_score: int
+    label: str
+    confidence: float
+    probabilities: dict
+    cache_hit: bool = False
+    cache_match: Optional[str] = None
+    model_version: Optional[str] = None
+    decided_by: Optional[str] = None
+    rule: Optional[ReputationRule] = None
+
+
+class PhishingBatchResponse(BaseModel):
+    results: List[PhishingBatchItem]
+    count: int
+    processing_time_ms: float
+
+
+class AnomalyBatchRequest(BaseModel):
+    records: List[AnomalyRequest] = Field(
+        ..., min_length=1, max_length=BATCH_MAX_ITEMS, description="Login records to analyze"
+    )
+
+
+class AnomalyBatchResponse(BaseModel):
+    results: List[AnomalyResult]
+    count: int
+    processing_time_ms: float
+
+
+class ActivateModelRequest(BaseModel):
+    version: str = Field(..., min_length=1, description="Registry version to serve, or 'legacy'")
+
+
+class ProfilerStartRequest(BaseModel):
+    interval_ms: float = Field(5.0, ge=1, le=1000, description="Time between stack samples")
+    duration_s: float = Field(30.0, gt=0, le=600, description="Stop automatically after this long")
+
+
+class SimilarRequest(BaseModel):
+    text: str = Field(..., min_length=1, description="Message to find look-alikes of")
+    k: int = Field(10, ge=1, le=100, description="Number of results")
+    min_score: float = Field(0.2, ge=0, le=1, description="Minimum cosine similarity")
+
+
+class SimilarMessage(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    score: float = Field(..., description="Cosine similarity of the TF-IDF vectors")
+    text: str = Field(..., description="Start of the scored message")
+    label: Optional[str]
+    risk_score: Optional[int]
+    confidence: Optional[float]
+    model_version: Optional[str]
+    scored_at: float = Field(..., description="When it was last scored (epoch seconds)")
+    seen: int = Field(..., description="Times this exact message was scored while indexed")
+
+
+class SimilarResponse(BaseModel):
+    results: List[SimilarMessage]
+    count: int
+    index_size: int
+    processing_time_ms: float
 
 
 class ChatRequest(BaseModel):
@@ -88,30 +537,207 @@ class ChatResponse(BaseModel):
     timestamp: str
 
 
+# ── Tenant Models ──────────────────────────────────────────
+async def _tenant_bundle(tenant: Optional[str]) -> Optional[ModelBundle]:
+    """The ``X-Tenant`` tenant's models from the pool; None for the default models."""
+    if not tenant:
+        return None
+    if tenant_pool is None:
+        raise HTTPException(status_code=400, detail="Tenant models are disabled")
+    try:
+        return await tenant_pool.get(tenant)
+    except TenantNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (ModelRegistryError, OSError) as e:
+        raise HTTPException(status_code=503, detail=f"Tenant models could not be loaded: {e}")
+
+
+def _require_models(bundle: Optional[ModelBundle], detector):
+    if bundle is None and detector is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+
+# ── Verdict Cache ──────────────────────────────────────────
+def _cache_binding() -> Optional[str]:
+    bundle = registry.active
+    if bundle is None or bundle.phishing.fingerprint is None:
+        return None
+    return f"{bundle.version}:{bundle.phishing.fingerprint}"
+
+
+def _cache_lookup(text: str):
+    binding = _cache_binding()
+    if verdict_cache is None or binding is None:
+        return None, None
+    # Re-binding is a no-op unless the model changed, in which case it clears
+    verdict_cache.bind(binding)
+    return verdict_cache.get(text)
+
+
+def _cache_store(text: str, result: dict):
+    binding = _cache_binding()
+    # Verdicts from a batch that finished on the previous version are not cached
+    if verdict_cache is not None and binding is not None and result.get("model_version") == registry.active.version:
+        verdict_cache.bind(binding)
+        verdict_cache.put(text, result)
+
+
+# ── Reputation Pre-Filter ──────────────────────────────────
+def _reputation_check(
+    text: str, bundle: Optional[ModelBundle] = None
+) -> Tuple[Optional[dict], Optional[dict]]:
+    """``(verdict, rule)``: the verdict of a blocklist hit, or an allowlist rule
+    to attach to the model's verdict (an allowlist hit does not skip the model)."""
+    if reputation_filter is None:
+        return None, None
+    rule = reputation_filter.check(text)
+    if rule is None or rule["name"] != "blocklist":
+        return None, rule
+    verdict = reputation_filter.verdict(rule)
+    # The similar-message index belongs to the default models, like in _score
+    if similarity_index is not None and bundle is None:
+        similarity_index.submit([text], [verdict])
+    return verdict, None
+
+
+def _with_rule(result: dict, rule: Optional[dict]) -> dict:
+    # Attached after the cache: cached verdicts stay valid when the lists are reloaded
+    if rule is None or "error" in result:
+        return result
+    return {**result, "rule": rule}
+
+
+async def _score_phishing_texts(
+    texts: List[str],
+    timings: Optional[dict] = None,
+    ticket: Optional[Ticket] = None,
+    bundle: Optional[ModelBundle] = None,
+) -> List[dict]:
+    """Phishing verdicts with the reputation pre-filter in front of the model."""
+    checks = [_reputation_check(text, bundle) for text in texts]
+    results = [verdict for verdict, _ in checks]
+    misses = [i for i, result in enumerate(results) if result is None]
+    if misses:
+        scored = await _score("phishing", [texts[i] for i in misses], timings, ticket, bundle)
+        for i, result in zip(misses, scored):
+            results[i] = _with_rule(result, checks[i][1])
+    return results
+
+
+def _first_version(results: List[dict]) -> Optional[str]:
+    return next((result["model_version"] for result in results if result.get("model_version")), None)
+
+
+# ── Login Feature Store ────────────────────────────────────
+def _event_features(event: LoginEvent, tenant: Optional[str] = None) -> dict:
+    """The event's feature vector, plus ``warming_up`` for users without a login history yet."""
+    timestamp = None
+    if event.timestamp is not None:
+        moment = event.timestamp
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        timestamp = moment.timestamp()
+    # Tenants keep separate histories for the same user id
+    user = (tenant, event.user) if tenant else event.user
+    return feature_store.observe(
+        user, event.ip, event.device, event.success, timestamp, event.session_duration
+    )
+
+
+def _event_result(result: dict, features: dict) -> dict:
+    """Attach the features to an event verdict; warming-up users are never flagged."""
+    features = dict(features)
+    warming_up = features.pop("warming_up", False)
+    if warming_up and result.get("is_anomaly"):
+        # The model still scores the event; only the flag is held back
+        result = {**result, "is_anomaly": False, "label": "Normal"}
+    return {**result, "features": features, "warming_up": warming_up}
+
+
+# ── NDJSON Streaming ───────────────────────────────────────
+def _parse_stream_text(value) -> str:
+    text = value.get("text") if isinstance(value, dict) else value
+    if not isinstance(text, str) or not text:
+        raise ValueError("Expected a non-empty JSON string or an object with a 'text' field")
+    return text
+
+
+def _parse_stream_login(value) -> dict:
+    try:
+        return AnomalyRequest.model_validate(value).model_dump()
+    except ValidationError as e:
+        error = e.errors()[0]
+        field = ".".join(str(part) for part in error["loc"]) or "record"
+        raise ValueError(f"{field}: {error['msg']}")
+
+
+def _stream_scorer(kind: str, parse, bundle: Optional[ModelBundle] = None) -> NDJSONScorer:
+    # Streams keep their priority; a deadline cannot apply to an upload of any length
+    ticket = Ticket(current_ticket().priority)
+
+    async def score(records: list) -> List[dict]:
+        if kind == "phishing":
+            return await _score_phishing_texts(records, ticket=ticket, bundle=bundle)
+        return await _score(kind, records, ticket=ticket, bundle=bundle)
+
+    return NDJSONScorer(
+        parse,
+        score,
+        chunk_size=STREAM_CHUNK_SIZE,
+        max_line_bytes=STREAM_MAX_LINE_BYTES,
+        prefetch=STREAM_PREFETCH_CHUNKS,
+    )
+
+
 # ── API Endpoints ──────────────────────────────────────────
 @app.post("/predict", response_model=PhishingResponse)
-async def predict_phishing(request: PhishingRequest):
+async def predict_phishing(request: PhishingRequest, x_tenant: Optional[str] = Header(None)):
     """Analyze a text message for phishing indicators."""
-    if phishing_detector is None:
-        raise HTTPException(status_code=503, detail="Model not loaded")
+    timer = current_timer()
+    timer.mark("parse")
+    bundle = await _tenant_bundle(x_tenant)
+    _require_models(bundle, phishing_detector)
+    if bundle is not None:
+        timer.mark("tenant")
+
+    verdict, rule = _reputation_check(request.text, bundle)
+    timer.mark("reputation")
+    if verdict is not None:
+        return {**verdict, "processing_time_ms": timer.elapsed_ms(), "batch_size": 0}
 
-    start = time.time()
-    result = phishing_detector.predict(request.text)
-    elapsed = round((time.time() - start) * 1000, 2)
+    # The verdict cache is bound to the default models
+    cached, match = _cache_lookup(request.text) if bundle is None else (None, None)
+    timer.mark("preprocess")
+    if cached is not None:
+        result, batch_size = cached, 0
+    else:
+        (result, timings), batch_size = await phishing_batcher.submit((bundle, request.text), current_ticket())
+        timer.model(timings)
+        if "error" not in result and bundle is None:
+            _cache_store(request.text, result)
 
     if "error" in result:
         raise HTTPException(status_code=503, detail=result["error"])
 
-    result["processing_time_ms"] = elapsed
-    return result
+    timer.version = result.get("model_version")
+    return {
+        **_with_rule(result, rule),
+        "processing_time_ms": timer.elapsed_ms(),
+        "batch_size": batch_size,
+        "cache_hit": cached is not None,
+        "cache_match": match,
+    }
 
 
 @app.post("/anomaly", response_model=AnomalyResponse)
-async def detect_anomaly(request: AnomalyRequest):
+async def detect_anomaly(request: AnomalyRequest, x_tenant: Optional[str] = Header(None)):
     """Detect anomalous login patterns."""
-    if anomaly_detector is None:
-        raise HTTPException(status_code=503, detail="Model not loaded")
-
+    timer = current_timer()
+    timer.mark("parse")
+    bundle = await _tenant_bundle(x_tenant)
+    _require_models(bundle, anomaly_detector)
+    if bundle is not None:
+        timer.mark("tenant")
     login_data = {
         "login_hour": request.login_hour,
         "ip_frequency": request.ip_frequency,
@@ -120,12 +746,165 @@ async def detect_anomaly(request: AnomalyRequest):
         "session_duration": request.session_duration,
     }
 
-    result = anomaly_detector.predict(login_data)
+    (result, timings), batch_size = await anomaly_batcher.submit((bundle, login_data), current_ticket())
+    timer.model(timings)
+
+    if "error" in result:
+        raise HTTPException(status_code=503, detail=result["error"])
+
+    timer.version = result.get("model_version")
+    return {**result, "processing_time_ms": timer.elapsed_ms(), "batch_size": batch_size}
+
+
+@app.post("/anomaly/event", response_model=AnomalyEventResponse)
+async def detect_anomaly_event(event: LoginEvent, x_tenant: Optional[str] = Header(None)):
+    """Score a raw login event; features come from the server-side feature store."""
+    timer = current_timer()
+    timer.mark("parse")
+    bundle = await _tenant_bundle(x_tenant)
+    _require_models(bundle, anomaly_detector)
+    if bundle is not None:
+        timer.mark("tenant")
+
+    features = _event_features(event, x_tenant)
+    timer.mark("preprocess")
+    (result, timings), batch_size = await anomaly_batcher.submit((bundle, features), current_ticket())
+    timer.model(timings)
 
     if "error" in result:
         raise HTTPException(status_code=503, detail=result["error"])
 
-    return result
+    timer.version = result.get("model_version")
+    return {**_event_result(result, features), "processing_time_ms": timer.elapsed_ms(), "batch_size": batch_size}
+
+
+@app.post("/anomaly/events", response_model=AnomalyEventBatchResponse)
+async def detect_anomaly_events(request: AnomalyEventBatchRequest, x_tenant: Optional[str] = Header(None)):
+    """Score many raw login events in one model call, in order."""
+    timer = current_timer()
+    timer.mark("parse")
+    bundle = await _tenant_bundle(x_tenant)
+    _require_models(bundle, anomaly_detector)
+    if bundle is not None:
+        timer.mark("tenant")
+
+    features = [_event_features(event, x_tenant) for event in request.events]
+    timer.mark("preprocess")
+    timings = {}
+    results = await _score("anomaly", features, timings, current_ticket(), bundle)
+    timer.model(timings)
+
+    if results and "error" in results[0]:
+        raise HTTPException(status_code=503, detail=results[0]["error"])
+
+    timer.version = results[0].get("model_version")
+    results = [_event_result(result, vector) for result, vector in zip(results, features)]
+    return {"results": results, "count": len(results), "processing_time_ms": timer.elapsed_ms()}
+
+
+@app.post("/predict/batch", response_model=PhishingBatchResponse)
+async def predict_phishing_batch(request: PhishingBatchRequest, x_tenant: Optional[str] = Header(None)):
+    """Analyze many messages for phishing indicators in one model call."""
+    timer = current_timer()
+    timer.mark("parse")
+    bundle = await _tenant_bundle(x_tenant)
+    _require_models(bundle, phishing_detector)
+    if bundle is not None:
+        timer.mark("tenant")
+
+    results: List[Optional[dict]] = [None] * len(request.texts)
+    rules: Dict[int, dict] = {}
+    misses = []
+    for i, text in enumerate(request.texts):
+        verdict, rule = _reputation_check(text, bundle)
+        if verdict is not None:
+            results[i] = verdict
+            continue
+        if rule is not None:
+            rules[i] = rule
+        cached, match = _cache_lookup(text) if bundle is None else (None, None)
+        if cached is not None:
+            results[i] = {**_with_rule(cached, rule), "cache_hit": True, "cache_match": match}
+        else:
+            misses.append(i)
+    timer.mark("preprocess")
+
+    if misses:
+        timings = {}
+        scored = await _score("phishing", [request.texts[i] for i in misses], timings, current_ticket(), bundle)
+        timer.model(timings)
+        if scored and "error" in scored[0]:
+            raise HTTPException(status_code=503, detail=scored[0]["error"])
+        for i, result in zip(misses, scored):
+            if bundle is None:
+                _cache_store(request.texts[i], result)
+            results[i] = _with_rule(result, rules.get(i))
+
+    timer.version = _first_version(results)
+    return {"results": results, "count": len(results), "processing_time_ms": timer.elapsed_ms()}
+
+
+@app.post("/anomaly/batch", response_model=AnomalyBatchResponse)
+async def detect_anomaly_batch(request: AnomalyBatchRequest, x_tenant: Optional[str] = Header(None)):
+    """Detect anomalous login patterns for many records in one model call."""
+    timer = current_timer()
+    timer.mark("parse")
+    bundle = await _tenant_bundle(x_tenant)
+    _require_models(bundle, anomaly_detector)
+    if bundle is not None:
+        timer.mark("tenant")
+
+    records = [record.model_dump() for record in request.records]
+    timer.mark("preprocess")
+    timings = {}
+    results = await _score("anomaly", records, timings, current_ticket(), bundle)
+    timer.model(timings)
+
+    if results and "error" in results[0]:
+        raise HTTPException(status_code=503, detail=results[0]["error"])
+
+    timer.version = results[0].get("model_version")
+    return {"results": results, "count": len(results), "processing_time_ms": timer.elapsed_ms()}
+
+
+@app.post("/predict/stream")
+async def predict_phishing_stream(request: Request, x_tenant: Optional[str] = Header(None)):
+    """Stream phishing verdicts for an NDJSON upload of texts or {"text", "id"} objects."""
+    bundle = await _tenant_bundle(x_tenant)
+    _require_models(bundle, phishing_detector)
+    scorer = _stream_scorer("phishing", _parse_stream_text, bundle)
+    return NDJSONStreamingResponse(scorer.stream(request.stream()), send_timeout=STREAM_SEND_TIMEOUT_S)
+
+
+@app.post("/anomaly/stream")
+async def detect_anomaly_stream(request: Request, x_tenant: Optional[str] = Header(None)):
+    """Stream anomaly verdicts for an NDJSON upload of login records."""
+    bundle = await _tenant_bundle(x_tenant)
+    _require_models(bundle, anomaly_detector)
+    scorer = _stream_scorer("anomaly", _parse_stream_login, bundle)
+    return NDJSONStreamingResponse(scorer.stream(request.stream()), send_timeout=STREAM_SEND_TIMEOUT_S)
+
+
+@app.post("/similar", response_model=SimilarResponse)
+async def similar_messages(request: SimilarRequest):
+    """Top-k most similar messages among those recently scored, with their verdicts."""
+    if similarity_index is None:
+        raise HTTPException(status_code=503, detail="Similarity search is disabled")
+    if phishing_detector is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    results = await loop.run_in_executor(
+        None, similarity_index.search, request.text, request.k, request.min_score
+    )
+    elapsed = round((time.perf_counter() - start) * 1000, 2)
+    return {
+        "results": results,
+        "count": len(results),
+        "index_size": similarity_index.size,
+        "processing_time_ms": elapsed,
+    }
 
 
 @app.post("/chat", response_model=ChatResponse)
@@ -155,14 +934,223 @@ async def sentinel_chat(request: ChatRequest):
     }
 
 
+def _check_admin_token(token: Optional[str]):
+    # Without a configured token the admin endpoints are closed, not open
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ML_ADMIN_TOKEN is not set)")
+    if not hmac.compare_digest((token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.get("/admin/models")
+async def list_models(x_admin_token: Optional[str] = Header(None)):
+    """Model registry status: active, desired and available versions."""
+    _check_admin_token(x_admin_token)
+    return registry.stats()
+
+
+@app.post("/admin/models/activate")
+async def activate_model(request: ActivateModelRequest, x_admin_token: Optional[str] = Header(None)):
+    """Load, warm up and hot-swap to a model version, and pin it in CURRENT."""
+    _check_admin_token(x_admin_token)
+    try:
+        bundle = await registry.swap(request.version, pin=True)
+    except ModelRegistryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"active": bundle.info()}
+
+
+@app.post("/admin/profiler/start")
+async def start_profiler(request: ProfilerStartRequest, x_admin_token: Optional[str] = Header(None)):
+    """Start sampling every thread's stack; earlier samples are discarded."""
+    _check_admin_token(x_admin_token)
+    # Starting stops the previous session, which joins the sampler thread: off the event loop
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, profiler.start, request.interval_ms, request.duration_s)
+
+
+@app.post("/admin/profiler/stop")
+async def stop_profiler(x_admin_token: Optional[str] = Header(None)):
+    _check_admin_token(x_admin_token)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, profiler.stop)
+
+
+@app.get("/admin/profiler")
+async def profiler_results(format: str = "json", limit: int = 20, x_admin_token: Optional[str] = Header(None)):
+    """Profiler status and top functions, or folded stacks with ``?format=folded``."""
+    _check_admin_token(x_admin_token)
+    if format == "folded":
+        return PlainTextResponse(profiler.folded())
+    return {**profiler.stats(), "top": profiler.top(limit)}
+
+
+@app.post("/admin/reputation/reload")
+async def reload_reputation(x_admin_token: Optional[str] = Header(None)):
+    """Reload the reputation lists, recompiling any whose text file changed."""
+    _check_admin_token(x_admin_token)
+    if reputation_filter is None:
+        raise HTTPException(status_code=503, detail="Reputation pre-filter is disabled")
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(None, reputation_filter.load)
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not load reputation lists: {e}")
+    return reputation_filter.stats()
+
+
+@app.get("/admin/tenants")
+async def list_tenants(x_admin_token: Optional[str] = Header(None)):
+    """Tenant model pool: loaded tenants, memory budget and per-tenant hit/miss/load stats."""
+    _check_admin_token(x_admin_token)
+    if tenant_pool is None:
+        raise HTTPException(status_code=503, detail="Tenant models are disabled")
+    return tenant_pool.stats()
+
+
+@app.post("/admin/tenants/{tenant}/unload")
+async def unload_tenant(tenant: str, x_admin_token: Optional[str] = Header(None)):
+    """Drop a tenant's models from memory, e.g. after retraining; the next request reloads them."""
+    _check_admin_token(x_admin_token)
+    if tenant_pool is None:
+        raise HTTPException(status_code=503, detail="Tenant models are disabled")
+    return {"tenant": tenant, "unloaded": tenant_pool.unload(tenant)}
+
+
 @app.get("/health")
 async def health_check():
     """Service health check endpoint."""
+    active = registry.active
     return {
         "service": "ml-service",
         "status": "operational",
+        "model_version": active.version if active else None,
         "models": {
             "phishing_detector": phishing_detector is not None,
             "anomaly_detector": anomaly_detector is not None,
+            "memory_mapped": {
+                "phishing_detector": bool(phishing_detector and phishing_detector.memory_mapped),
+                "anomaly_detector": bool(anomaly_detector and anomaly_detector.memory_mapped),
+            },
+        },
+        "registry": {
+            "active": active.info() if active else None,
+            "swaps": registry.swaps,
+            "failures": registry.failures,
+            "last_error": registry.last_error,
+        },
+        "process": process_info(startup_ms),
+        "executor": executor.stats(),
+        "cache": verdict_cache.stats() if verdict_cache is not None else None,
+        "feature_store": feature_store.stats(),
+        "similarity": similarity_index.stats() if similarity_index is not None else None,
+        "cascade": _cascade_stats(),
+        "admission": admission.stats(),
+        "reputation": reputation_filter.stats() if reputation_filter is not None else None,
+        "tenants": tenant_pool.stats() if tenant_pool is not None else None,
+        "batching": {
+            "phishing": phishing_batcher.stats(),
+            "anomaly": anomaly_batcher.stats(),
         },
     }
+
+
+def _cascade_stats() -> dict:
+    screen = phishing_detector.screen if phishing_detector is not None else None
+    decided = sum(cascade_decisions.values())
+    return {
+        "enabled": screen is not None,
+        "low": screen.low if screen is not None else None,
+        "high": screen.high if screen is not None else None,
+        "decisions": dict(cascade_decisions),
+        "escalation_rate": round(cascade_decisions["forest"] / decided, 4) if decided else None,
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition: stage histograms, queue depths and in-flight counts."""
+    active = registry.active
+    batchers = {"phishing": phishing_batcher.stats(), "anomaly": anomaly_batcher.stats()}
+    families = [
+        ("ml_batcher_queue_depth", "gauge", "Requests waiting to join a micro-batch.",
+         [({"batcher": name}, stats["queue_depth"]) for name, stats in batchers.items()]),
+        ("ml_batcher_inflight_batches", "gauge", "Micro-batches being scored.",
+         [({"batcher": name}, stats["inflight_batches"]) for name, stats in batchers.items()]),
+        ("ml_batcher_batches_total", "counter", "Micro-batches flushed.",
+         [({"batcher": name}, stats["batches"]) for name, stats in batchers.items()]),
+        ("ml_batcher_items_total", "counter", "Requests scored through micro-batches.",
+         [({"batcher": name}, stats["items"]) for name, stats in batchers.items()]),
+        ("ml_executor_pending", "gauge", "Model calls submitted to the inference pool and not finished.",
+         [({}, executor.pending)]),
+        ("ml_executor_max_pending", "gauge", "Inference pool depth limit.", [({}, executor.max_pending)]),
+        ("ml_executor_completed_total", "counter", "Model calls finished by the inference pool.",
+         [({}, executor.completed)]),
+        ("ml_executor_rejected_total", "counter", "Model calls rejected because the pool was full.",
+         [({}, executor.rejected)]),
+        ("ml_executor_waiting", "gauge", "Model calls waiting for a free inference worker.",
+         [({}, executor.waiting)]),
+        ("ml_admission_queue_depth", "gauge", "Queued work compared against the shed depths.",
+         [({}, _queued_work())]),
+        ("ml_requests_shed_total", "counter", "Requests answered without inference, by reason and priority.",
+         [({"reason": reason, "priority": PRIORITY_NAMES[priority]}, n)
+          for (reason, priority), n in sorted(admission.shed.items())]),
+        ("ml_model_info", "gauge", "Active model version.",
+         [({"version": active.version}, 1)] if active else []),
+        ("ml_model_swaps_total", "counter", "Model hot swaps.", [({}, registry.swaps)]),
+        ("ml_feature_store_users", "gauge", "Users tracked by the login feature store.",
+         [({}, feature_store.stats()["users"])]),
+        ("ml_process_resident_memory_bytes", "gauge", "Resident memory of the API process.",
+         [({}, int(process_memory()["rss_mb"] * 2**20))]),
+        ("ml_profiler_running", "gauge", "1 while the sampling profiler is on.", [({}, int(profiler.running))]),
+        ("ml_cascade_decisions_total", "counter", "Phishing verdicts by the cascade stage that decided them.",
+         [({"stage": stage}, n) for stage, n in cascade_decisions.items()]),
+    ]
+    if verdict_cache is not None:
+        cache = verdict_cache.stats()
+        families += [
+            ("ml_cache_hits_total", "counter", "Verdict cache hits.",
+             [({"match": "exact"}, cache["exact_hits"]), ({"match": "near"}, cache["near_hits"])]),
+            ("ml_cache_misses_total", "counter", "Verdict cache misses.", [({}, cache["misses"])]),
+            ("ml_cache_entries", "gauge", "Verdicts in the cache.", [({}, cache["entries"])]),
+        ]
+    if reputation_filter is not None:
+        reputation = reputation_filter.stats()
+        families += [
+            ("ml_reputation_hits_total", "counter", "Messages matched by each reputation list (only blocklist hits decide the verdict).",
+             [({"list": name}, n) for name, n in reputation["hits"].items()]),
+            ("ml_reputation_checked_total", "counter", "Messages checked against the reputation lists.",
+             [({}, reputation["checked"])]),
+            ("ml_reputation_entries", "gauge", "Domains in each loaded reputation list.",
+             [({"list": name}, n) for name, n in reputation["entries"].items()]),
+        ]
+    histograms = [format_histogram(
+        "ml_queue_wait_seconds", "Time requests waited for a micro-batch and an inference worker, by priority.",
+        [({"priority": PRIORITY_NAMES[p]}, h) for p, h in admission.queue_waits.items()],
+    )]
+    if tenant_pool is not None:
+        tenants = tenant_pool.tenants
+        families += [
+            ("ml_tenant_lookups_total", "counter", "Tenant model lookups: loaded, loaded on demand, or joined a load.",
+             [({"tenant": tenant, "result": result}, getattr(stats, attr))
+              for tenant, stats in sorted(tenants.items())
+              for result, attr in (("hit", "hits"), ("miss", "misses"), ("coalesced", "coalesced"))]),
+            ("ml_tenant_load_failures_total", "counter", "Tenant model loads that failed.",
+             [({"tenant": tenant}, stats.failures) for tenant, stats in sorted(tenants.items())]),
+            ("ml_tenant_failed_lookups_total", "counter",
+             "Tenant lookups answered with a recent load failure instead of a reload.",
+             [({"tenant": tenant}, stats.failures_cached) for tenant, stats in sorted(tenants.items())]),
+            ("ml_tenant_evictions_total", "counter", "Tenant models evicted to stay within the memory budget.",
+             [({"tenant": tenant}, stats.evictions) for tenant, stats in sorted(tenants.items())]),
+            ("ml_tenant_loaded_bytes", "gauge", "Size of the tenant models held in memory.",
+             [({}, tenant_pool.loaded_bytes)]),
+            ("ml_tenant_max_bytes", "gauge", "Tenant model memory budget (0 = unlimited).",
+             [({}, tenant_pool.max_bytes)]),
+        ]
+        histograms.append(format_histogram(
+            "ml_tenant_load_seconds", "Time to load, verify and warm up a tenant's models.",
+            [({"tenant": tenant}, stats.load_times) for tenant, stats in sorted(tenants.items())],
+        ))
+    body = inference_metrics.render() + "\n".join(format_metric(*family) for family in families) + "\n"
+    body += "".join(histogram + "\n" for histogram in histograms)
+    return Response(body, media_type=METRICS_CONTENT_TYPE)
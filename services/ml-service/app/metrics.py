@@ -0,0 +1,218 @@
+"""
+CyberSentinel AI – Inference Metrics
+======================================
+Per-stage latency histograms for the scoring endpoints, exposed in the
+Prometheus text format by ``GET /metrics``.
+
+Every instrumented request carries a ``StageTimer`` (``perf_counter_ns``
+marks, no locks – all recording happens on the event loop):
+
+  parse       – arrival until the handler runs (body read + validation)
+  tenant      – X-Tenant model lookup, a load when the tenant is cold
+  reputation  – domain blocklist / allowlist pre-filter
+  preprocess  – cache lookup / feature store, before the model call
+  queue       – waiting for a micro-batch slot and an executor worker
+  featurize   – TF-IDF / feature matrix build     ┐
+  screen      – cascade linear pre-screen         │ measured inside the
+  evaluate    – forest evaluation                 │ detector, also in
+  postprocess – turning scores into verdicts      ┘ process-pool workers
+  serialize   – handler return until the response starts (response model
+                validation + JSON encoding)
+  total       – arrival until the last response byte
+
+Micro-batched requests report the model stages of the batch they rode in.
+Histograms are keyed by endpoint, model version and stage.
+"""
+
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Upper bucket bounds in seconds (Prometheus convention); +Inf is implicit
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Starlette appends the charset
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# A sample is (labels, value)
+Sample = Tuple[Dict[str, str], float]
+
+
+class StageTimer:
+    """Stage durations (ns) of one request, from its arrival."""
+
+    __slots__ = ("start", "last", "stages", "version")
+
+    def __init__(self, start_ns: Optional[int] = None):
+        self.start = time.perf_counter_ns() if start_ns is None else start_ns
+        self.last = self.start
+        self.stages: Dict[str, int] = {}
+        self.version: Optional[str] = None
+
+    def mark(self, stage: str):
+        """Charge the time since the previous mark to ``stage``."""
+        now = time.perf_counter_ns()
+        self.stages[stage] = self.stages.get(stage, 0) + now - self.last
+        self.last = now
+
+    def model(self, timings: Optional[Dict[str, int]]):
+        """Close a model call: detector-reported stages, the rest of the wait is queueing."""
+        now = time.perf_counter_ns()
+        waited = now - self.last
+        for stage, ns in (timings or {}).items():
+            self.stages[stage] = self.stages.get(stage, 0) + ns
+            waited -= ns
+        self.stages["queue"] = self.stages.get("queue", 0) + max(waited, 0)
+        self.last = now
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter_ns() - self.start) / 1e6, 2)
+
+
+_current_timer: ContextVar[Optional[StageTimer]] = ContextVar("stage_timer", default=None)
+
+
+def current_timer() -> StageTimer:
+    """The running request's timer; a detached one outside instrumented requests."""
+    timer = _current_timer.get()
+    return timer if timer is not None else StageTimer()
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in nanoseconds."""
+
+    __slots__ = ("bounds_ns", "counts", "sum_ns", "count")
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.bounds_ns = [int(b * 1e9) for b in sorted(buckets)]
+        self.counts = [0] * (len(self.bounds_ns) + 1)
+        self.sum_ns = 0
+        self.count = 0
+
+    def observe(self, ns: int):
+        self.counts[bisect_left(self.bounds_ns, ns)] += 1
+        self.sum_ns += ns
+        self.count += 1
+
+
+class InferenceMetrics:
+    """Stage histograms plus request counters for the instrumented endpoints."""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._histograms: Dict[Tuple[str, str, str], Histogram] = {}
+        self.requests: Dict[Tuple[str, int], int] = {}
+        self.in_flight: Dict[str, int] = {}
+
+    def observe(self, endpoint: str, version: str, stage: str, ns: int):
+        key = (endpoint, version, stage)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram(self.buckets)
+        histogram.observe(ns)
+
+    def record(self, endpoint: str, status: int, timer: StageTimer):
+        """Fold a finished request into the histograms and counters."""
+        self.requests[(endpoint, status)] = self.requests.get((endpoint, status), 0) + 1
+        version = timer.version or "none"
+        for stage, ns in timer.stages.items():
+            self.observe(endpoint, version, stage, ns)
+        self.observe(endpoint, version, "total", time.perf_counter_ns() - timer.start)
+
+    # ── Exposition ─────────────────────────────────────────
+    def render(self) -> str:
+        lines = [format_histogram(
+            "ml_stage_duration_seconds", "Time spent per request in each inference stage.",
+            [
+                ({"endpoint": endpoint, "model_version": version, "stage": stage}, histogram)
+                for (endpoint, version, stage), histogram in sorted(self._histograms.items())
+            ],
+        )]
+        lines.append(format_metric(
+            "ml_requests_total", "counter", "Requests to the instrumented endpoints by status.",
+            [({"endpoint": e, "status": str(s)}, n) for (e, s), n in sorted(self.requests.items())],
+        ))
+        lines.append(format_metric(
+            "ml_requests_in_flight", "gauge", "Requests currently being handled.",
+            [({"endpoint": e}, n) for e, n in sorted(self.in_flight.items())],
+        ))
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def format_metric(name: str, kind: str, help_text: str, samples: List[Sample]) -> str:
+    """One metric family in the Prometheus text format."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        if value is None:
+            continue
+        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines)
+
+
+def format_histogram(name: str, help_text: str, histograms: List[Tuple[Dict[str, str], Histogram]]) -> str:
+    """One histogram family in the Prometheus text format."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in histograms:
+        bounds = [_format_value(ns / 1e9) for ns in histogram.bounds_ns] + ["+Inf"]
+        cumulative = 0
+        for le, count in zip(bounds, histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum_ns / 1e9)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+    return "\n".join(lines)
+
+
+class MetricsMiddleware:
+    """ASGI middleware that times the given paths and records them on completion."""
+
+    def __init__(self, app, metrics: InferenceMetrics, paths: Iterable[str]):
+        self.app = app
+        self.metrics = metrics
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = scope["path"]
+        timer = StageTimer()
+        token = _current_timer.set(timer)
+        in_flight = self.metrics.in_flight
+        in_flight[endpoint] = in_flight.get(endpoint, 0) + 1
+        status = 500
+
+        async def send_timed(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # Only once the handler ran; validation errors never reach it
+                if timer.stages:
+                    timer.mark("serialize")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            _current_timer.reset(token)
+            in_flight[endpoint] -= 1
+            self.metrics.record(endpoint, status, timer)
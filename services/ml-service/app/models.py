@@ -2,47 +2,246 @@
 CyberSentinel AI – ML Inference Models
 ========================================
 Handles loading trained models and performing predictions.
+
+When fresh memory-mapped artifacts exist (see ``app/artifacts.py``) the
+detectors open those instead of unpickling the sklearn models, so worker
+processes share the model pages through the OS page cache.
+
+With ``ML_CASCADE_ENABLED=1`` the phishing detector first runs the linear
+pre-screen trained next to the forest (see ``app/cascade.py``) and only
+escalates the messages it is unsure about to the forest.
 """
 
 import os
+import time
 import joblib
 import numpy as np
-from typing import Optional
+from typing import Dict, List, Optional
+
+from .artifacts import (
+    ANOMALY_FEATURES_FILE,
+    ANOMALY_FOREST,
+    ANOMALY_MODEL_FILE,
+    COMPILED_DIR,
+    PHISHING_FOREST,
+    PHISHING_MODEL_FILE,
+    VECTORIZER_FILE,
+    file_fingerprint,
+    fresh_header,
+)
+from .cascade import PHISHING_LINEAR, LinearScreen
+from .featurizer import FEATURIZER_FILE, IDF_FILE, TfidfFeaturizer
+from .forest import CompiledForestClassifier, CompiledIsolationForest
 
 MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "models")
 
+# Evaluate forests with the flat-array engine instead of sklearn's per-tree loop
+USE_COMPILED_FOREST = os.environ.get("ML_COMPILED_FOREST", "1") != "0"
+
+# Open compiled artifacts with mmap_mode="r" when they are present and fresh
+USE_MMAP_ARTIFACTS = os.environ.get("ML_MMAP_ARTIFACTS", "1") != "0"
+
+# Linear pre-screen before the phishing forest; empty thresholds keep the calibrated ones
+USE_CASCADE = os.environ.get("ML_CASCADE_ENABLED", "0") != "0"
+CASCADE_LOW = os.environ.get("ML_CASCADE_LOW", "")
+CASCADE_HIGH = os.environ.get("ML_CASCADE_HIGH", "")
+
+
+def _add_stage(stages: Dict[str, int], stage: str, ns: int):
+    stages[stage] = stages.get(stage, 0) + ns
+
+
+def _compiled_files(models_dir: str, name: str) -> List[str]:
+    """The header and arrays of a compiled artifact (``compiled/<name>.*``)."""
+    directory = os.path.join(models_dir, COMPILED_DIR)
+    return [os.path.join(directory, f) for f in sorted(os.listdir(directory)) if f.startswith(f"{name}.")]
+
+
+def _featurizer_files(models_dir: str) -> List[str]:
+    paths = [os.path.join(models_dir, FEATURIZER_FILE), os.path.join(models_dir, IDF_FILE)]
+    return [path for path in paths if os.path.exists(path)]
+
 
 class PhishingDetector:
     """TF-IDF + Random Forest phishing detection model."""
 
-    def __init__(self):
+    def __init__(self, models_dir: str = MODELS_DIR, cascade: Optional[bool] = None):
+        self.models_dir = models_dir
         self.model = None
         self.vectorizer = None
+        self.featurizer: Optional[TfidfFeaturizer] = None
+        self.engine: Optional[CompiledForestClassifier] = None
+        self.screen: Optional[LinearScreen] = None
+        self.fingerprint: Optional[str] = None
+        self.memory_mapped = False
+        # Model files actually mapped or loaded (tenant pool memory accounting)
+        self.files: List[str] = []
         self._load_models()
+        if self.ready and (USE_CASCADE if cascade is None else cascade):
+            self.screen = self._load_screen()
+
+    @property
+    def ready(self) -> bool:
+        if self.engine is not None and self.featurizer is not None:
+            return True
+        return self.model is not None and self.vectorizer is not None
 
     def _load_models(self):
-        model_path = os.path.join(MODELS_DIR, "phishing_model.pkl")
-        vectorizer_path = os.path.join(MODELS_DIR, "tfidf_vectorizer.pkl")
+        model_path = os.path.join(self.models_dir, PHISHING_MODEL_FILE)
+        vectorizer_path = os.path.join(self.models_dir, VECTORIZER_FILE)
 
-        if os.path.exists(model_path) and os.path.exists(vectorizer_path):
+        if self._load_artifacts():
+            print("[+] Phishing detection model loaded successfully (memory-mapped)")
+        elif os.path.exists(model_path) and os.path.exists(vectorizer_path):
             self.model = joblib.load(model_path)
             self.vectorizer = joblib.load(vectorizer_path)
+            if USE_COMPILED_FOREST:
+                self.engine = CompiledForestClassifier.from_sklearn(self.model)
+            self.fingerprint = file_fingerprint(model_path, vectorizer_path)
+            self.featurizer = self._load_featurizer()
+            self.files += [model_path, vectorizer_path]
             print("[+] Phishing detection model loaded successfully")
         else:
             print("[!] Warning: Phishing model files not found. Run train.py first.")
 
+    def _load_artifacts(self) -> bool:
+        if not (USE_COMPILED_FOREST and USE_MMAP_ARTIFACTS and TfidfFeaturizer.exists(self.models_dir)):
+            return False
+        header = fresh_header(self.models_dir, PHISHING_FOREST, PHISHING_MODEL_FILE, VECTORIZER_FILE)
+        if header is None:
+            return False
+        featurizer = TfidfFeaturizer.load(self.models_dir, mmap_mode="r")
+        if featurizer.fingerprint != header["fingerprint"]:
+            print(f"[!] Warning: {FEATURIZER_FILE} does not match the compiled forest, ignoring both")
+            return False
+        self.engine = CompiledForestClassifier.load(os.path.join(self.models_dir, COMPILED_DIR), PHISHING_FOREST)
+        self.featurizer = featurizer
+        self.fingerprint = header["fingerprint"]
+        self.memory_mapped = True
+        self.files += _compiled_files(self.models_dir, PHISHING_FOREST) + _featurizer_files(self.models_dir)
+        return True
+
+    def _load_screen(self) -> Optional[LinearScreen]:
+        header = fresh_header(self.models_dir, PHISHING_LINEAR, PHISHING_MODEL_FILE, VECTORIZER_FILE)
+        if header is None:
+            print("[!] Warning: Cascade enabled but no linear screen found. Run train.py first.")
+            return None
+        screen = LinearScreen.load(os.path.join(self.models_dir, COMPILED_DIR))
+        n_features = self.featurizer.n_features if self.featurizer is not None else len(self.vectorizer.vocabulary_)
+        if screen.n_features != n_features:
+            print("[!] Warning: Linear screen does not match the vectorizer, cascade disabled")
+            return None
+        if CASCADE_LOW:
+            screen.low = float(CASCADE_LOW)
+        if CASCADE_HIGH:
+            screen.high = float(CASCADE_HIGH)
+        self.files += _compiled_files(self.models_dir, PHISHING_LINEAR)
+        print(f"[+] Cascade pre-screen loaded (low {screen.low:.4f}, high {screen.high:.4f})")
+        return screen
+
+    def _load_featurizer(self) -> Optional[TfidfFeaturizer]:
+        # Prefer the export written by train.py, else compile the vectorizer
+        try:
+            if TfidfFeaturizer.exists(self.models_dir):
+                featurizer = TfidfFeaturizer.load(self.models_dir)
+                # Retrains usually keep the vocabulary size (max_features), so match the pickles
+                if featurizer.fingerprint == self.fingerprint:
+                    self.files += _featurizer_files(self.models_dir)
+                    return featurizer
+                print("[!] Warning: Exported TF-IDF featurizer is stale (pickles changed), recompiling")
+            return TfidfFeaturizer.from_vectorizer(self.vectorizer)
+        except ValueError as e:
+            print(f"[!] Warning: Fast TF-IDF featurizer unavailable ({e})")
+            return None
+
     def predict(self, text: str) -> dict:
         """Predict if a message is phishing or legitimate."""
-        if self.model is None or self.vectorizer is None:
-            return {"error": "Model not loaded. Run train.py first."}
+        return self.predict_batch([text])[0]
 
-        # Vectorize input
-        X = self.vectorizer.transform([text])
+    def predict_batch(self, texts: List[str], timings: Optional[Dict[str, int]] = None) -> List[dict]:
+        """Predict a batch of messages with a single vectorized model call.
 
-        # Get prediction and probability
-        prediction = self.model.predict(X)[0]
-        probabilities = self.model.predict_proba(X)[0]
+        Results are returned in the same order as ``texts``. When given,
+        ``timings`` receives the featurize/evaluate/postprocess durations (ns).
+        """
+        if not self.ready:
+            return [{"error": "Model not loaded. Run train.py first."} for _ in texts]
+        if not texts:
+            return []
 
+        stages: Dict[str, int] = {}
+        if self.engine is not None and self.featurizer is not None:
+            # Dense rows feed the compiled forest; they are built in bounded
+            # blocks so the per-thread buffer stays small whatever the batch size
+            results = []
+            start = time.perf_counter_ns()
+            for _, X in self.featurizer.iter_dense(texts):
+                results.extend(self._predict_rows(X, start, stages))
+                start = time.perf_counter_ns()
+        else:
+            # Vectorize all inputs at once (sparse rows)
+            start = time.perf_counter_ns()
+            if self.featurizer is None:
+                X = self.vectorizer.transform(texts)
+            else:
+                X = self.featurizer.transform(texts)
+            results = self._predict_rows(X, start, stages)
+        if timings is not None:
+            timings.update(stages)
+        return results
+
+    def _predict_rows(self, X, start: int, stages: Dict[str, int]) -> List[dict]:
+        """Verdicts for featurized rows; stage durations since ``start`` are added to ``stages``."""
+        featurized = time.perf_counter_ns()
+        if self.screen is not None:
+            return self._predict_cascade(X, start, featurized, stages)
+
+        # One forest pass; labels are derived from the probabilities
+        probabilities, predictions = self._evaluate_forest(X)
+        evaluated = time.perf_counter_ns()
+
+        results = [
+            self._format_result(prediction, proba)
+            for prediction, proba in zip(predictions, probabilities)
+        ]
+        _add_stage(stages, "featurize", featurized - start)
+        _add_stage(stages, "evaluate", evaluated - featurized)
+        _add_stage(stages, "postprocess", time.perf_counter_ns() - evaluated)
+        return results
+
+    def _evaluate_forest(self, X):
+        if self.engine is not None:
+            return self.engine.evaluate(X)
+        probabilities = self.model.predict_proba(X)
+        return probabilities, self.model.classes_.take(np.argmax(probabilities, axis=1))
+
+    def _predict_cascade(self, X, start: int, featurized: int, stages: Dict[str, int]) -> List[dict]:
+        # The linear screen settles confident rows; only the rest reach the forest
+        p = self.screen.probability(X)
+        decided, linear_predictions = self.screen.decide(p)
+        escalated = np.flatnonzero(~decided)
+        screened = time.perf_counter_ns()
+
+        results: List[Optional[dict]] = [None] * len(p)
+        if len(escalated):
+            probabilities, predictions = self._evaluate_forest(X[escalated])
+            for row, prediction, proba in zip(escalated.tolist(), predictions, probabilities):
+                results[row] = {**self._format_result(prediction, proba), "decided_by": "forest"}
+        evaluated = time.perf_counter_ns()
+
+        for row in np.flatnonzero(decided).tolist():
+            results[row] = {
+                **self._format_result(linear_predictions[row], (1.0 - p[row], p[row])),
+                "decided_by": "linear",
+            }
+        _add_stage(stages, "featurize", featurized - start)
+        _add_stage(stages, "screen", screened - featurized)
+        _add_stage(stages, "evaluate", evaluated - screened)
+        _add_stage(stages, "postprocess", time.perf_counter_ns() - evaluated)
+        return results
+
+    @staticmethod
+    def _format_result(prediction, probabilities) -> dict:
         # Calculate risk score (0-100)
         phishing_prob = probabilities[1]
         risk_score = int(round(phishing_prob * 100))
@@ -64,44 +263,107 @@ class PhishingDetector:
 class AnomalyDetector:
     """Isolation Forest anomaly detection for login patterns."""
 
-    def __init__(self):
+    def __init__(self, models_dir: str = MODELS_DIR):
+        self.models_dir = models_dir
         self.model = None
         self.features = None
+        self.engine: Optional[CompiledIsolationForest] = None
+        self.fingerprint: Optional[str] = None
+        self.memory_mapped = False
+        self.files: List[str] = []
         self._load_models()
 
+    @property
+    def ready(self) -> bool:
+        return self.features is not None and (self.engine is not None or self.model is not None)
+
     def _load_models(self):
-        model_path = os.path.join(MODELS_DIR, "anomaly_model.pkl")
-        features_path = os.path.join(MODELS_DIR, "anomaly_features.pkl")
+        model_path = os.path.join(self.models_dir, ANOMALY_MODEL_FILE)
+        features_path = os.path.join(self.models_dir, ANOMALY_FEATURES_FILE)
 
-        if os.path.exists(model_path) and os.path.exists(features_path):
+        if self._load_artifacts():
+            print("[+] Anomaly detection model loaded successfully (memory-mapped)")
+        elif os.path.exists(model_path) and os.path.exists(features_path):
             self.model = joblib.load(model_path)
             self.features = joblib.load(features_path)
+            if USE_COMPILED_FOREST:
+                self.engine = CompiledIsolationForest.from_sklearn(self.model)
+            self.fingerprint = file_fingerprint(model_path, features_path)
+            self.files += [model_path, features_path]
             print("[+] Anomaly detection model loaded successfully")
         else:
             print("[!] Warning: Anomaly model files not found. Run train.py first.")
 
+    def _load_artifacts(self) -> bool:
+        if not (USE_COMPILED_FOREST and USE_MMAP_ARTIFACTS):
+            return False
+        header = fresh_header(self.models_dir, ANOMALY_FOREST, ANOMALY_MODEL_FILE, ANOMALY_FEATURES_FILE)
+        if header is None:
+            return False
+        self.engine = CompiledIsolationForest.load(os.path.join(self.models_dir, COMPILED_DIR), ANOMALY_FOREST)
+        self.features = header["features"]
+        self.fingerprint = header["fingerprint"]
+        self.memory_mapped = True
+        self.files += _compiled_files(self.models_dir, ANOMALY_FOREST)
+        return True
+
     def predict(self, login_data: dict) -> dict:
         """Detect anomalous login patterns."""
-        if self.model is None:
-            return {"error": "Model not loaded. Run train.py first."}
+        return self.predict_batch([login_data])[0]
+
+    def predict_batch(self, records: List[dict], timings: Optional[Dict[str, int]] = None) -> List[dict]:
+        """Score a batch of login records with a single vectorized model call.
 
-        # Build feature vector
-        feature_values = []
-        for feat in self.features:
-            feature_values.append(login_data.get(feat, 0))
+        Results are returned in the same order as ``records``. When given,
+        ``timings`` receives the featurize/evaluate/postprocess durations (ns).
+        """
+        if not self.ready:
+            return [{"error": "Model not loaded. Run train.py first."} for _ in records]
+        if not records:
+            return []
 
-        X = np.array([feature_values])
+        # Build feature matrix
+        start = time.perf_counter_ns()
+        X = np.array(
+            [[record.get(feat, 0) for feat in self.features] for record in records],
+            dtype=np.float64,
+        )
+        if timings is not None:
+            timings["featurize"] = time.perf_counter_ns() - start
+        return self.predict_matrix(X, timings)
+
+    def predict_matrix(self, X: np.ndarray, timings: Optional[Dict[str, int]] = None) -> List[dict]:
+        """Score a float64 matrix whose columns follow ``self.features``."""
+        if not self.ready:
+            return [{"error": "Model not loaded. Run train.py first."} for _ in range(len(X))]
+        if len(X) == 0:
+            return []
+
+        # score_samples returns negative values; more negative = more anomalous.
+        # predict() is score_samples - offset_ < 0, so derive it from one pass.
+        start = time.perf_counter_ns()
+        if self.engine is not None:
+            anomaly_scores, predictions = self.engine.evaluate(X)
+        else:
+            anomaly_scores = self.model.score_samples(X)
+            predictions = np.where(anomaly_scores - self.model.offset_ < 0, -1, 1)
+        evaluated = time.perf_counter_ns()
 
-        # Get prediction (-1 = anomaly, 1 = normal)
-        prediction = self.model.predict(X)[0]
-        anomaly_score = self.model.score_samples(X)[0]
+        results = [
+            self._format_result(prediction, anomaly_score)
+            for prediction, anomaly_score in zip(predictions, anomaly_scores)
+        ]
+        if timings is not None:
+            timings["evaluate"] = evaluated - start
+            timings["postprocess"] = time.perf_counter_ns() - evaluated
+        return results
 
+    def _format_result(self, prediction, anomaly_score) -> dict:
         # Normalize anomaly score to 0-100 risk
-        # score_samples returns negative values; more negative = more anomalous
         risk_score = int(round(max(0, min(100, (1 - (anomaly_score + 0.5)) * 100))))
 
         return {
-            "is_anomaly": prediction == -1,
+            "is_anomaly": bool(prediction == -1),
             "risk_score": risk_score,
             "anomaly_score": round(float(anomaly_score), 4),
             "label": "Anomalous" if prediction == -1 else "Normal",
@@ -0,0 +1,145 @@
+"""
+CyberSentinel AI – Sampling Profiler
+======================================
+A wall-clock sampling profiler that can be switched on and off in a running
+service (``/admin/profiler``), for hot-path investigations without a restart.
+
+While running, a daemon thread wakes every ``interval`` seconds, snapshots
+the stack of every other thread in the process (``sys._current_frames``) and
+counts each distinct stack. Results come out as folded stacks – one
+``thread;outer;...;inner count`` line per stack, the input format of
+flamegraph.pl and speedscope – or as a top-functions summary.
+
+Only threads of this process are sampled: in process executor mode the
+model runs in pool workers and shows up here as waiting. Sampling stops by
+itself after ``duration`` seconds so a forgotten session cannot keep
+costing CPU.
+"""
+
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+_TRUNCATED = "[other stacks]"
+
+
+class SamplingProfiler:
+    """Stack sampler for every thread in the process but its own."""
+
+    def __init__(self, max_stacks: int = 10_000, max_depth: int = 64):
+        self.max_stacks = max(1, int(max_stacks))
+        self.max_depth = max(1, int(max_depth))
+        self._lock = threading.Lock()
+        # Serializes start/stop, which the API runs in worker threads
+        self._control = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stacks: Dict[str, int] = {}
+        self.interval = 0.0
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ── Control ────────────────────────────────────────────
+    def start(self, interval_ms: float = 5.0, duration_s: float = 30.0) -> dict:
+        """Start a new session, discarding the previous one's samples."""
+        with self._control:
+            self.stop()
+            with self._lock:
+                self._stacks = {}
+                self.samples = 0
+            self.interval = max(interval_ms, 1.0) / 1000.0
+            self.started_at = time.time()
+            self.stopped_at = None
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(time.monotonic() + duration_s,), name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+        return self.stats()
+
+    def stop(self) -> dict:
+        """Stop sampling; blocks until the sampler thread exits (call off the event loop)."""
+        with self._control:
+            thread = self._thread
+            if thread is not None:
+                self._stop.set()
+                thread.join()
+                self._thread = None
+        return self.stats()
+
+    # ── Sampling ───────────────────────────────────────────
+    def _run(self, deadline: float):
+        own = threading.get_ident()
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self._add(self._fold(names.get(ident, str(ident)), frame))
+            self._stop.wait(self.interval)
+        self.stopped_at = time.time()
+
+    def _fold(self, thread_name: str, frame) -> str:
+        frames: List[str] = []
+        while frame is not None and len(frames) < self.max_depth:
+            code = frame.f_code
+            # First line identifies the function, so samples fold per function
+            frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        frames.append(thread_name)
+        return ";".join(reversed(frames))
+
+    def _add(self, stack: str):
+        with self._lock:
+            self.samples += 1
+            if stack not in self._stacks and len(self._stacks) >= self.max_stacks:
+                stack = _TRUNCATED
+            self._stacks[stack] = self._stacks.get(stack, 0) + 1
+
+    # ── Results ────────────────────────────────────────────
+    def folded(self) -> str:
+        with self._lock:
+            stacks = sorted(self._stacks.items(), key=lambda item: -item[1])
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def top(self, limit: int = 20) -> List[dict]:
+        """Functions by samples on top of the stack (self) and anywhere in it (total)."""
+        own: Dict[str, int] = {}
+        total: Dict[str, int] = {}
+        with self._lock:
+            stacks = list(self._stacks.items())
+        for stack, count in stacks:
+            frames = stack.split(";")[1:]
+            if not frames:
+                continue
+            own[frames[-1]] = own.get(frames[-1], 0) + count
+            for function in set(frames):
+                total[function] = total.get(function, 0) + count
+
+        samples = self.samples or 1
+        ranked: List[Tuple[str, int]] = sorted(own.items(), key=lambda item: -item[1])[:limit]
+        return [
+            {
+                "function": function,
+                "self": count,
+                "self_pct": round(100 * count / samples, 2),
+                "total_pct": round(100 * total[function] / samples, 2),
+            }
+            for function, count in ranked
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "interval_ms": round(self.interval * 1000, 3),
+            "samples": self.samples,
+            "stacks": len(self._stacks),
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+        }
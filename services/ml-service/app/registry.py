@@ -0,0 +1,304 @@
+"""
+CyberSentinel AI – Versioned Model Registry
+=============================================
+Keeps track of trained model versions and hot-swaps them without a restart.
+
+Layout:
+  models/<version>/manifest.json   – version, checksums of every file, features
+  models/<version>/*.pkl, ...      – the same files train.py writes
+  models/CURRENT                   – optional, names the version to serve
+  models/*.pkl                     – legacy flat layout, served as "legacy"
+
+Without a CURRENT pointer the newest complete version (by manifest
+``created_at``) is served, falling back to the legacy flat files. A version
+is loaded and warmed up in the background, then swapped in with a single
+reference assignment; requests already scoring on the previous bundle
+finish on it.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from .models import AnomalyDetector, PhishingDetector
+
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+LEGACY_VERSION = "legacy"
+
+# Inputs used to warm a freshly loaded bundle before it takes traffic
+_WARMUP_TEXTS = [
+    "URGENT: Your account has been suspended. Verify your credentials now.",
+    "Hi team, the sprint retrospective notes are on the wiki.",
+]
+_WARMUP_LOGINS = [
+    {"login_hour": 10, "ip_frequency": 50, "device_change": 0, "failed_attempts": 0, "session_duration": 30},
+    {"login_hour": 3, "ip_frequency": 2, "device_change": 1, "failed_attempts": 6, "session_duration": 2},
+]
+
+
+class ModelRegistryError(Exception):
+    """Raised when a model version cannot be found, verified or loaded."""
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_manifest(version_dir: str, version: str, features: Optional[List[str]] = None, **extra) -> dict:
+    """Checksum every file under ``version_dir`` and write its manifest.
+
+    Written last by ``train.py`` so a half-written version is never picked up.
+    """
+    files = {}
+    for root, _, names in os.walk(version_dir):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, version_dir)
+            if rel != MANIFEST_FILE:
+                files[rel.replace(os.sep, "/")] = _sha256(path)
+
+    manifest = {
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "features": features,
+        "files": files,
+        **extra,
+    }
+    tmp_path = os.path.join(version_dir, MANIFEST_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(version_dir, MANIFEST_FILE))
+    return manifest
+
+
+def write_current(root: str, version: str):
+    """Atomically point ``root/CURRENT`` at ``version``."""
+    pointer = os.path.join(root, CURRENT_FILE)
+    with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+    os.replace(pointer + ".tmp", pointer)
+
+
+class ModelBundle:
+    """One loaded, warmed-up model version."""
+
+    def __init__(self, version: str, path: str, manifest: Optional[dict],
+                 phishing: PhishingDetector, anomaly: AnomalyDetector, load_ms: float):
+        self.version = version
+        self.path = path
+        self.manifest = manifest
+        self.phishing = phishing
+        self.anomaly = anomaly
+        self.load_ms = load_ms
+        self.activated_at: Optional[float] = None
+        # Set for bundles served from the tenant model pool
+        self.tenant: Optional[str] = None
+
+    @property
+    def served_version(self) -> str:
+        """``version``, qualified with the tenant for tenant bundles."""
+        return self.version if self.tenant is None else f"{self.tenant}/{self.version}"
+
+    @property
+    def detectors(self) -> Dict[str, object]:
+        return {"phishing": self.phishing, "anomaly": self.anomaly}
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "path": self.path,
+            "load_ms": self.load_ms,
+            "activated_at": self.activated_at,
+            "created_at": (self.manifest or {}).get("created_at"),
+        }
+
+
+class ModelRegistry:
+    """Discovers model versions under ``root`` and serves the active one."""
+
+    def __init__(
+        self,
+        root: str,
+        on_activate: Optional[Callable[[ModelBundle], None]] = None,
+        prepare: Optional[Callable[[ModelBundle], None]] = None,
+    ):
+        self.root = root
+        self.on_activate = on_activate
+        # Called after warm-up, before the swap (e.g. to preload process workers)
+        self.prepare = prepare
+        self.active: Optional[ModelBundle] = None
+        self._lock = threading.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+        self.swaps = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    # ── Discovery ──────────────────────────────────────────
+    def _read_manifest(self, version_dir: str) -> Optional[dict]:
+        path = os.path.join(version_dir, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def versions(self) -> List[dict]:
+        """Complete versions (those with a manifest), oldest first."""
+        found = []
+        if os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                version_dir = os.path.join(self.root, name)
+                if not os.path.isdir(version_dir):
+                    continue
+                manifest = self._read_manifest(version_dir)
+                if manifest is not None:
+                    found.append({"version": name, "created_at": manifest.get("created_at", "")})
+        found.sort(key=lambda v: (v["created_at"], v["version"]))
+        return found
+
+    def desired_version(self) -> str:
+        """The version that should be active: CURRENT, newest, or legacy."""
+        pointer = os.path.join(self.root, CURRENT_FILE)
+        if os.path.exists(pointer):
+            with open(pointer, encoding="utf-8") as f:
+                version = f.read().strip()
+            if version:
+                return version
+        versions = self.versions()
+        return versions[-1]["version"] if versions else LEGACY_VERSION
+
+    def _version_dir(self, version: str) -> str:
+        if version == LEGACY_VERSION:
+            return self.root
+        # Only plain directory names inside the registry root
+        if os.path.basename(version) != version or version in ("", ".", ".."):
+            raise ModelRegistryError(f"Invalid model version '{version}'")
+        version_dir = os.path.join(self.root, version)
+        if not os.path.isdir(version_dir):
+            raise ModelRegistryError(f"Model version '{version}' not found")
+        return version_dir
+
+    # ── Loading ────────────────────────────────────────────
+    def _verify(self, version_dir: str, manifest: dict):
+        for rel, checksum in manifest.get("files", {}).items():
+            path = os.path.join(version_dir, *rel.split("/"))
+            if not os.path.exists(path):
+                raise ModelRegistryError(f"Missing model file {rel}")
+            if _sha256(path) != checksum:
+                raise ModelRegistryError(f"Checksum mismatch for {rel}")
+
+    def load(self, version: str) -> ModelBundle:
+        """Load, verify and warm up ``version`` (blocking; run off the event loop)."""
+        version_dir = self._version_dir(version)
+        manifest = self._read_manifest(version_dir)
+        if manifest is None and version != LEGACY_VERSION:
+            raise ModelRegistryError(f"Model version '{version}' has no manifest")
+
+        start = time.perf_counter()
+        if manifest is not None:
+            self._verify(version_dir, manifest)
+        phishing = PhishingDetector(version_dir)
+        anomaly = AnomalyDetector(version_dir)
+        if not (phishing.ready and anomaly.ready):
+            raise ModelRegistryError(f"Model version '{version}' is incomplete")
+        if manifest and manifest.get("features") and list(manifest["features"]) != list(anomaly.features):
+            raise ModelRegistryError(f"Feature list of '{version}' does not match its manifest")
+
+        # Warm-up: first calls fill featurizer buffers and page in mapped arrays
+        for result in phishing.predict_batch(_WARMUP_TEXTS) + anomaly.predict_batch(_WARMUP_LOGINS):
+            if "error" in result:
+                raise ModelRegistryError(f"Warm-up of '{version}' failed: {result['error']}")
+
+        bundle = ModelBundle(version, version_dir, manifest, phishing, anomaly, 0.0)
+        if self.prepare is not None:
+            self.prepare(bundle)
+        bundle.load_ms = round((time.perf_counter() - start) * 1000, 2)
+        return bundle
+
+    def activate(self, bundle: ModelBundle):
+        """Atomically make ``bundle`` the active version."""
+        with self._lock:
+            previous = self.active
+            bundle.activated_at = time.time()
+            self.active = bundle
+            self.swaps += 1
+        if self.on_activate is not None:
+            self.on_activate(bundle)
+        old = previous.version if previous else None
+        print(f"[+] Model version '{bundle.version}' active (was {old}, loaded in {bundle.load_ms} ms)")
+
+    def load_and_activate(self, version: Optional[str] = None, pin: bool = False) -> ModelBundle:
+        """Load and activate ``version`` (default: the desired one).
+
+        ``pin`` also writes it to CURRENT so the watcher keeps it active.
+        """
+        version = version or self.desired_version()
+        try:
+            bundle = self.load(version)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = f"{version}: {e}"
+            raise
+        if pin:
+            write_current(self.root, version)
+        self.activate(bundle)
+        return bundle
+
+    async def swap(self, version: Optional[str] = None, pin: bool = False) -> ModelBundle:
+        """Load ``version`` in a background thread, then swap it in."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.load_and_activate, version, pin)
+
+    # ── Watcher ────────────────────────────────────────────
+    def start_watching(self, interval: float):
+        if interval > 0 and self._watch_task is None:
+            self._watch_task = asyncio.get_running_loop().create_task(self._watch(interval))
+
+    async def stop_watching(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    async def _watch(self, interval: float):
+        failed_version = None
+        while True:
+            await asyncio.sleep(interval)
+            version = None
+            try:
+                version = self.desired_version()
+                current = self.active.version if self.active else None
+                # Do not retry a broken version every tick until it changes
+                if version != current and version != failed_version:
+                    await self.swap(version)
+                    failed_version = None
+            except Exception as e:
+                failed_version = version
+                print(f"[!] Warning: Model hot swap to '{version}' failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "root": self.root,
+            "active": self.active.info() if self.active else None,
+            "desired": self.desired_version(),
+            "available": [v["version"] for v in self.versions()],
+            "swaps": self.swaps,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "watching": self._watch_task is not None,
+        }
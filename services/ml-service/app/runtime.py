@@ -0,0 +1,63 @@
+"""
+CyberSentinel AI – Process Runtime Info
+=========================================
+Startup timing and memory figures for the current process, reported by
+``/health``, by inference pool workers and per stage by ``train.py``.
+"""
+
+import os
+import resource
+import time
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Recorded when the process first imports the service package
+PROCESS_STARTED = time.perf_counter()
+
+
+def process_memory() -> dict:
+    """Resident and shared memory of this process in MB.
+
+    ``shared_mb`` counts resident pages backed by files, which includes
+    memory-mapped model arrays shared with other workers through the page cache.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            _, resident, shared = (int(x) for x in f.read().split()[:3])
+        return {
+            "rss_mb": round(resident * _PAGE_SIZE / 2**20, 2),
+            "shared_mb": round(shared * _PAGE_SIZE / 2**20, 2),
+        }
+    except (OSError, ValueError):
+        # Non-Linux fallback: peak RSS only (KB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        scale = 1 if os.uname().sysname == "Darwin" else 1024
+        return {"rss_mb": round(peak * scale / 2**20, 2), "shared_mb": None}
+
+
+def reset_peak_memory() -> bool:
+    """Restart peak RSS tracking (Linux); False when it cannot be reset."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_memory_mb() -> float:
+    """Peak RSS in MB since the last ``reset_peak_memory`` (or process start)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 2)
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1 if os.uname().sysname == "Darwin" else 1024
+    return round(peak * scale / 2**20, 2)
+
+
+def process_info(startup_ms: float = None) -> dict:
+    return {"pid": os.getpid(), "startup_ms": startup_ms, **process_memory()}
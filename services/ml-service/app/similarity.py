@@ -0,0 +1,334 @@
+"""
+CyberSentinel AI – Similar-Message Search
+===========================================
+In-memory index of recently scored phishing traffic, answering "which
+messages we already scored look like this one" for campaign triage.
+
+Messages are embedded with the serving ``PhishingDetector``'s TF-IDF
+featurizer (L2-normalized, so cosine similarity is a dot product) and
+indexed with pruned sparse dot products:
+
+  documents – only the ``doc_terms`` highest-weighted terms of a message are
+              kept (renormalized), in fixed-size ring arrays of
+              ``max_entries`` slots; the oldest message is overwritten first
+  postings  – one ring of at most ``max_postings`` (doc id, weight) pairs per
+              term, newest first to survive
+  query     – the ``query_terms`` heaviest query terms accumulate partial
+              scores over their postings and the best candidates are
+              rescored against their stored vectors
+
+A message identical to one still indexed is not stored again; the existing
+entry counts it (``seen``) and takes its latest verdict.
+
+Query work is bounded by ``query_terms * max_postings`` whatever the index
+size, so latency stays flat as the index grows to millions of entries.
+Memory is about ``max_entries * (8 * doc_terms + ~850)`` bytes – ~1 KB per
+entry – plus at most ``n_terms * max_postings * 16`` bytes of postings, and
+every worker process keeps its own index. Messages are embedded by a background thread, off the scoring
+path; when it falls behind the oldest pending messages are dropped.
+
+The index is bound to the model fingerprint and clears itself when a model
+swap changes the vocabulary.
+"""
+
+import hashlib
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+_EMPTY = -1
+
+# Candidates rescored exactly per requested result
+_RERANK_FACTOR = 8
+
+
+class _Postings:
+    """Ring of the newest ``capacity`` (doc id, weight) pairs of one term."""
+
+    __slots__ = ("ids", "weights", "size", "cursor")
+
+    def __init__(self, capacity: int):
+        self.ids = np.full(min(capacity, 16), _EMPTY, dtype=np.int64)
+        self.weights = np.zeros(len(self.ids), dtype=np.float32)
+        self.size = 0
+        self.cursor = 0
+
+    def add(self, doc_id: int, weight: float, capacity: int):
+        if self.size == len(self.ids) and self.size < capacity:
+            # Grow by doubling until the cap, then start overwriting
+            grown = min(capacity, 2 * self.size)
+            self.ids = np.concatenate([self.ids, np.full(grown - self.size, _EMPTY, dtype=np.int64)])
+            self.weights = np.concatenate([self.weights, np.zeros(grown - self.size, dtype=np.float32)])
+        self.ids[self.cursor] = doc_id
+        self.weights[self.cursor] = weight
+        self.cursor = (self.cursor + 1) % len(self.ids)
+        self.size = min(self.size + 1, len(self.ids))
+
+
+class SimilarityIndex:
+    """Bounded top-k cosine search over recently scored messages."""
+
+    def __init__(
+        self,
+        max_entries: int = 50_000,
+        max_postings: int = 1024,
+        doc_terms: int = 16,
+        query_terms: int = 16,
+        preview_chars: int = 200,
+        max_pending: int = 10_000,
+        batch_size: int = 256,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.max_postings = max(1, int(max_postings))
+        self.doc_terms = max(1, int(doc_terms))
+        self.query_terms = max(1, int(query_terms))
+        self.preview_chars = max(1, int(preview_chars))
+        self.batch_size = max(1, int(batch_size))
+
+        self._lock = threading.Lock()
+        self._detector = None
+        self.fingerprint: Optional[str] = None
+        self._reset()
+
+        # Messages waiting for the indexing thread
+        self._pending: deque = deque(maxlen=max(1, int(max_pending)))
+        self._wakeup = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        # Counters
+        self.indexed = 0
+        self.dropped = 0
+        self.queries = 0
+
+    def _reset(self):
+        n = self.max_entries
+        self._slot_ids = np.full(n, _EMPTY, dtype=np.int64)
+        self._terms = np.zeros((n, self.doc_terms), dtype=np.int32)
+        self._weights = np.zeros((n, self.doc_terms), dtype=np.float32)
+        self._hashes = np.zeros(n, dtype=np.uint64)
+        self._seen = np.zeros(n, dtype=np.int64)
+        # (preview, verdict, scored_at) per slot
+        self._meta: List[Optional[tuple]] = [None] * n
+        # text hash -> doc id of the live copy
+        self._by_hash: Dict[int, int] = {}
+        self._postings = {}
+        self._next_id = 0
+
+    @property
+    def size(self) -> int:
+        return min(self._next_id, self.max_entries)
+
+    # ── Model Binding ──────────────────────────────────────
+    def bind(self, detector):
+        """Embed with ``detector``; clears the index if its model changed."""
+        fingerprint = getattr(detector, "fingerprint", None)
+        with self._lock:
+            self._detector = detector
+            if fingerprint != self.fingerprint:
+                if self.fingerprint is not None:
+                    self._reset()
+                self.fingerprint = fingerprint
+
+    def _embed(self, texts: List[str]):
+        """CSR TF-IDF rows for ``texts`` from the bound detector."""
+        detector = self._detector
+        if detector is None or not detector.ready:
+            return None
+        if detector.featurizer is not None:
+            return detector.featurizer.transform(texts)
+        return detector.vectorizer.transform(texts).tocsr()
+
+    # ── Ingestion ──────────────────────────────────────────
+    def submit(self, texts: List[str], verdicts: List[dict]):
+        """Queue scored messages for indexing; never blocks the caller."""
+        now = time.time()
+        with self._wakeup:
+            for text, verdict in zip(texts, verdicts):
+                if "error" in verdict:
+                    continue
+                if len(self._pending) == self._pending.maxlen:
+                    self.dropped += 1
+                self._pending.append((text, verdict, now))
+            self._wakeup.notify()
+
+    def start(self):
+        if self._thread is None:
+            self._closed = False
+            self._thread = threading.Thread(target=self._run, name="similarity-indexer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while not self._pending and not self._closed:
+                    self._wakeup.wait()
+                if self._closed:
+                    return
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            try:
+                self.add([text for text, _, _ in batch], [verdict for _, verdict, _ in batch],
+                         [scored_at for _, _, scored_at in batch])
+            except Exception as e:
+                print(f"[!] Warning: Similarity indexing failed: {e}")
+
+    def add(self, texts: List[str], verdicts: List[dict], scored_at: Optional[List[float]] = None):
+        """Embed and index messages synchronously."""
+        X = self._embed(texts)
+        if X is None:
+            return
+        now = time.time()
+        with self._lock:
+            for row, text in enumerate(texts):
+                start, end = X.indptr[row], X.indptr[row + 1]
+                if start == end:
+                    continue
+                self._insert(
+                    text,
+                    X.indices[start:end],
+                    X.data[start:end],
+                    verdicts[row],
+                    scored_at[row] if scored_at else now,
+                )
+
+    def _insert(self, text: str, indices: np.ndarray, weights: np.ndarray, verdict: dict, scored_at: float):
+        text_hash = _text_hash(text)
+        known = self._by_hash.get(text_hash)
+        if known is not None and self._slot_ids[known % self.max_entries] == known:
+            slot = known % self.max_entries
+            self._seen[slot] += 1
+            self._meta[slot] = (self._meta[slot][0], _compact_verdict(verdict), scored_at)
+            return
+
+        # Keep the heaviest terms and renormalize so stored vectors stay unit length
+        if len(indices) > self.doc_terms:
+            keep = np.argpartition(weights, -self.doc_terms)[-self.doc_terms:]
+            indices, weights = indices[keep], weights[keep]
+        weights = weights / np.sqrt(np.dot(weights, weights))
+
+        doc_id = self._next_id
+        self._next_id += 1
+        slot = doc_id % self.max_entries
+        if self._slot_ids[slot] != _EMPTY:
+            overwritten = int(self._hashes[slot])
+            if self._by_hash.get(overwritten) == self._slot_ids[slot]:
+                del self._by_hash[overwritten]
+        n = len(indices)
+        self._slot_ids[slot] = doc_id
+        self._terms[slot, :n] = indices
+        self._terms[slot, n:] = 0
+        self._weights[slot, :n] = weights
+        self._weights[slot, n:] = 0.0
+        self._hashes[slot] = text_hash
+        self._seen[slot] = 1
+        self._by_hash[text_hash] = doc_id
+        self._meta[slot] = (text[:self.preview_chars], _compact_verdict(verdict), scored_at)
+
+        postings = self._postings
+        for term, weight in zip(indices.tolist(), weights.tolist()):
+            ring = postings.get(term)
+            if ring is None:
+                ring = postings[term] = _Postings(self.max_postings)
+            ring.add(doc_id, weight, self.max_postings)
+        self.indexed += 1
+
+    # ── Search ─────────────────────────────────────────────
+    def search(self, text: str, k: int = 10, min_score: float = 0.0) -> List[dict]:
+        """Top-``k`` indexed messages by cosine similarity to ``text``."""
+        X = self._embed([text])
+        self.queries += 1
+        if X is None or X.nnz == 0:
+            return []
+        q_indices, q_weights = X.indices, X.data.astype(np.float32)
+
+        with self._lock:
+            if self._next_id == 0:
+                return []
+            candidates = self._candidates(q_indices, q_weights, k * _RERANK_FACTOR)
+            if len(candidates) == 0:
+                return []
+
+            # Exact rescoring of the stored (pruned) vectors against the full query
+            slots = candidates % self.max_entries
+            query = np.zeros(X.shape[1], dtype=np.float32)
+            query[q_indices] = q_weights
+            scores = (query[self._terms[slots]] * self._weights[slots]).sum(axis=1)
+
+            hits = []
+            for i in np.argsort(-scores, kind="stable")[:k]:
+                score = float(scores[i])
+                if score < min_score:
+                    break
+                slot = int(slots[i])
+                preview, verdict, scored_at = self._meta[slot]
+                hits.append({
+                    "score": round(min(score, 1.0), 4),
+                    "text": preview,
+                    **verdict,
+                    "scored_at": scored_at,
+                    "seen": int(self._seen[slot]),
+                })
+            return hits
+
+    def _candidates(self, q_indices: np.ndarray, q_weights: np.ndarray, limit: int) -> np.ndarray:
+        """Live doc ids with the highest partial dot products over the query's top terms."""
+        if len(q_indices) > self.query_terms:
+            keep = np.argpartition(q_weights, -self.query_terms)[-self.query_terms:]
+            q_indices, q_weights = q_indices[keep], q_weights[keep]
+
+        ids, partial = [], []
+        for term, weight in zip(q_indices.tolist(), q_weights.tolist()):
+            ring = self._postings.get(term)
+            if ring is not None:
+                ids.append(ring.ids[:ring.size])
+                partial.append(ring.weights[:ring.size] * weight)
+        if not ids:
+            return np.zeros(0, dtype=np.int64)
+        ids, partial = np.concatenate(ids), np.concatenate(partial)
+
+        # Postings may still point at overwritten slots
+        live = self._slot_ids[ids % self.max_entries] == ids
+        ids, partial = ids[live], partial[live]
+        unique, inverse = np.unique(ids, return_inverse=True)
+        totals = np.bincount(inverse, weights=partial)
+        if len(unique) > limit:
+            top = np.argpartition(totals, -limit)[-limit:]
+            unique = unique[top]
+        return unique
+
+    def stats(self) -> dict:
+        return {
+            "entries": self.size,
+            "max_entries": self.max_entries,
+            "terms": len(self._postings),
+            "max_postings": self.max_postings,
+            "pending": len(self._pending),
+            "indexed": self.indexed,
+            "dropped": self.dropped,
+            "queries": self.queries,
+            "fingerprint": self.fingerprint,
+        }
+
+
+def _text_hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _compact_verdict(verdict: dict) -> dict:
+    return {
+        "label": verdict.get("label"),
+        "risk_score": verdict.get("risk_score"),
+        "confidence": verdict.get("confidence"),
+        "model_version": verdict.get("model_version"),
+    }
@@ -0,0 +1,207 @@
+"""
+CyberSentinel AI – Streaming NDJSON Scoring
+=============================================
+Scores arbitrarily large NDJSON uploads (mailbox exports, login logs) and
+streams NDJSON verdicts back while the upload is still arriving.
+
+  parse  – the request body is split into lines incrementally; a line
+           longer than ``max_line_bytes`` is reported and skipped
+  score  – records are grouped into fixed-size chunks and every chunk is
+           one vectorized detector call
+  stream – one verdict line per input record, in input order, followed by
+           a summary line
+
+At most ``prefetch`` parsed chunks wait for scoring and the next body chunk
+is only read when there is room, so a slow client (or a slow model) stops
+the upload instead of growing memory: usage stays flat regardless of the
+input size. Clients therefore have to read the response while they upload;
+one that only reads after sending its whole body stalls once the unread
+verdicts fill the socket buffers, and the stream is aborted after
+``send_timeout`` seconds.
+"""
+
+import asyncio
+import contextlib
+import json
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+from .executor import InferenceQueueFull
+
+# Parses one decoded JSON value into a detector input, raising ValueError
+RecordParser = Callable[[Any], Any]
+ChunkScorer = Callable[[List[Any]], Awaitable[List[dict]]]
+
+_QUEUE_FULL_RETRY_S = 0.01
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """StreamingResponse that leaves ``receive`` to the request body.
+
+    Starlette's StreamingResponse listens for ``http.disconnect`` on the same
+    channel the request body arrives on, which would swallow upload chunks
+    while the response streams. A disconnect still ends the stream, because
+    reading the body raises ``ClientDisconnect``.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def __init__(self, content, send_timeout: Optional[float] = None, **kwargs):
+        super().__init__(content, **kwargs)
+        self.send_timeout = send_timeout
+
+    async def __call__(self, scope, receive, send) -> None:
+        async def send_with_timeout(message):
+            # A client that stopped reading would otherwise hold the stream forever
+            await asyncio.wait_for(send(message), self.send_timeout)
+
+        await self.stream_response(send_with_timeout if self.send_timeout else send)
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_lines(body: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """Yield ``(line_number, line)`` from a chunked body; ``line`` is None when too long."""
+    buffer = bytearray()
+    line_no = 0
+    skipping = False
+    async for chunk in body:
+        buffer += chunk
+        while True:
+            end = buffer.find(b"\n")
+            if end < 0:
+                break
+            if skipping:
+                skipping = False
+            else:
+                line_no += 1
+                yield line_no, bytes(buffer[:end]) if end <= max_line_bytes else None
+            del buffer[: end + 1]
+        if len(buffer) > max_line_bytes:
+            # Drop the rest of an oversized line instead of buffering it
+            if not skipping:
+                line_no += 1
+                yield line_no, None
+                skipping = True
+            buffer.clear()
+    if buffer and not skipping:
+        line_no += 1
+        yield line_no, bytes(buffer)
+
+
+class NDJSONScorer:
+    """Incremental parse → chunked score → stream pipeline for one upload."""
+
+    def __init__(
+        self,
+        parse: RecordParser,
+        score: ChunkScorer,
+        chunk_size: int = 256,
+        max_line_bytes: int = 1024 * 1024,
+        prefetch: int = 2,
+    ):
+        self.parse = parse
+        self.score = score
+        self.chunk_size = max(1, int(chunk_size))
+        self.max_line_bytes = max(1, int(max_line_bytes))
+        self.prefetch = max(1, int(prefetch))
+
+    # ── Parsing ────────────────────────────────────────────
+    def _parse_line(self, line_no: int, line: Optional[bytes]):
+        """Return ``(meta, record)`` or ``(error, None)`` for one input line."""
+        if line is None:
+            return {"line": line_no, "error": f"Line exceeds {self.max_line_bytes} bytes"}, None
+        try:
+            value = json.loads(line)
+            meta = {"line": line_no}
+            if isinstance(value, dict) and "id" in value:
+                meta["id"] = value["id"]
+            return meta, self.parse(value)
+        except ValueError as e:
+            return {"line": line_no, "error": str(e).splitlines()[0]}, None
+
+    async def _produce(self, body: AsyncIterator[bytes], queue: asyncio.Queue):
+        """Parse the body into chunks; blocks while ``prefetch`` chunks are waiting."""
+        chunk: List[Tuple[dict, Any]] = []
+        async for line_no, line in iter_lines(body, self.max_line_bytes):
+            if line is not None and not line.strip():
+                continue
+            chunk.append(self._parse_line(line_no, line))
+            if len(chunk) >= self.chunk_size:
+                await queue.put(chunk)
+                chunk = []
+        if chunk:
+            await queue.put(chunk)
+
+    # ── Scoring ────────────────────────────────────────────
+    async def _score_chunk(self, records: List[Any]) -> List[dict]:
+        while True:
+            try:
+                return await self.score(records)
+            except InferenceQueueFull:
+                # Wait for the pool instead of failing a stream already under way
+                await asyncio.sleep(_QUEUE_FULL_RETRY_S)
+
+    async def stream(self, body: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Yield NDJSON verdict lines for the NDJSON records in ``body``."""
+        start = time.perf_counter()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.prefetch)
+        done = object()
+        records = errors = chunks = 0
+
+        async def produce():
+            try:
+                await self._produce(body, queue)
+            except asyncio.CancelledError:
+                # The consumer is gone and the queue may be full: posting would block forever
+                raise
+            except BaseException:
+                await queue.put(done)
+                raise
+            await queue.put(done)
+
+        producer = asyncio.get_running_loop().create_task(produce())
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is done:
+                    break
+                valid = [record for meta, record in chunk if record is not None]
+                results = iter(await self._score_chunk(valid) if valid else [])
+                chunks += 1
+
+                lines = []
+                for meta, record in chunk:
+                    if record is None:
+                        errors += 1
+                        lines.append(meta)
+                        continue
+                    result = next(results)
+                    if "error" in result:
+                        errors += 1
+                    records += 1
+                    lines.append({**meta, **result})
+                yield "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8")
+
+            try:
+                await producer
+            except ClientDisconnect:
+                # Nobody is left to read the summary
+                return
+        finally:
+            if not producer.done():
+                producer.cancel()
+                # Reap it, so the request body and parsed chunks it holds are released
+                with contextlib.suppress(asyncio.CancelledError):
+                    await producer
+
+        summary = {
+            "records": records,
+            "errors": errors,
+            "chunks": chunks,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+        yield (json.dumps({"summary": summary}) + "\n").encode("utf-8")
@@ -0,0 +1,230 @@
+"""
+CyberSentinel AI – Per-Tenant Model Pool
+==========================================
+Serves customer organizations their own retrained models next to the
+default ones. Requests name their tenant with the ``X-Tenant`` header; each
+tenant is a model root of its own, in the registry layout:
+
+  models/tenants/<tenant>/<version>/manifest.json   – versioned, CURRENT honored
+  models/tenants/<tenant>/*.pkl                     – or flat legacy files
+
+Loaded tenants are kept in memory under a total budget (``ML_TENANT_MAX_MB``):
+
+  lazy         – a tenant is loaded, verified and warmed up (``ModelRegistry.load``)
+                 in a background thread on its first request
+  single-flight – concurrent requests for a tenant that is loading wait for
+                 that one load instead of starting their own
+  eviction     – each tenant weighs the size of the model files its detectors
+                 mapped or loaded (compiled artifacts, or the pickles when
+                 there are none); after a load the least recently used
+                 tenants are dropped until the total fits the budget.
+                 Requests already scoring on an evicted tenant finish on it;
+                 the memory is freed when they do
+  failures     – a failed load is remembered for ``retry_after`` seconds
+                 (``ML_TENANT_RETRY_SECONDS``); requests in that window get
+                 the same error instead of reloading the broken models
+
+Hits, misses, coalesced waits, evictions and load latency are kept per tenant
+and exposed on ``/health``, ``/metrics`` and ``GET /admin/tenants``.
+"""
+
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from .metrics import Histogram
+from .registry import ModelBundle, ModelRegistry, ModelRegistryError
+
+# Tenant ids double as directory names
+_TENANT_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+# Model loads take seconds, not microseconds
+LOAD_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class TenantNotFound(ModelRegistryError):
+    """Raised for tenant ids without a model directory."""
+
+
+def _model_bytes(bundle: ModelBundle) -> int:
+    """Size of the model files the bundle's detectors mapped or loaded."""
+    paths = {path for detector in bundle.detectors.values() for path in detector.files}
+    return sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+
+class _TenantStats:
+    __slots__ = (
+        "hits", "misses", "coalesced", "loads", "failures", "failures_cached", "evictions", "load_times", "last_error",
+    )
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.loads = 0
+        self.failures = 0
+        self.failures_cached = 0
+        self.evictions = 0
+        self.load_times = Histogram(LOAD_BUCKETS)
+        self.last_error: Optional[str] = None
+
+
+class TenantModelPool:
+    """Lazily loaded per-tenant model bundles, LRU-evicted under a byte budget."""
+
+    def __init__(
+        self,
+        root: str,
+        max_bytes: int,
+        prepare: Optional[Callable[[ModelBundle], None]] = None,
+        retry_after: float = 30.0,
+    ):
+        self.root = root
+        self.max_bytes = max(0, int(max_bytes))
+        self.retry_after = max(0.0, float(retry_after))
+        # Called after warm-up, before the tenant takes traffic (process-pool preload)
+        self.prepare = prepare
+        # tenant -> (bundle, bytes), least recently used first
+        self._loaded: "OrderedDict[str, tuple]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Task] = {}
+        # tenant -> (retry at, error) of its last failed load
+        self._failed: Dict[str, Tuple[float, str]] = {}
+        self.tenants: Dict[str, _TenantStats] = {}
+
+    @property
+    def loaded_bytes(self) -> int:
+        return sum(size for _, size in self._loaded.values())
+
+    def _tenant_dir(self, tenant: str) -> str:
+        if not _TENANT_ID.match(tenant):
+            raise TenantNotFound(f"Invalid tenant '{tenant}'")
+        path = os.path.join(self.root, tenant)
+        if not os.path.isdir(path):
+            raise TenantNotFound(f"Unknown tenant '{tenant}'")
+        return path
+
+    # ── Lookup ─────────────────────────────────────────────
+    async def get(self, tenant: str) -> ModelBundle:
+        """The tenant's bundle, loading it on a miss (one load per tenant at a time)."""
+        entry = self._loaded.get(tenant)
+        if entry is not None:
+            self._loaded.move_to_end(tenant)
+            self.tenants[tenant].hits += 1
+            return entry[0]
+
+        loading = self._loading.get(tenant)
+        if loading is not None:
+            self.tenants[tenant].coalesced += 1
+            # Shielded: a waiter giving up must not cancel the load for the others
+            return await asyncio.shield(loading)
+
+        failed = self._failed.get(tenant)
+        if failed is not None:
+            if time.monotonic() < failed[0]:
+                self.tenants[tenant].failures_cached += 1
+                raise ModelRegistryError(failed[1])
+            del self._failed[tenant]
+
+        path = self._tenant_dir(tenant)
+        stats = self.tenants.setdefault(tenant, _TenantStats())
+        stats.misses += 1
+        # The load runs as its own task, so the first caller giving up does not abort it
+        loading = asyncio.get_running_loop().create_task(self._load(tenant, path, stats))
+        self._loading[tenant] = loading
+        loading.add_done_callback(lambda task: self._load_done(tenant, task))
+        return await asyncio.shield(loading)
+
+    def _load_done(self, tenant: str, task: asyncio.Task):
+        del self._loading[tenant]
+        # Retrieved here so a failed load nobody waited for is not logged as unhandled
+        if not task.cancelled():
+            task.exception()
+
+    async def _load(self, tenant: str, path: str, stats: _TenantStats) -> ModelBundle:
+        registry = ModelRegistry(path, prepare=self.prepare)
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter_ns()
+        try:
+            bundle = await loop.run_in_executor(None, registry.load, registry.desired_version())
+        except Exception as e:
+            stats.failures += 1
+            stats.last_error = str(e)
+            if self.retry_after:
+                self._failed[tenant] = (time.monotonic() + self.retry_after, str(e))
+            print(f"[!] Warning: Could not load models of tenant '{tenant}': {e}")
+            if isinstance(e, ModelRegistryError):
+                raise
+            # Unpickling errors come in any type; callers handle registry errors
+            raise ModelRegistryError(str(e)) from e
+        stats.loads += 1
+        stats.load_times.observe(time.perf_counter_ns() - start)
+        bundle.tenant = tenant
+        bundle.activated_at = time.time()
+
+        size = _model_bytes(bundle)
+        self._loaded[tenant] = (bundle, size)
+        self._evict(keep=tenant)
+        print(f"[+] Tenant '{tenant}' models '{bundle.version}' loaded in {bundle.load_ms} ms "
+              f"({size / 2**20:.1f} MB, {len(self._loaded)} tenants in memory)")
+        return bundle
+
+    def _evict(self, keep: str):
+        """Drop least recently used tenants until the loaded ones fit the budget."""
+        if not self.max_bytes:
+            return
+        total = self.loaded_bytes
+        for tenant in list(self._loaded):
+            if total <= self.max_bytes:
+                break
+            if tenant == keep:
+                continue
+            _, size = self._loaded.pop(tenant)
+            total -= size
+            self.tenants[tenant].evictions += 1
+        if total > self.max_bytes:
+            print(f"[!] Warning: Tenant '{keep}' models alone exceed the "
+                  f"{self.max_bytes / 2**20:.0f} MB tenant budget")
+
+    def unload(self, tenant: str) -> bool:
+        """Drop a tenant from memory, or forget a failed load; the next request loads the models again."""
+        failed = self._failed.pop(tenant, None) is not None
+        return self._loaded.pop(tenant, None) is not None or failed
+
+    # ── Stats ──────────────────────────────────────────────
+    def stats(self) -> dict:
+        tenants = {}
+        for tenant, stats in sorted(self.tenants.items()):
+            entry = self._loaded.get(tenant)
+            failed = self._failed.get(tenant)
+            lookups = stats.hits + stats.misses + stats.coalesced
+            times = stats.load_times
+            tenants[tenant] = {
+                "loaded": entry is not None,
+                "version": entry[0].version if entry else None,
+                "bytes": entry[1] if entry else None,
+                "hits": stats.hits,
+                "misses": stats.misses,
+                "coalesced": stats.coalesced,
+                "hit_rate": round(stats.hits / lookups, 4) if lookups else None,
+                "loads": stats.loads,
+                "failures": stats.failures,
+                "failures_cached": stats.failures_cached,
+                "evictions": stats.evictions,
+                "load_ms": {
+                    "count": times.count,
+                    "avg": round(times.sum_ns / times.count / 1e6, 2) if times.count else 0.0,
+                },
+                "last_error": stats.last_error,
+                "retry_in_s": round(max(0.0, failed[0] - time.monotonic()), 1) if failed else None,
+            }
+        return {
+            "root": self.root,
+            "max_mb": round(self.max_bytes / 2**20, 2),
+            "loaded_mb": round(self.loaded_bytes / 2**20, 2),
+            "loaded": list(self._loaded),
+            "loading": list(self._loading),
+            "tenants": tenants,
+        }
@@ -0,0 +1,333 @@
+"""
+CyberSentinel AI – Out-of-Core Training
+=========================================
+Streaming training pipeline behind ``train.py --stream`` for corpora that do
+not fit in memory.
+
+Phishing (CSV or NDJSON with text + label):
+  vocabulary  – the TF-IDF vocabulary is fitted on a reservoir sample
+  featurize   – chunks are counted against that vocabulary in a process
+                pool; count matrices are cached on disk and document
+                frequencies summed, so the idf is exact for the full corpus
+  fit         – the forest is fitted with ``n_jobs`` on a random train subset
+                of at most ``max_train_rows`` rows, then evaluated on a
+                held-out split
+
+Login anomaly (CSV with the feature columns, or raw user/ip/device/success/
+timestamp events, which are replayed through ``LoginFeatureStore`` so the
+model sees the same features the service derives):
+  sample      – a uniform bottom-k sample of ``sample_rows`` rows is drawn
+                and cached; Isolation Forest only looks at 256 rows per tree
+  fit         – the forest is fitted with ``n_jobs`` on the sample
+
+Every stage reports wall time and peak RSS. Cached vocabularies, count
+matrices and samples are keyed by the input file (path, size, mtime) and
+the parameters, so re-running on unchanged data skips re-vectorizing.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import clone
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
+
+from .cli import read_csv, read_ndjson
+from .feature_store import LoginFeatureStore
+from .runtime import peak_memory_mb, reset_peak_memory
+
+_PHISHING_LABELS = {"1": 1, "phishing": 1, "spam": 1, "true": 1, "0": 0, "legitimate": 0, "ham": 0, "false": 0}
+_RAW_EVENT_COLUMNS = ("user", "ip")
+
+
+# ── Stage Reporting ────────────────────────────────────────
+class StageReport:
+    """Wall time and peak RSS per pipeline stage."""
+
+    def __init__(self):
+        self.stages: List[dict] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        exact = reset_peak_memory()
+        start = time.perf_counter()
+        info = {"stage": name}
+        yield info
+        info["seconds"] = round(time.perf_counter() - start, 2)
+        # Without a reset the figure is the process-wide peak so far
+        info["peak_rss_mb"] = peak_memory_mb()
+        info["peak_exact"] = exact
+        self.stages.append(info)
+        extra = f", workers peak {info['worker_peak_rss_mb']} MB" if "worker_peak_rss_mb" in info else ""
+        cached = " (cached)" if info.get("cached") else ""
+        print(f"[+] {name}{cached}: {info['seconds']}s, peak RSS {info['peak_rss_mb']} MB{extra}")
+
+    def print_summary(self):
+        print("\n[+] Stage summary")
+        print(f"    {'stage':<28}{'wall (s)':>10}{'peak RSS (MB)':>16}")
+        for info in self.stages:
+            print(f"    {info['stage']:<28}{info['seconds']:>10}{info['peak_rss_mb']:>16}")
+
+
+# ── Cache Keys ─────────────────────────────────────────────
+def _cache_key(path: str, **params) -> str:
+    stat = os.stat(path)
+    identity = {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, **params}
+    return hashlib.sha256(json.dumps(identity, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _input_format(path: str) -> str:
+    return "ndjson" if path.lower().endswith((".ndjson", ".jsonl")) else "csv"
+
+
+# ── Phishing: Reading ──────────────────────────────────────
+def _label(value) -> int:
+    label = _PHISHING_LABELS.get(str(value).strip().lower())
+    if label is None:
+        raise ValueError(f"Unrecognized phishing label {value!r}")
+    return label
+
+
+def iter_labeled_texts(path: str, chunk_size: int, text_column: str = "text",
+                       label_column: str = "label") -> Iterator[Tuple[List[str], np.ndarray]]:
+    """Yield ``(texts, labels)`` chunks from a CSV or NDJSON training file."""
+    if _input_format(path) == "csv":
+        for frame in read_csv(path, chunk_size, [text_column, label_column]):
+            yield frame[text_column].astype(str).tolist(), np.array([_label(v) for v in frame[label_column]], dtype=np.int8)
+    else:
+        for lines in read_ndjson(path, chunk_size):
+            records = [json.loads(line) for line in lines]
+            yield ([str(r[text_column]) for r in records],
+                   np.array([_label(r[label_column]) for r in records], dtype=np.int8))
+
+
+def _reservoir_sample(path: str, chunk_size: int, size: int, seed: int, **columns):
+    """Uniform sample of ``size`` texts (Algorithm R) and the corpus size."""
+    rng = np.random.default_rng(seed)
+    sample: List[str] = []
+    labels: List[int] = []
+    seen = 0
+    for texts, chunk_labels in iter_labeled_texts(path, chunk_size, **columns):
+        for text, label in zip(texts, chunk_labels):
+            seen += 1
+            if len(sample) < size:
+                sample.append(text)
+                labels.append(int(label))
+            else:
+                slot = rng.integers(0, seen)
+                if slot < size:
+                    sample[slot], labels[slot] = text, int(label)
+    return sample, np.array(labels, dtype=np.int8), seen
+
+
+# ── Phishing: Featurizing ──────────────────────────────────
+_worker_counter: Optional[CountVectorizer] = None
+
+
+def _init_count_worker(counter: CountVectorizer):
+    global _worker_counter
+    _worker_counter = counter
+
+
+def _count_chunk(texts: List[str], labels: np.ndarray, target: str) -> Tuple[np.ndarray, int, float]:
+    """Worker task: count one chunk into ``target`` (.npz) and return its document frequencies."""
+    counts = _worker_counter.transform(texts).tocsr()
+    counts.sum_duplicates()
+    sp.save_npz(target, counts, compressed=False)
+    np.save(target.replace(".npz", ".labels.npy"), labels)
+    df = np.bincount(counts.indices, minlength=counts.shape[1])
+    return df, counts.shape[0], peak_memory_mb()
+
+
+def _count_vectorizer(vectorizer) -> CountVectorizer:
+    params = {k: v for k, v in vectorizer.get_params().items() if k in CountVectorizer().get_params()}
+    params.update(vocabulary=vectorizer.vocabulary_, max_df=1.0, min_df=1, max_features=None)
+    return CountVectorizer(**params)
+
+
+def _set_idf(vectorizer, df: np.ndarray, n_docs: int):
+    # TfidfTransformer's formula: smooth_idf adds one document containing every term
+    smooth = int(vectorizer.smooth_idf)
+    vectorizer.idf_ = np.log((n_docs + smooth) / (df + smooth)) + 1.0
+
+
+def _tfidf_transformer(vectorizer) -> TfidfTransformer:
+    transformer = TfidfTransformer(
+        norm=vectorizer.norm, use_idf=vectorizer.use_idf,
+        smooth_idf=vectorizer.smooth_idf, sublinear_tf=vectorizer.sublinear_tf,
+    )
+    transformer.idf_ = vectorizer.idf_
+    return transformer
+
+
+def featurize_corpus(path: str, vectorizer, cache_dir: str, chunk_size: int, workers: int,
+                     vocab_sample: int, seed: int, report: StageReport, **columns) -> Tuple[object, str, dict]:
+    """Fit the vocabulary and count the corpus into cached chunks.
+
+    Returns the fitted vectorizer (idf over the full corpus), the chunk
+    directory and its metadata.
+    """
+    key = _cache_key(path, vectorizer=vectorizer.get_params(), chunk_size=chunk_size,
+                     vocab_sample=vocab_sample, seed=seed, **columns)
+    chunk_dir = os.path.join(cache_dir, f"phishing-{key}")
+    meta_path = os.path.join(chunk_dir, "meta.json")
+    vectorizer_path = os.path.join(chunk_dir, "vectorizer.pkl")
+
+    if os.path.exists(meta_path):
+        with report.stage("phishing: vocabulary") as info:
+            info["cached"] = True
+            vectorizer = joblib.load(vectorizer_path)
+        with report.stage("phishing: featurize") as info:
+            info["cached"] = True
+            with open(meta_path) as f:
+                meta = json.load(f)
+        return vectorizer, chunk_dir, meta
+
+    # A previous run may have stopped half-way
+    shutil.rmtree(chunk_dir, ignore_errors=True)
+    os.makedirs(chunk_dir)
+
+    with report.stage("phishing: vocabulary") as info:
+        sample, _, n_seen = _reservoir_sample(path, chunk_size, vocab_sample, seed, **columns)
+        vectorizer = clone(vectorizer).fit(sample)
+        info["rows_sampled"] = len(sample)
+        del sample
+        print(f"    vocabulary of {len(vectorizer.vocabulary_)} terms from {min(vocab_sample, n_seen)}/{n_seen} texts")
+
+    with report.stage("phishing: featurize") as info:
+        counter = _count_vectorizer(vectorizer)
+        df = np.zeros(len(vectorizer.vocabulary_), dtype=np.int64)
+        n_docs = n_chunks = 0
+        worker_peak = 0.0
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_count_worker,
+            initargs=(counter,),
+        )
+        pending = deque()
+
+        def collect():
+            nonlocal df, n_docs, worker_peak
+            chunk_df, rows, peak = pending.popleft().result()
+            df += chunk_df
+            n_docs += rows
+            worker_peak = max(worker_peak, peak)
+
+        try:
+            for texts, labels in iter_labeled_texts(path, chunk_size, **columns):
+                target = os.path.join(chunk_dir, f"chunk-{n_chunks:05d}.npz")
+                pending.append(pool.submit(_count_chunk, texts, labels, target))
+                n_chunks += 1
+                while len(pending) >= workers * 2:
+                    collect()
+            while pending:
+                collect()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        _set_idf(vectorizer, df, n_docs)
+        joblib.dump(vectorizer, vectorizer_path)
+        meta = {"chunks": n_chunks, "documents": n_docs}
+        # Written last: its presence marks the cache complete
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
+        info["worker_peak_rss_mb"] = worker_peak
+        print(f"    {n_docs} documents in {n_chunks} chunks counted with {workers} workers")
+    return vectorizer, chunk_dir, meta
+
+
+def load_split(vectorizer, chunk_dir: str, meta: dict, max_train_rows: int, test_size: float,
+               seed: int, max_test_rows: int = 200_000):
+    """TF-IDF train/test matrices from the cached counts, subsampled to budget."""
+    transformer = _tfidf_transformer(vectorizer)
+    keep_train = min(1.0, max_train_rows / max(1, meta["documents"] * (1 - test_size)))
+    keep_test = min(1.0, max_test_rows / max(1, meta["documents"] * test_size))
+    rng = np.random.default_rng(seed)
+    parts = {"train": ([], []), "test": ([], [])}
+    for i in range(meta["chunks"]):
+        target = os.path.join(chunk_dir, f"chunk-{i:05d}.npz")
+        counts = sp.load_npz(target)
+        labels = np.load(target.replace(".npz", ".labels.npy"))
+        draw = rng.random(counts.shape[0])
+        is_test = rng.random(counts.shape[0]) < test_size
+        for name, mask in (("train", ~is_test & (draw < keep_train)), ("test", is_test & (draw < keep_test))):
+            rows = np.flatnonzero(mask)
+            if len(rows):
+                parts[name][0].append(transformer.transform(counts[rows]))
+                parts[name][1].append(labels[rows])
+
+    def stack(name):
+        matrices, labels = parts[name]
+        if not matrices:
+            return sp.csr_matrix((0, len(vectorizer.vocabulary_))), np.array([], dtype=np.int8)
+        return sp.vstack(matrices).tocsr(), np.concatenate(labels)
+
+    return stack("train") + stack("test")
+
+
+# ── Login Anomaly ──────────────────────────────────────────
+def _login_features(frame: pd.DataFrame, features: List[str], store: Optional[LoginFeatureStore]) -> np.ndarray:
+    if store is None:
+        return frame.reindex(columns=features, fill_value=0).to_numpy(dtype=np.float64)
+
+    # Raw events: replay them in file order through the serving feature store
+    n = len(frame)
+    devices = frame["device"].astype(str) if "device" in frame else [""] * n
+    success = frame["success"].map(lambda v: str(v).strip().lower() in ("1", "true", "yes")) if "success" in frame else [True] * n
+    if "timestamp" in frame:
+        timestamps = pd.to_datetime(frame["timestamp"], utc=True).astype("int64") / 1e9
+    else:
+        timestamps = [None] * n
+    durations = frame["session_duration"] if "session_duration" in frame else [None] * n
+    rows = [
+        store.observe(str(user), str(ip), device, bool(ok), ts, None if duration is None or pd.isna(duration) else float(duration))
+        for user, ip, device, ok, ts, duration in zip(frame["user"], frame["ip"], devices, success, timestamps, durations)
+    ]
+    return np.array([[row[f] for f in features] for row in rows], dtype=np.float64)
+
+
+def sample_logins(path: str, features: List[str], cache_dir: str, chunk_size: int, sample_rows: int,
+                  seed: int, report: StageReport, store_params: Optional[dict] = None) -> np.ndarray:
+    """Uniform sample of login feature rows (bottom-k on random keys), cached."""
+    key = _cache_key(path, features=features, sample_rows=sample_rows, seed=seed, store=store_params)
+    target = os.path.join(cache_dir, f"logins-{key}.npy")
+    with report.stage("anomaly: sample") as info:
+        if os.path.exists(target):
+            info["cached"] = True
+            return np.load(target)
+
+        columns = pd.read_csv(path, nrows=0).columns
+        raw = all(c in columns for c in _RAW_EVENT_COLUMNS) and not all(f in columns for f in features)
+        store = LoginFeatureStore(**(store_params or {})) if raw else None
+        rng = np.random.default_rng(seed)
+        sample = np.empty((0, len(features)))
+        sample_keys = np.empty(0)
+        n_rows = 0
+        for frame in read_csv(path, chunk_size):
+            X = _login_features(frame, features, store)
+            keys = rng.random(len(X))
+            sample = np.vstack([sample, X])
+            sample_keys = np.concatenate([sample_keys, keys])
+            if len(sample) > sample_rows:
+                keep = np.argpartition(sample_keys, sample_rows)[:sample_rows]
+                sample, sample_keys = sample[keep], sample_keys[keep]
+            n_rows += len(X)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        np.save(target + ".tmp.npy", sample)
+        os.replace(target + ".tmp.npy", target)
+        info["rows"] = n_rows
+        print(f"    {len(sample)}/{n_rows} login rows sampled ({'raw events replayed' if raw else 'feature columns'})")
+        return sample
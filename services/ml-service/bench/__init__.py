@@ -0,0 +1,18 @@
+"""
+CyberSentinel AI – Benchmark Suite
+====================================
+Reproducible latency/throughput measurements for the ML service.
+
+  model – PhishingDetector / AnomalyDetector called directly, across text
+          lengths and batch sizes (see bench/model_bench.py)
+  api   – the FastAPI app driven in-process over httpx's ASGI transport by
+          concurrent clients (see bench/api_bench.py)
+
+Inputs are deterministic synthetic corpora (bench/corpus.py), so two runs
+on the same machine measure the same work. Results are saved as JSON and a
+run can be compared against a saved baseline:
+
+  python -m bench run -o bench/baselines/main.json
+  python -m bench run --compare bench/baselines/main.json
+  python -m bench compare bench/baselines/main.json results.json --threshold 0.1
+"""
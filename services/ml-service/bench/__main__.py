@@ -0,0 +1,129 @@
+"""
+CyberSentinel AI – Benchmark CLI
+==================================
+  python -m bench run [--layer model|api|all] [-o results.json] [--compare baseline.json]
+  python -m bench compare baseline.json results.json [--threshold 0.1]
+
+Both commands exit with status 1 when a compared metric regressed past the
+threshold, so they can gate CI on a machine with a stable baseline.
+
+Unless set explicitly, the API layer runs with the verdict cache and the
+model-directory watcher off (ML_CACHE_ENABLED=0, ML_MODEL_WATCH_INTERVAL=0)
+so every request reaches the model.
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+from typing import List, Optional
+
+from . import results
+
+# Mirrors api_bench.CONCURRENCY; --help should not have to import the app
+CONCURRENCY_DEFAULT = (1, 16)
+
+
+def _load_bundle(version: Optional[str]):
+    from app.models import MODELS_DIR
+    from app.registry import ModelRegistry
+
+    registry = ModelRegistry(MODELS_DIR)
+    with contextlib.redirect_stdout(sys.stderr):
+        return registry.load(version or registry.desired_version())
+
+
+def _repeat(rounds: int, bench) -> dict:
+    if rounds <= 1:
+        return bench()
+    results_by_round = []
+    for i in range(rounds):
+        print(f"[*] Round {i + 1}/{rounds}")
+        results_by_round.append(bench())
+    return results.median_of_rounds(results_by_round)
+
+
+def _run(args) -> int:
+    run = {"environment": results.environment(), "parameters": vars(args).copy(), "results": {}}
+    run["parameters"].pop("func", None)
+
+    if args.layer in ("model", "all"):
+        from . import model_bench
+
+        print("[*] Model layer")
+        bundle = _load_bundle(args.model_version)
+        run["environment"]["model_version"] = bundle.version
+        run["results"].update(_repeat(args.repeat, lambda: model_bench.run(
+            bundle.phishing, bundle.anomaly, duration=args.duration, seed=args.seed,
+        )))
+
+    if args.layer in ("api", "all"):
+        os.environ.setdefault("ML_CACHE_ENABLED", "0")
+        os.environ.setdefault("ML_MODEL_WATCH_INTERVAL", "0")
+        from . import api_bench
+        from app.main import app, registry
+
+        print("[*] API layer")
+        run["results"].update(_repeat(args.repeat, lambda: api_bench.run(
+            app, duration=args.duration * 2, seed=args.seed, concurrency=args.concurrency,
+        )))
+        run["environment"]["ml_env"] = results.environment()["ml_env"]
+        if registry.active is not None:
+            run["environment"]["model_version"] = registry.active.version
+
+    if args.output:
+        results.save(args.output, run)
+        print(f"[+] Results saved to {args.output}")
+
+    if args.compare:
+        baseline = results.load(args.compare)
+        rows = results.compare(baseline, run, args.threshold, args.metrics)
+        results.print_comparison(rows, baseline, run, args.threshold)
+        return 1 if any(row["regressed"] for row in rows) else 0
+    return 0
+
+
+def _compare(args) -> int:
+    baseline, current = results.load(args.baseline), results.load(args.current)
+    rows = results.compare(baseline, current, args.threshold, args.metrics)
+    results.print_comparison(rows, baseline, current, args.threshold)
+    return 1 if any(row["regressed"] for row in rows) else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench", description="ML service benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_check_options(command):
+        command.add_argument("--threshold", type=float, default=results.DEFAULT_THRESHOLD,
+                             help="relative change that counts as a regression (default: 0.1)")
+        command.add_argument("--metrics", nargs="+", default=list(results.DEFAULT_METRICS),
+                             help="metrics to compare (default: %(default)s)")
+
+    run = commands.add_parser("run", help="run the benchmarks")
+    run.add_argument("--layer", choices=("model", "api", "all"), default="all")
+    run.add_argument("-o", "--output", help="write results as JSON (e.g. a new baseline)")
+    run.add_argument("--compare", metavar="BASELINE", help="compare against a saved baseline")
+    run.add_argument("--duration", type=float, default=1.0,
+                     help="seconds per model case (API cases run twice as long)")
+    run.add_argument("--concurrency", type=int, nargs="+", default=list(CONCURRENCY_DEFAULT),
+                     help="concurrent API clients per case (default: %(default)s)")
+    run.add_argument("--repeat", type=int, default=3,
+                     help="rounds per layer; each metric is the median over rounds (default: 3)")
+    run.add_argument("--seed", type=int, default=42, help="corpus seed")
+    run.add_argument("--model-version", help="registry version to benchmark (model layer)")
+    add_check_options(run)
+    run.set_defaults(func=_run)
+
+    compare = commands.add_parser("compare", help="compare two saved runs")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    add_check_options(compare)
+    compare.set_defaults(func=_compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+CyberSentinel AI – API-Layer Benchmark
+========================================
+Drives the FastAPI app in-process through httpx's ASGI transport: the app's
+startup hooks run as under uvicorn, then ``concurrency`` client coroutines
+send pre-serialized requests back to back for ``duration`` seconds.
+
+Latency is measured per request on the client side, so it covers routing,
+validation, micro-batching, inference and serialization – but not sockets
+or the HTTP parser. Clients and the app share one event loop, which is the
+same for every run and keeps results comparable between commits.
+"""
+
+import asyncio
+import gc
+import json
+import time
+from typing import Dict, Iterable, List, Tuple
+
+import httpx
+
+from app.runtime import peak_memory_mb, process_memory, reset_peak_memory
+
+from .corpus import login_records, phishing_texts
+from .results import format_metrics, summarize
+
+CONCURRENCY = (1, 16)
+TEXT_WORDS = 50
+PHISHING_BATCH = 32
+ANOMALY_BATCH = 256
+
+# Distinct request bodies per scenario before they repeat
+_PAYLOADS = 512
+_HEADERS = {"content-type": "application/json"}
+
+
+def _scenarios(seed: int) -> List[Tuple[str, str, List[bytes], int]]:
+    """``(name, path, bodies, records_per_request)`` for every endpoint benchmarked."""
+    texts = phishing_texts(_PAYLOADS * PHISHING_BATCH, TEXT_WORDS, seed)
+    records = login_records(_PAYLOADS * ANOMALY_BATCH, seed)
+
+    def bodies(items: list, size: int, key: str = None) -> List[bytes]:
+        chunks = [items[i:i + size] for i in range(0, _PAYLOADS * size, size)]
+        return [json.dumps({key: chunk} if key else chunk[0]).encode() for chunk in chunks]
+
+    return [
+        (f"predict.words={TEXT_WORDS}", "/predict",
+         [json.dumps({"text": text}).encode() for text in texts[:_PAYLOADS]], 1),
+        (f"predict_batch.words={TEXT_WORDS}.batch={PHISHING_BATCH}", "/predict/batch",
+         bodies(texts, PHISHING_BATCH, "texts"), PHISHING_BATCH),
+        ("anomaly", "/anomaly", bodies(records, 1), 1),
+        (f"anomaly_batch.batch={ANOMALY_BATCH}", "/anomaly/batch",
+         bodies(records, ANOMALY_BATCH, "records"), ANOMALY_BATCH),
+    ]
+
+
+async def _drive(client: httpx.AsyncClient, path: str, payloads: List[bytes], concurrency: int,
+                 duration: float, min_requests: int) -> Tuple[List[int], int, int, float]:
+    """Run ``concurrency`` clients; returns latencies (ns), requests, errors and elapsed seconds."""
+    latencies: List[int] = []
+    errors = 0
+    sent = 0
+    start = time.perf_counter()
+    deadline = start + duration
+
+    async def worker():
+        nonlocal sent, errors
+        while sent < min_requests or time.perf_counter() < deadline:
+            body = payloads[sent % len(payloads)]
+            sent += 1
+            began = time.perf_counter_ns()
+            response = await client.post(path, content=body, headers=_HEADERS)
+            latencies.append(time.perf_counter_ns() - began)
+            if response.status_code != 200:
+                errors += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, len(latencies), errors, time.perf_counter() - start
+
+
+async def run_async(
+    app,
+    duration: float = 2.0,
+    min_requests: int = 50,
+    warmup: int = 20,
+    seed: int = 42,
+    concurrency: Iterable[int] = CONCURRENCY,
+) -> Dict[str, dict]:
+    """Benchmark the app's scoring endpoints; returns ``{case: metrics}``."""
+    results = {}
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, path, payloads, per_request in _scenarios(seed):
+                for clients in concurrency:
+                    await _drive(client, path, payloads, clients, 0.0, warmup)
+                    gc.collect()
+                    reset_peak_memory()
+                    latencies, requests, errors, elapsed = await _drive(
+                        client, path, payloads, clients, duration, min_requests
+                    )
+                    case = f"api.{name}.concurrency={clients}"
+                    metrics = summarize(latencies, elapsed, requests * per_request, requests)
+                    metrics["errors"] = errors
+                    metrics["rss_mb"] = process_memory()["rss_mb"]
+                    metrics["peak_rss_mb"] = peak_memory_mb()
+                    results[case] = metrics
+                    print(f"[{'!' if errors else '+'}] {case}: {format_metrics(metrics)}"
+                          + (f", {errors} errors" if errors else ""))
+    finally:
+        await app.router.shutdown()
+    return results
+
+
+def run(app, **kwargs) -> Dict[str, dict]:
+    return asyncio.run(run_async(app, **kwargs))
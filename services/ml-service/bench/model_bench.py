@@ -0,0 +1,86 @@
+"""
+CyberSentinel AI – Model-Layer Benchmark
+==========================================
+Times ``PhishingDetector.predict_batch`` across text lengths and batch
+sizes, and ``AnomalyDetector.predict_batch`` across batch sizes (batch 1
+is ``predict``). Each case cycles through a fixed pre-built corpus, so no
+input is generated inside the timed loop.
+"""
+
+import gc
+import time
+from typing import Dict, Iterable
+
+from app.runtime import peak_memory_mb, process_memory, reset_peak_memory
+
+from .corpus import login_records, phishing_texts
+from .results import format_metrics, summarize, timed
+
+PHISHING_WORDS = (10, 100, 1000)
+PHISHING_BATCHES = (1, 16, 256)
+ANOMALY_BATCHES = (1, 16, 256, 4096)
+
+# Distinct inputs per case before the corpus repeats
+_CORPUS_SIZE = 1024
+
+
+def _measure(call, batches: list, duration: float, min_calls: int, warmup: int) -> dict:
+    """Call ``call(batch)`` round-robin over ``batches`` for ``duration`` seconds."""
+    for i in range(warmup):
+        call(batches[i % len(batches)])
+
+    reset_peak_memory()
+    latencies = []
+    records = 0
+    gc.collect()
+    start = time.perf_counter()
+    deadline = start + duration
+    while len(latencies) < min_calls or time.perf_counter() < deadline:
+        batch = batches[len(latencies) % len(batches)]
+        latencies.append(timed(call, batch))
+        records += len(batch)
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(latencies, elapsed, records)
+    summary["rss_mb"] = process_memory()["rss_mb"]
+    summary["peak_rss_mb"] = peak_memory_mb()
+    return summary
+
+
+def _chunks(items: list, size: int) -> list:
+    return [items[i:i + size] for i in range(0, len(items) - size + 1, size)]
+
+
+def run(
+    phishing,
+    anomaly,
+    duration: float = 1.0,
+    min_calls: int = 20,
+    warmup: int = 5,
+    seed: int = 42,
+    phishing_words: Iterable[int] = PHISHING_WORDS,
+    phishing_batches: Iterable[int] = PHISHING_BATCHES,
+    anomaly_batches: Iterable[int] = ANOMALY_BATCHES,
+) -> Dict[str, dict]:
+    """Benchmark both detectors; returns ``{case: metrics}``."""
+    results = {}
+    if phishing is not None and phishing.ready:
+        for words in phishing_words:
+            corpus = phishing_texts(max(_CORPUS_SIZE, max(phishing_batches)), words, seed)
+            for batch in phishing_batches:
+                case = f"model.phishing.words={words}.batch={batch}"
+                results[case] = _measure(phishing.predict_batch, _chunks(corpus, batch), duration, min_calls, warmup)
+                print(f"[+] {case}: {format_metrics(results[case])}")
+    else:
+        print("[!] Warning: Phishing model not loaded; skipping phishing cases")
+
+    if anomaly is not None and anomaly.ready:
+        corpus = login_records(max(_CORPUS_SIZE, max(anomaly_batches)), seed)
+        for batch in anomaly_batches:
+            case = f"model.anomaly.batch={batch}"
+            results[case] = _measure(anomaly.predict_batch, _chunks(corpus, batch), duration, min_calls, warmup)
+            print(f"[+] {case}: {format_metrics(results[case])}")
+    else:
+        print("[!] Warning: Anomaly model not loaded; skipping anomaly cases")
+    return results
+
@@ -0,0 +1,167 @@
+"""
+CyberSentinel AI – Benchmark Results
+======================================
+Latency summaries, JSON baselines and the regression check.
+
+A result file maps case names (``model.phishing.words=100.batch=16``) to
+metric dicts. ``compare`` flags a metric as regressed when it moved in the
+wrong direction by more than ``threshold`` (relative) – latency and memory
+going up, throughput going down.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Metrics where a larger value is a regression; throughput is the opposite
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "mean_ms", "rss_mb", "peak_rss_mb")
+HIGHER_IS_BETTER = ("records_per_s", "requests_per_s")
+DEFAULT_METRICS = ("p50_ms", "p95_ms", "records_per_s", "requests_per_s")
+DEFAULT_THRESHOLD = 0.10
+
+
+def summarize(latencies_ns: Iterable[int], elapsed_s: float, records: int, requests: int = None) -> dict:
+    """Percentiles (ms) of per-call latencies plus throughput over ``elapsed_s``."""
+    samples = np.fromiter(latencies_ns, dtype=np.int64) / 1e6
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99]) if len(samples) else (0.0, 0.0, 0.0)
+    summary = {
+        "calls": int(len(samples)),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "mean_ms": round(float(samples.mean()), 4) if len(samples) else 0.0,
+        "records_per_s": round(records / elapsed_s, 2) if elapsed_s else 0.0,
+    }
+    if requests is not None:
+        summary["requests_per_s"] = round(requests / elapsed_s, 2) if elapsed_s else 0.0
+    return summary
+
+
+def median_of_rounds(rounds: List[Dict[str, dict]]) -> Dict[str, dict]:
+    """Per-case, per-metric median over repeated rounds, to damp machine noise."""
+    merged = {}
+    for case in rounds[0]:
+        values = [r[case] for r in rounds if case in r]
+        merged[case] = {}
+        for metric, first in values[0].items():
+            median = float(np.median([v[metric] for v in values]))
+            merged[case][metric] = int(median) if isinstance(first, int) else round(median, 4)
+        merged[case]["rounds"] = len(values)
+    return merged
+
+
+def format_metrics(metrics: dict) -> str:
+    line = (f"p50 {metrics['p50_ms']} ms, p95 {metrics['p95_ms']} ms, p99 {metrics['p99_ms']} ms, "
+            f"{metrics['records_per_s']} records/s")
+    if "requests_per_s" in metrics:
+        line += f", {metrics['requests_per_s']} req/s"
+    return line + f", RSS {metrics['rss_mb']} MB"
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=5,
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment() -> dict:
+    """Where a run was measured; numbers are only comparable on the same machine."""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "ml_env": {k: v for k, v in sorted(os.environ.items()) if k.startswith("ML_")},
+    }
+
+
+def save(path: str, run: dict):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(run, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+# ── Regression Check ───────────────────────────────────────
+def compare(
+    baseline: dict,
+    current: dict,
+    threshold: float = DEFAULT_THRESHOLD,
+    metrics: Iterable[str] = DEFAULT_METRICS,
+) -> List[dict]:
+    """One row per (case, metric) present in both runs, with ``regressed`` set."""
+    rows = []
+    base_results = baseline.get("results", {})
+    for case, values in sorted(current.get("results", {}).items()):
+        base = base_results.get(case)
+        if base is None:
+            continue
+        for metric in metrics:
+            if metric not in values or metric not in base or not base[metric]:
+                continue
+            change = (values[metric] - base[metric]) / base[metric]
+            worse = change if metric in LOWER_IS_BETTER else -change
+            rows.append({
+                "case": case,
+                "metric": metric,
+                "baseline": base[metric],
+                "current": values[metric],
+                "change": change,
+                "regressed": worse > threshold,
+            })
+    return rows
+
+
+def print_comparison(rows: List[dict], baseline: dict, current: dict, threshold: float, out=sys.stdout):
+    """Print the comparison table; mismatched environments are called out first."""
+    base_env, cur_env = baseline.get("environment", {}), current.get("environment", {})
+    for key in ("cpu_count", "machine", "python"):
+        if base_env.get(key) != cur_env.get(key):
+            print(f"[!] Warning: {key} differs from the baseline "
+                  f"({base_env.get(key)} vs {cur_env.get(key)})", file=out)
+
+    missing = sorted(set(baseline.get("results", {})) ^ set(current.get("results", {})))
+    if missing:
+        print(f"[!] Warning: {len(missing)} cases only in one run: {', '.join(missing)}", file=out)
+
+    width = max([len(row["case"]) for row in rows] + [4])
+    print(f"    {'case':<{width}}  {'metric':<15}{'baseline':>12}{'current':>12}{'change':>9}", file=out)
+    for row in rows:
+        flag = "  REGRESSED" if row["regressed"] else ""
+        print(f"    {row['case']:<{width}}  {row['metric']:<15}{row['baseline']:>12}{row['current']:>12}"
+              f"{row['change']:>+9.1%}{flag}", file=out)
+
+    regressed = [row for row in rows if row["regressed"]]
+    if regressed:
+        print(f"[!] {len(regressed)} of {len(rows)} metrics regressed by more than {threshold:.0%}", file=out)
+    else:
+        print(f"[+] No regressions beyond {threshold:.0%} across {len(rows)} metrics", file=out)
+
+
+def timed(fn, *args) -> int:
+    """Run ``fn(*args)`` and return its wall time in nanoseconds."""
+    start = time.perf_counter_ns()
+    fn(*args)
+    return time.perf_counter_ns() - start
@@ -0,0 +1,81 @@
+"""
+CyberSentinel AI – ml-service test fixtures
+=============================================
+Run from ``services/ml-service``:
+
+  python -m pytest -q
+
+Model tests use the shipped ``models/*.pkl``; they are skipped when the
+pickles are missing (run ``train.py`` first).
+"""
+
+import contextlib
+import os
+import warnings
+
+import httpx
+import joblib
+import pytest
+
+from app.models import MODELS_DIR
+
+# Fixed messages: phishing, legitimate, and edge cases of the tokenizer
+TEXTS = [
+    "URGENT: Your account has been suspended. Verify your password at http://secure-login.example now",
+    "Congratulations! You won a $1,000 gift card, click here to claim your prize",
+    "Your PayPal payment could not be processed, update your billing information immediately",
+    "Hi team, the quarterly report is attached. Let me know if you have questions.",
+    "Lunch tomorrow at noon? The usual place.",
+    "Meeting moved to 3pm, agenda unchanged",
+    "Reset your password: https://accounts.example.com/reset?token=abc123",
+    "Naïve café résumé – ÜBER dringend: Konto gesperrt!",
+    "verify verify verify account account bank",
+    "x",
+    "!!! ??? ...",
+    "",
+    "   \t\n  ",
+]
+
+
+def _load_pickle(name: str):
+    path = os.path.join(MODELS_DIR, name)
+    if not os.path.exists(path):
+        pytest.skip(f"{name} not found; run train.py first")
+    with warnings.catch_warnings():
+        # Pickles from another scikit-learn release still load and predict the same
+        warnings.simplefilter("ignore")
+        return joblib.load(path)
+
+
+@pytest.fixture(scope="session")
+def phishing_model():
+    return _load_pickle("phishing_model.pkl")
+
+
+@pytest.fixture(scope="session")
+def vectorizer():
+    return _load_pickle("tfidf_vectorizer.pkl")
+
+
+@pytest.fixture(scope="session")
+def anomaly_model():
+    return _load_pickle("anomaly_model.pkl")
+
+
+@pytest.fixture(scope="session")
+def anomaly_features():
+    return _load_pickle("anomaly_features.pkl")
+
+
+@contextlib.asynccontextmanager
+async def serve():
+    """The service with its startup hooks run, and an HTTP client for it."""
+    from app.main import app
+
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://ml-service") as client:
+            yield client
+    finally:
+        await app.router.shutdown()
@@ -0,0 +1,126 @@
+"""Admission control: tickets, 429/503 shedding at arrival, and ``PriorityGate`` ordering."""
+
+import asyncio
+import time
+
+import pytest
+
+from app import main
+from app.admission import BULK, INTERACTIVE, NORMAL, AdmissionController, DeadlineExceeded, PriorityGate, Ticket
+
+from .conftest import serve
+
+LOGIN = {"login_hour": 3, "ip_frequency": 2, "device_change": 1, "failed_attempts": 6, "session_duration": 2}
+REQUESTS = {
+    "normal": ("/predict", {"text": "Verify your password now"}, {}),
+    "bulk": ("/predict/batch", {"texts": ["Verify your password now"]}, {}),
+    "interactive": ("/anomaly", LOGIN, {}),
+    "raised": ("/predict", {"text": "Verify your password now"}, {"X-Priority": "interactive"}),
+}
+
+
+def test_ticket_from_headers():
+    controller = AdmissionController(lambda: 0, {}, default_deadline_ms=250)
+
+    ticket = controller.ticket("BULK", None, NORMAL)
+    assert ticket.priority == BULK and ticket.remaining() == pytest.approx(0.25, abs=0.05)
+
+    ticket = controller.ticket("urgent", "not-a-number", INTERACTIVE)
+    assert ticket.priority == INTERACTIVE and ticket.remaining() == pytest.approx(0.25, abs=0.05)
+
+    assert AdmissionController(lambda: 0, {}).ticket(None, None, NORMAL).deadline is None
+
+
+def test_merged_ticket_is_most_urgent_with_latest_deadline():
+    merged = Ticket.merge([Ticket(BULK, 5.0, 1.0), Ticket(INTERACTIVE, 9.0, 2.0)])
+    assert (merged.priority, merged.deadline, merged.arrived) == (INTERACTIVE, 9.0, 1.0)
+    assert Ticket.merge([Ticket(BULK, 5.0), Ticket(NORMAL)]).deadline is None
+
+
+def post_all(names, headers=None):
+    async def scenario():
+        async with serve() as client:
+            responses = {}
+            for name in names:
+                path, body, extra = REQUESTS[name]
+                responses[name] = await client.post(path, json=body, headers={**extra, **(headers or {})})
+            return responses
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("depth, shed", [
+    (0, set()),
+    (main.SHED_BULK_DEPTH, {"bulk"}),
+    (main.SHED_NORMAL_DEPTH, {"bulk", "normal"}),
+])
+def test_requests_are_shed_by_priority_and_depth(monkeypatch, depth, shed):
+    monkeypatch.setattr(main.admission, "depth", lambda: depth)
+
+    responses = post_all(REQUESTS)
+
+    for name, response in responses.items():
+        if name in shed:
+            assert response.status_code == 429
+            assert response.headers["retry-after"] == str(main.admission.retry_after_s)
+            assert response.json()["reason"] == "overload"
+        else:
+            assert response.status_code == 200, name
+
+
+def test_expired_deadline_is_answered_503():
+    responses = post_all(["normal", "interactive"], headers={"X-Deadline-Ms": "0"})
+
+    for response in responses.values():
+        assert response.status_code == 503
+        assert response.json()["reason"] == "deadline" and "retry-after" not in response.headers
+
+
+def test_other_paths_are_not_admission_controlled(monkeypatch):
+    monkeypatch.setattr(main.admission, "depth", lambda: 10**9)
+
+    async def scenario():
+        async with serve() as client:
+            return await client.get("/health", headers={"X-Deadline-Ms": "0"})
+
+    assert asyncio.run(scenario()).status_code == 200
+
+
+def test_gate_admits_waiters_by_priority_then_arrival():
+    async def scenario():
+        gate = PriorityGate(1)
+        order = []
+        await gate.acquire(Ticket(NORMAL))
+
+        async def wait(name, priority):
+            await gate.acquire(Ticket(priority))
+            order.append(name)
+            gate.release()
+
+        tasks = []
+        for name, priority in [("bulk", BULK), ("normal-1", NORMAL), ("interactive", INTERACTIVE), ("normal-2", NORMAL)]:
+            tasks.append(asyncio.get_running_loop().create_task(wait(name, priority)))
+            await asyncio.sleep(0)
+        gate.release()
+        await asyncio.gather(*tasks)
+        return order, gate.active
+
+    order, active = asyncio.run(scenario())
+
+    assert order == ["interactive", "normal-1", "normal-2", "bulk"]
+    assert active == 0
+
+
+def test_gate_waiter_gives_up_at_its_deadline():
+    async def scenario():
+        gate = PriorityGate(1)
+        await gate.acquire(Ticket())
+        with pytest.raises(DeadlineExceeded):
+            await gate.acquire(Ticket(INTERACTIVE, time.monotonic() + 0.02))
+        waiting = gate.waiting
+        gate.release()
+        # The abandoned waiter does not keep the slot
+        await asyncio.wait_for(gate.acquire(Ticket(BULK)), 1)
+        return waiting, gate.active
+
+    assert asyncio.run(scenario()) == (0, 1)
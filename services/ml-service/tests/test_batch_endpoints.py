@@ -0,0 +1,74 @@
+"""Batch endpoints: one model call per request, in order, with bounded size."""
+
+import asyncio
+
+import numpy as np
+
+from app.featurizer import MAX_BUFFER_ROWS
+from app.main import BATCH_MAX_ITEMS
+from app.models import PhishingDetector
+
+from .conftest import TEXTS, serve
+
+SCORED = [text for text in TEXTS if text.strip()]
+LOGIN = {"login_hour": 3, "ip_frequency": 2, "device_change": 1, "failed_attempts": 6, "session_duration": 2}
+
+
+def test_batch_verdicts_match_single_requests():
+    async def scenario():
+        async with serve() as client:
+            batch = await client.post("/predict/batch", json={"texts": SCORED})
+            singles = [await client.post("/predict", json={"text": text}) for text in SCORED]
+            return batch, singles
+
+    batch, singles = asyncio.run(scenario())
+
+    assert batch.status_code == 200
+    body = batch.json()
+    assert body["count"] == len(SCORED)
+    for item, single in zip(body["results"], singles):
+        assert (item["label"], item["risk_score"]) == (single.json()["label"], single.json()["risk_score"])
+
+
+def test_anomaly_batch_scores_every_record():
+    async def scenario():
+        async with serve() as client:
+            return await client.post("/anomaly/batch", json={"records": [LOGIN] * 3})
+
+    response = asyncio.run(scenario())
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 3 and len({result["risk_score"] for result in results}) == 1
+
+
+def test_oversized_batches_are_rejected():
+    too_many = BATCH_MAX_ITEMS + 1
+    requests = [
+        ("/predict/batch", {"texts": ["x"] * too_many}),
+        ("/anomaly/batch", {"records": [LOGIN] * too_many}),
+        ("/anomaly/events", {"events": [{"user": "u", "ip": "10.0.0.1"}] * too_many}),
+        ("/predict/batch", {"texts": []}),
+    ]
+
+    async def scenario():
+        async with serve() as client:
+            return [await client.post(path, json=body) for path, body in requests]
+
+    assert [response.status_code for response in asyncio.run(scenario())] == [422, 422, 422, 422]
+
+
+def test_large_batches_are_featurized_in_blocks(vectorizer):
+    detector = PhishingDetector()
+    rng = np.random.default_rng(3)
+    vocab = sorted(vectorizer.vocabulary_)
+    texts = [" ".join(rng.choice(vocab, size=12)) for _ in range(MAX_BUFFER_ROWS + 100)]
+
+    whole = detector.predict_batch(texts)
+    pieces = []
+    for start in range(0, len(texts), 100):
+        pieces += detector.predict_batch(texts[start:start + 100])
+
+    assert whole == pieces
+    if detector.featurizer is not None:
+        assert detector.featurizer._local.buffer.shape[0] <= MAX_BUFFER_ROWS
@@ -0,0 +1,127 @@
+"""``MicroBatcher``: coalescing, size and time flushes, priorities, deadlines."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.admission import BULK, INTERACTIVE, DeadlineExceeded, Ticket
+from app.batching import MicroBatcher
+
+
+class Recorder:
+    """Batch handler that doubles its items and remembers every call."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+
+    async def __call__(self, items, ticket):
+        self.calls.append((list(items), ticket))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return [item * 2 for item in items]
+
+
+def run_batcher(scenario, handler, **kwargs):
+    async def main():
+        batcher = MicroBatcher("test", handler, **kwargs)
+        batcher.start()
+        try:
+            return await scenario(batcher)
+        finally:
+            await batcher.stop()
+
+    return asyncio.run(main())
+
+
+def test_concurrent_requests_share_one_call():
+    handler = Recorder()
+
+    async def scenario(batcher):
+        return await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+
+    results = run_batcher(scenario, handler, max_batch_size=64, max_wait_ms=20)
+
+    assert results == [(i * 2, 10) for i in range(10)]
+    assert len(handler.calls) == 1
+
+
+def test_full_batches_flush_without_waiting_for_the_window():
+    handler = Recorder()
+
+    async def scenario(batcher):
+        start = time.perf_counter()
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(8)))
+        return results, time.perf_counter() - start
+
+    results, elapsed = run_batcher(scenario, handler, max_batch_size=4, max_wait_ms=5000)
+
+    assert [size for _, size in results] == [4] * 8
+    assert [items for items, _ in handler.calls] == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert elapsed < 1.0
+
+
+def test_a_lone_request_flushes_after_the_window():
+    handler = Recorder()
+
+    async def scenario(batcher):
+        return await asyncio.wait_for(batcher.submit(21), timeout=2.0)
+
+    assert run_batcher(scenario, handler, max_batch_size=64, max_wait_ms=10) == (42, 1)
+
+
+def test_urgent_requests_are_batched_first():
+    handler = Recorder(delay=0.05)
+
+    async def scenario(batcher):
+        # The first call occupies the only slot while the others queue up
+        first = asyncio.ensure_future(batcher.submit(0))
+        await asyncio.sleep(0.01)
+        bulk = [asyncio.ensure_future(batcher.submit(i, Ticket(BULK))) for i in (1, 2)]
+        urgent = asyncio.ensure_future(batcher.submit(3, Ticket(INTERACTIVE)))
+        await asyncio.gather(first, urgent, *bulk)
+
+    run_batcher(scenario, handler, max_batch_size=1, max_wait_ms=0, max_concurrency=1)
+
+    assert [items for items, _ in handler.calls] == [[0], [3], [1], [2]]
+
+
+def test_expired_requests_are_dropped_before_the_handler():
+    handler = Recorder()
+
+    async def scenario(batcher):
+        expired = Ticket(deadline=time.monotonic() - 1)
+        live = batcher.submit(1)
+        with pytest.raises(DeadlineExceeded):
+            await asyncio.gather(batcher.submit(2, expired), live)
+        return batcher.expired
+
+    assert run_batcher(scenario, handler, max_batch_size=64, max_wait_ms=10) == 1
+    assert [items for items, _ in handler.calls] == [[1]]
+
+
+def test_handler_errors_reach_every_caller():
+    async def failing(items, ticket):
+        raise ValueError("model exploded")
+
+    async def scenario(batcher):
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    results = run_batcher(scenario, failing, max_wait_ms=10)
+
+    assert [type(result) for result in results] == [ValueError] * 3
+
+
+def test_stop_fails_queued_requests():
+    async def main():
+        batcher = MicroBatcher("test", Recorder(delay=1.0), max_batch_size=1, max_wait_ms=0)
+        batcher.start()
+        waiting = [asyncio.ensure_future(batcher.submit(i)) for i in range(3)]
+        await asyncio.sleep(0.05)
+        await batcher.stop()
+        return await asyncio.gather(*waiting, return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,92 @@
+"""``VerdictCache``: exact and near-duplicate hits, model binding, TTL, LRU eviction."""
+
+import asyncio
+
+from app import cache as cache_module
+from app import main
+from app.cache import VerdictCache
+
+from .conftest import serve
+
+MESSAGE = (
+    "Your account has been suspended please verify your password at the secure login page today "
+    "to avoid permanent closure of your mailbox and loss of all stored messages and contacts"
+)
+VERDICT = {"label": "phishing", "risk_score": 0.97}
+
+
+def test_exact_hit_ignores_case_and_whitespace():
+    cache = VerdictCache()
+    cache.put(MESSAGE, VERDICT)
+
+    assert cache.get(f"  {MESSAGE.upper()}\n") == (VERDICT, "exact")
+    assert cache.exact_hits == 1
+
+
+def test_one_word_edit_is_a_near_hit():
+    cache = VerdictCache()
+    cache.put(MESSAGE, VERDICT)
+
+    assert cache.get(MESSAGE.replace("today", "now")) == (VERDICT, "near")
+    assert cache.get("Quarterly report attached for the finance team review meeting next week") == (None, None)
+
+
+def test_short_messages_only_match_exactly():
+    cache = VerdictCache(min_tokens=8)
+    cache.put("verify your password now", VERDICT)
+
+    assert cache.get("verify your password today") == (None, None)
+
+
+def test_binding_a_new_model_clears_the_cache():
+    cache = VerdictCache()
+    cache.bind("v1")
+    cache.put(MESSAGE, VERDICT)
+    cache.bind("v1")
+    assert cache.get(MESSAGE)[0] == VERDICT
+
+    cache.bind("v2")
+
+    assert cache.get(MESSAGE) == (None, None)
+    assert cache.invalidations == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = VerdictCache(ttl_seconds=60)
+    cache.put(MESSAGE, VERDICT)
+
+    now[0] += 59
+    assert cache.get(MESSAGE)[1] == "exact"
+    now[0] += 2
+    assert cache.get(MESSAGE) == (None, None)
+    assert cache.expirations == 1 and cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = VerdictCache(max_entries=2, near_duplicates=False)
+    cache.put("first", {"n": 1})
+    cache.put("second", {"n": 2})
+    cache.get("first")
+
+    cache.put("third", {"n": 3})
+
+    assert cache.get("second") == (None, None)
+    assert cache.get("first")[0] == {"n": 1} and cache.get("third")[0] == {"n": 3}
+    assert cache.evictions == 1
+
+
+def test_repeated_predict_is_served_from_cache(monkeypatch):
+    monkeypatch.setattr(main, "verdict_cache", VerdictCache())
+
+    async def scenario():
+        async with serve() as client:
+            first = await client.post("/predict", json={"text": MESSAGE})
+            second = await client.post("/predict", json={"text": MESSAGE})
+            return first.json(), second.json()
+
+    first, second = asyncio.run(scenario())
+
+    assert (first["cache_hit"], second["cache_hit"], second["cache_match"]) == (False, True, "exact")
+    assert second["risk_score"] == first["risk_score"]
@@ -0,0 +1,121 @@
+"""``InferenceExecutor``: scoring off the event loop with bounded depth."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.executor import InferenceExecutor, InferenceQueueFull
+from app.models import MODELS_DIR, PhishingDetector
+
+from .conftest import TEXTS
+
+
+class SlowDetector:
+    """Blocks like a CPU-bound model call and records how many run at once."""
+
+    def __init__(self, seconds: float = 0.1):
+        self.seconds = seconds
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def predict_batch(self, items, timings=None):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.seconds)
+        with self._lock:
+            self.running -= 1
+        if timings is not None:
+            timings["evaluate"] = int(self.seconds * 1e9)
+        return [{"item": item} for item in items]
+
+
+def run_executor(scenario, detector, **kwargs):
+    async def main():
+        executor = InferenceExecutor("thread", **kwargs)
+        executor.start({"phishing": detector})
+        try:
+            return await scenario(executor)
+        finally:
+            executor.shutdown()
+
+    return asyncio.run(main())
+
+
+def test_scoring_does_not_block_the_event_loop():
+    detector = SlowDetector(0.3)
+
+    async def scenario(executor):
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        beating = asyncio.ensure_future(heartbeat())
+        timings = {}
+        results = await executor.run("phishing", ["a", "b"], timings=timings)
+        beating.cancel()
+        return results, timings, ticks
+
+    results, timings, ticks = run_executor(scenario, detector, workers=1)
+
+    assert results == [{"item": "a"}, {"item": "b"}]
+    assert timings == {"evaluate": 300_000_000}
+    assert ticks >= 10
+
+
+def test_at_most_one_call_per_worker_runs_at_once():
+    detector = SlowDetector(0.05)
+
+    async def scenario(executor):
+        await asyncio.gather(*(executor.run("phishing", [i]) for i in range(6)))
+        return executor.stats()
+
+    stats = run_executor(scenario, detector, workers=2, max_pending=16)
+
+    assert detector.max_running == 2
+    assert stats["completed"] == 6 and stats["pending"] == 0
+
+
+def test_calls_beyond_max_pending_are_rejected():
+    detector = SlowDetector(0.1)
+
+    async def scenario(executor):
+        return await asyncio.gather(*(executor.run("phishing", [i]) for i in range(4)), return_exceptions=True)
+
+    results = run_executor(scenario, detector, workers=1, max_pending=2)
+
+    assert sum(isinstance(result, InferenceQueueFull) for result in results) == 2
+    assert sum(isinstance(result, list) for result in results) == 2
+
+
+def test_unknown_modes_and_stopped_executors_fail_loudly():
+    with pytest.raises(ValueError):
+        InferenceExecutor("fiber")
+
+    async def scenario():
+        await InferenceExecutor("thread").run("phishing", ["text"])
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(scenario())
+
+
+def test_process_workers_match_in_process_scoring(phishing_model):
+    texts = [text for text in TEXTS if text.strip()]
+    expected = PhishingDetector().predict_batch(texts)
+
+    async def main():
+        executor = InferenceExecutor("process", workers=1)
+        executor.start(models_dir=MODELS_DIR)
+        try:
+            return await executor.run("phishing", texts, models_dir=MODELS_DIR)
+        finally:
+            executor.shutdown()
+
+    assert asyncio.run(main()) == expected
@@ -0,0 +1,85 @@
+"""``LoginFeatureStore``: sliding-window features, warm-up, bounded users, stable IP keys."""
+
+import asyncio
+import os
+import subprocess
+import sys
+
+from app import main
+from app.feature_store import LoginFeatureStore
+
+from .conftest import serve
+
+T0 = 1_700_000_000.0
+
+
+def test_ip_frequency_counts_within_the_window():
+    store = LoginFeatureStore(ip_window=3, warmup_logins=0)
+    seen = [store.observe("alice", ip, timestamp=T0 + i)["ip_frequency"]
+            for i, ip in enumerate(["10.0.0.1", "10.0.0.1", "10.0.0.2", "10.0.0.1", "10.0.0.3"])]
+
+    # The fourth login pushes the first one out of the three-login window
+    assert seen == [1, 2, 1, 2, 1]
+
+
+def test_device_change_and_failure_window():
+    store = LoginFeatureStore(failure_window=60)
+    store.observe("bob", "10.0.0.1", device="laptop", success=False, timestamp=T0)
+    second = store.observe("bob", "10.0.0.1", device="phone", success=False, timestamp=T0 + 30)
+    third = store.observe("bob", "10.0.0.1", device="phone", timestamp=T0 + 75)
+
+    assert (second["device_change"], second["failed_attempts"]) == (1, 2)
+    assert (third["device_change"], third["failed_attempts"]) == (0, 1)
+
+
+def test_first_logins_are_warming_up():
+    store = LoginFeatureStore(warmup_logins=2)
+    flags = [store.observe("carol", "10.0.0.1", timestamp=T0 + i)["warming_up"] for i in range(4)]
+
+    assert flags == [True, True, False, False]
+
+
+def test_users_are_bounded_and_expire():
+    store = LoginFeatureStore(max_users=2, idle_ttl=100)
+    store.observe("a", "10.0.0.1", timestamp=T0)
+    store.observe("b", "10.0.0.1", timestamp=T0 + 1)
+    store.observe("c", "10.0.0.1", timestamp=T0 + 2)
+    assert store.stats()["users"] == 2 and store.evictions == 1
+
+    store.observe("d", "10.0.0.1", timestamp=T0 + 500)
+
+    assert store.stats()["users"] == 1 and store.expirations == 2
+
+
+def test_ip_keys_do_not_depend_on_hash_seed():
+    script = (
+        "from app.feature_store import LoginFeatureStore\n"
+        "store = LoginFeatureStore()\n"
+        "store.observe('u', '203.0.113.7')\n"
+        "print(list(store._users['u'].ips[:1]))\n"
+    )
+    outputs = {
+        subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True,
+            env={**os.environ, "PYTHONHASHSEED": seed},
+        ).stdout
+        for seed in ("1", "2")
+    }
+
+    assert len(outputs) == 1
+
+
+def test_event_endpoint_holds_back_flags_while_warming_up(monkeypatch):
+    monkeypatch.setattr(main, "feature_store", LoginFeatureStore(warmup_logins=2))
+    event = {"user": "dave", "ip": "198.51.100.9", "device": "x", "success": False, "timestamp": "2024-01-01T03:00:00Z"}
+
+    async def scenario():
+        async with serve() as client:
+            return [(await client.post("/anomaly/event", json=event)).json() for _ in range(3)]
+
+    first, second, third = asyncio.run(scenario())
+
+    assert first["warming_up"] and second["warming_up"] and not third["warming_up"]
+    assert not first["is_anomaly"] and not second["is_anomaly"]
+    assert "warming_up" not in first["features"]
+    assert third["features"]["failed_attempts"] == 3 and third["features"]["login_hour"] == 3
@@ -0,0 +1,109 @@
+"""``TfidfFeaturizer`` against ``TfidfVectorizer.transform`` on the shipped pickle."""
+
+import shutil
+
+import numpy as np
+import pytest
+
+from app.featurizer import MAX_BUFFER_ROWS, TfidfFeaturizer, _sample_texts
+from app.models import MODELS_DIR, PhishingDetector
+
+from .conftest import TEXTS
+
+EDGE_CASES = [
+    "",
+    " ",
+    "\t\n\r    ",
+    "a",
+    "Ünïcödé ÜBER naïve café – ‹quoted› “smart” ‘quotes’",
+    "日本語のテキスト 中文文本 한국어",
+    "Ελληνικά κείμενο και русский текст",
+    "emoji 🎉🔥 verify your account 🔒",
+    "ＦＵＬＬＷＩＤＴＨ account ｖｅｒｉｆｙ",
+    "İstanbul ß STRASSE ǅ",
+    "snake_case_word __dunder__ 123 4567 a1 1a",
+    "line\nbreaks\r\nand\ttabs",
+]
+
+
+@pytest.fixture(scope="module")
+def featurizer(vectorizer):
+    return TfidfFeaturizer.from_vectorizer(vectorizer)
+
+
+def _texts(vectorizer):
+    return TEXTS + EDGE_CASES + _sample_texts(vectorizer, 300, np.random.default_rng(11))
+
+
+def test_transform_matches_vectorizer(vectorizer, featurizer):
+    texts = _texts(vectorizer)
+
+    actual = featurizer.transform(texts)
+    expected = vectorizer.transform(texts)
+
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual.toarray(), expected.toarray(), atol=1e-9, rtol=0)
+
+
+@pytest.mark.parametrize("text", EDGE_CASES, ids=range(len(EDGE_CASES)))
+def test_edge_cases_match_vectorizer(vectorizer, featurizer, text):
+    np.testing.assert_allclose(
+        featurizer.transform([text]).toarray(), vectorizer.transform([text]).toarray(), atol=1e-9, rtol=0
+    )
+
+
+def test_empty_and_whitespace_rows_are_empty(featurizer):
+    X = featurizer.transform(["", "   ", "\t\n"])
+
+    assert X.shape == (3, featurizer.n_features)
+    assert X.nnz == 0
+
+
+def test_dense_blocks_match_vectorizer(vectorizer, featurizer):
+    texts = _texts(vectorizer)
+    expected = vectorizer.transform(texts).toarray()
+
+    blocks = [(offset, rows.copy()) for offset, rows in featurizer.iter_dense(texts, block_rows=64)]
+
+    assert [offset for offset, _ in blocks] == list(range(0, len(texts), 64))
+    np.testing.assert_allclose(np.vstack([rows for _, rows in blocks]), expected, atol=1e-6, rtol=0)
+
+
+def test_dense_buffer_stays_bounded(vectorizer, featurizer):
+    texts = ["verify your account"] * (MAX_BUFFER_ROWS + 10)
+
+    X = featurizer.transform_dense(texts)
+
+    assert X.shape[0] == len(texts)
+    np.testing.assert_allclose(X[-1], vectorizer.transform(texts[-1:]).toarray()[0], atol=1e-6, rtol=0)
+    buffer = getattr(featurizer._local, "buffer", None)
+    assert buffer is None or buffer.shape[0] <= MAX_BUFFER_ROWS
+
+
+def test_export_round_trip(vectorizer, featurizer, tmp_path):
+    featurizer.save(str(tmp_path), fingerprint="0123456789abcdef")
+
+    loaded = TfidfFeaturizer.load(str(tmp_path), mmap_mode="r")
+
+    assert loaded.fingerprint == "0123456789abcdef"
+    texts = _texts(vectorizer)
+    np.testing.assert_allclose(
+        loaded.transform(texts).toarray(), vectorizer.transform(texts).toarray(), atol=1e-9, rtol=0
+    )
+
+
+def test_stale_export_is_recompiled_from_the_pickles(vectorizer, featurizer, tmp_path):
+    shutil.copytree(MODELS_DIR, tmp_path, dirs_exist_ok=True, ignore=shutil.ignore_patterns("tenants", "reputation"))
+    # A retrain replaced the pickles but left an export with the same vocabulary size behind
+    stale = TfidfFeaturizer.from_vectorizer(vectorizer)
+    stale.idf = stale.idf * 2
+    stale.save(str(tmp_path), fingerprint="stale-fingerprint")
+
+    detector = PhishingDetector(str(tmp_path), cascade=False)
+
+    assert not detector.memory_mapped
+    assert detector.featurizer is not None and detector.featurizer.fingerprint is None
+    texts = _texts(vectorizer)
+    np.testing.assert_allclose(
+        detector.featurizer.transform(texts).toarray(), vectorizer.transform(texts).toarray(), atol=1e-9, rtol=0
+    )
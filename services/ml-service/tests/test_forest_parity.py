@@ -0,0 +1,71 @@
+"""Compiled forests (``app.forest``) against the shipped sklearn pickles."""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.forest import CompiledForestClassifier, CompiledIsolationForest, _sample_logins, _sample_texts
+
+from .conftest import TEXTS
+
+ATOL = 1e-6
+
+
+@pytest.fixture(scope="module")
+def phishing_matrix(vectorizer):
+    texts = TEXTS + _sample_texts(vectorizer, 500, np.random.default_rng(7))
+    return vectorizer.transform(texts)
+
+
+@pytest.fixture(scope="module")
+def login_frame(anomaly_features):
+    return pd.DataFrame(_sample_logins(2000, np.random.default_rng(7)), columns=anomaly_features)
+
+
+def test_classifier_matches_predict_proba(phishing_model, phishing_matrix):
+    proba, labels = CompiledForestClassifier.from_sklearn(phishing_model).evaluate(phishing_matrix)
+
+    np.testing.assert_allclose(proba, phishing_model.predict_proba(phishing_matrix), atol=ATOL, rtol=0)
+    np.testing.assert_array_equal(labels, phishing_model.predict(phishing_matrix))
+
+
+def test_saved_classifier_is_memory_mapped_and_identical(phishing_model, phishing_matrix, tmp_path):
+    compiled = CompiledForestClassifier.from_sklearn(phishing_model)
+    compiled.save(str(tmp_path), "forest", fingerprint="test")
+
+    loaded = CompiledForestClassifier.load(str(tmp_path), "forest")
+
+    assert isinstance(loaded.value, np.memmap) or isinstance(loaded.value.base, np.memmap)
+    for expected, actual in zip(compiled.evaluate(phishing_matrix), loaded.evaluate(phishing_matrix)):
+        np.testing.assert_array_equal(actual, expected)
+    assert CompiledForestClassifier.read_header(str(tmp_path), "forest")["fingerprint"] == "test"
+
+
+def test_saving_over_a_mapped_forest_leaves_it_intact(phishing_model, phishing_matrix, tmp_path):
+    compiled = CompiledForestClassifier.from_sklearn(phishing_model)
+    compiled.save(str(tmp_path), "forest")
+    mapped = CompiledForestClassifier.load(str(tmp_path), "forest")
+    before = mapped.evaluate(phishing_matrix)
+
+    # A retrain exports over the same files while workers still map them
+    compiled.value = np.zeros_like(compiled.value)
+    compiled.save(str(tmp_path), "forest")
+
+    for expected, actual in zip(before, mapped.evaluate(phishing_matrix)):
+        np.testing.assert_array_equal(actual, expected)
+    assert not [name for name in tmp_path.iterdir() if name.suffix == ".tmp"]
+
+
+def test_isolation_forest_matches_score_samples(anomaly_model, login_frame):
+    scores, labels = CompiledIsolationForest.from_sklearn(anomaly_model).evaluate(login_frame)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        expected = anomaly_model.score_samples(login_frame)
+        expected_labels = anomaly_model.predict(login_frame)
+    np.testing.assert_allclose(scores, expected, atol=ATOL, rtol=0)
+    # Rows scoring exactly on the threshold may flip on float rounding
+    ties = np.abs(expected - anomaly_model.offset_) <= ATOL
+    np.testing.assert_array_equal(labels[~ties], expected_labels[~ties])
@@ -0,0 +1,99 @@
+"""``SamplingProfiler``: sampling, session control, and its admin endpoints."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app import main
+from app.profiler import SamplingProfiler
+
+from .conftest import serve
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+def busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def sampler_threads():
+    return [thread for thread in threading.enumerate() if thread.name == "sampling-profiler"]
+
+
+def test_samples_other_threads():
+    profiler = SamplingProfiler()
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    worker.start()
+    try:
+        profiler.start(interval_ms=1, duration_s=10)
+        time.sleep(0.2)
+        stats = profiler.stop()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert not stats["running"] and stats["samples"] > 0
+    assert any(line.startswith("busy;") and "busy_loop" in line for line in profiler.folded().splitlines())
+    assert any(entry["function"].startswith("busy_loop") for entry in profiler.top(50))
+    assert "sampling-profiler" not in profiler.folded()
+
+
+def test_session_stops_after_its_duration():
+    profiler = SamplingProfiler()
+    profiler.start(interval_ms=1, duration_s=0.05)
+    time.sleep(0.3)
+
+    assert not profiler.running and profiler.stats()["stopped_at"] is not None
+
+
+def test_concurrent_start_and_stop_leave_one_sampler():
+    profiler = SamplingProfiler()
+    calls = [lambda: profiler.start(interval_ms=1, duration_s=10), profiler.stop] * 20
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for future in [pool.submit(call) for call in calls]:
+            future.result()
+
+    assert len(sampler_threads()) <= 1
+    profiler.start(interval_ms=1, duration_s=10)
+    assert len(sampler_threads()) == 1
+    profiler.stop()
+    assert sampler_threads() == []
+
+
+class SlowStopProfiler(SamplingProfiler):
+    """Stop takes as long as joining a sampler stuck on a slow snapshot."""
+
+    def stop(self) -> dict:
+        time.sleep(0.3)
+        return super().stop()
+
+
+def test_stop_endpoint_does_not_block_the_event_loop(monkeypatch):
+    # Regression: the stop endpoint used to join the sampler thread on the event loop
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(main, "profiler", SlowStopProfiler())
+    ticks = []
+
+    async def heartbeat():
+        while True:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        async with serve() as client:
+            started = await client.post("/admin/profiler/start", json={"interval_ms": 5, "duration_s": 10}, headers=ADMIN)
+            beating = asyncio.get_running_loop().create_task(heartbeat())
+            stopped = await client.post("/admin/profiler/stop", headers=ADMIN)
+            beating.cancel()
+            return started, stopped
+
+    started, stopped = asyncio.run(scenario())
+
+    assert started.status_code == 200 and started.json()["running"]
+    assert stopped.status_code == 200 and not stopped.json()["running"]
+    # The loop kept ticking through the ~0.3 s stop
+    assert len(ticks) >= 10
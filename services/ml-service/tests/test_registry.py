@@ -0,0 +1,83 @@
+"""``ModelRegistry`` hot swaps and checksums, and the admin token on its endpoints."""
+
+import asyncio
+import os
+import shutil
+
+import pytest
+
+from app import main
+from app.models import MODELS_DIR
+from app.registry import CURRENT_FILE, ModelRegistry, ModelRegistryError, write_manifest
+
+from .conftest import serve
+
+
+@pytest.fixture
+def model_root(tmp_path):
+    """A registry root holding two manifested copies of the shipped models."""
+    if not os.path.exists(os.path.join(MODELS_DIR, "phishing_model.pkl")):
+        pytest.skip("models not found; run train.py first")
+    for version in ("v1", "v2"):
+        shutil.copytree(MODELS_DIR, tmp_path / version)
+        write_manifest(str(tmp_path / version), version)
+    return tmp_path
+
+
+def test_swap_changes_the_active_version(model_root):
+    activated = []
+    registry = ModelRegistry(str(model_root), on_activate=lambda bundle: activated.append(bundle.version))
+    registry.load_and_activate("v1")
+
+    bundle = asyncio.run(registry.swap("v2", pin=True))
+
+    assert registry.active is bundle and bundle.version == "v2"
+    assert activated == ["v1", "v2"] and registry.swaps == 2
+    assert (model_root / CURRENT_FILE).read_text().strip() == "v2"
+    assert "error" not in bundle.phishing.predict_batch(["verify your password"])[0]
+
+
+def test_checksum_mismatch_keeps_the_active_version(model_root):
+    registry = ModelRegistry(str(model_root))
+    registry.load_and_activate("v1")
+    with open(model_root / "v2" / "tfidf_featurizer.json", "a", encoding="utf-8") as f:
+        f.write(" ")
+
+    with pytest.raises(ModelRegistryError, match="Checksum mismatch"):
+        registry.load_and_activate("v2")
+
+    assert registry.active.version == "v1"
+    assert registry.failures == 1 and registry.last_error.startswith("v2:")
+
+
+@pytest.mark.parametrize("version", ["../v1", "..", "missing"])
+def test_unknown_or_escaping_versions_are_rejected(model_root, version):
+    with pytest.raises(ModelRegistryError):
+        ModelRegistry(str(model_root)).load(version)
+
+
+def test_desired_version_follows_current_pointer(model_root):
+    registry = ModelRegistry(str(model_root))
+    assert registry.desired_version() in ("v1", "v2")
+
+    (model_root / CURRENT_FILE).write_text("v1\n")
+
+    assert registry.desired_version() == "v1"
+
+
+@pytest.mark.parametrize("configured, sent, status", [
+    ("", None, 403),
+    ("", "anything", 403),
+    ("secret", None, 401),
+    ("secret", "wrong", 401),
+    ("secret", "secret", 200),
+])
+def test_admin_token(monkeypatch, configured, sent, status):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", configured)
+    headers = {"X-Admin-Token": sent} if sent is not None else {}
+
+    async def scenario():
+        async with serve() as client:
+            return await client.get("/admin/models", headers=headers)
+
+    assert asyncio.run(scenario()).status_code == status
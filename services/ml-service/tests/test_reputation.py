@@ -0,0 +1,107 @@
+"""Domain reputation pre-filter: list parsing, rules, atomic rebuilds, and ``/predict``."""
+
+import asyncio
+import os
+import time
+
+import numpy as np
+import pytest
+
+from app import main
+from app.reputation import DomainList, ReputationFilter, extract_hosts, parse_entry
+
+from .conftest import serve
+
+BLOCKLIST = """# known phishing hosts
+evil.example
+0.0.0.0 tracker.example
+||lure.example^
+https://Fake-Bank.example/login
+"""
+ALLOWLIST = "paypal.com\ngoogle.com\n"
+
+
+@pytest.fixture
+def lists_dir(tmp_path):
+    (tmp_path / "blocklist.txt").write_text(BLOCKLIST)
+    (tmp_path / "allowlist.txt").write_text(ALLOWLIST)
+    return tmp_path
+
+
+@pytest.mark.parametrize("line, domain", [
+    ("evil.example", "evil.example"),
+    ("0.0.0.0 tracker.example  # hosts file", "tracker.example"),
+    ("||lure.example^$third-party", "lure.example"),
+    ("https://Fake-Bank.example/login", "fake-bank.example"),
+    ("*.wild.example", "wild.example"),
+    ("   # comment", None),
+])
+def test_parse_entry(line, domain):
+    assert parse_entry(line) == domain
+
+
+def test_extract_hosts_finds_urls_domains_and_mail_hosts():
+    text = "Login at https://www.Evil.example/x or mail admin@corp.example, not v1.2 ok."
+    assert extract_hosts(text) == ["www.evil.example", "corp.example"]
+
+
+def test_blocklist_matches_parent_domains(lists_dir):
+    reputation = ReputationFilter(str(lists_dir)).load()
+
+    rule = reputation.check("Verify now: http://secure.login.evil.example/account")
+
+    assert rule == {"name": "blocklist", "domains": ["evil.example"]}
+    assert reputation.verdict(rule)["risk_score"] == 100
+
+
+def test_blocklist_wins_over_allowlist(lists_dir):
+    reputation = ReputationFilter(str(lists_dir)).load()
+
+    assert reputation.check("See paypal.com and evil.example")["name"] == "blocklist"
+
+
+def test_allowlist_needs_every_host_and_never_decides(lists_dir):
+    reputation = ReputationFilter(str(lists_dir)).load()
+
+    rule = reputation.check("Receipt from https://www.paypal.com and sites.google.com/pay")
+    assert rule == {"name": "allowlist", "domains": ["google.com", "paypal.com"]}
+    with pytest.raises(ValueError):
+        reputation.verdict(rule)
+    assert reputation.check("paypal.com receipt, pay at http://pay-now.example") is None
+    assert reputation.hits == {"blocklist": 0, "allowlist": 1}
+
+
+def test_changed_list_is_rebuilt_without_touching_mapped_arrays(lists_dir):
+    loaded = DomainList.load(str(lists_dir), "blocklist")
+    before = loaded.hashes.copy()
+    inode = os.stat(lists_dir / "blocklist.hashes.npy").st_ino
+
+    time.sleep(0.01)
+    (lists_dir / "blocklist.txt").write_text(BLOCKLIST + "another.example\n")
+    assert DomainList.is_stale(str(lists_dir), "blocklist")
+    reloaded = DomainList.load(str(lists_dir), "blocklist")
+
+    # Replaced, not rewritten in place: the old mapping still reads the old list
+    assert os.stat(lists_dir / "blocklist.hashes.npy").st_ino != inode
+    assert np.array_equal(loaded.hashes, before)
+    assert len(reloaded) == len(loaded) + 1
+    assert not any(name.endswith(".tmp") for name in os.listdir(lists_dir))
+
+
+def test_predict_applies_rules(monkeypatch, lists_dir):
+    monkeypatch.setattr(main, "reputation_filter", ReputationFilter(str(lists_dir)))
+    texts = [
+        "Your account is locked, sign in at http://evil.example/verify",
+        "Your PayPal receipt: https://www.paypal.com/activity",
+    ]
+
+    async def scenario():
+        async with serve() as client:
+            return [(await client.post("/predict", json={"text": text})).json() for text in texts]
+
+    blocked, allowed = asyncio.run(scenario())
+
+    assert (blocked["decided_by"], blocked["risk_score"], blocked["batch_size"]) == ("reputation", 100, 0)
+    # An allowlist hit is only attached: the model still produced the verdict
+    assert allowed["rule"]["name"] == "allowlist" and allowed["decided_by"] != "reputation"
+    assert allowed["model_version"] is not None
@@ -0,0 +1,89 @@
+"""``SimilarityIndex``: ranking, de-duplication, bounded slots, and ``/similar``."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app import main
+from app.models import MODELS_DIR, PhishingDetector
+from app.similarity import SimilarityIndex
+
+from .conftest import serve
+
+CAMPAIGN = "Your mailbox is full, verify your password at http://mail-verify.example to keep receiving email"
+VARIANT = "Your mailbox is almost full, verify your password at http://mail-verify.example today"
+UNRELATED = "Lunch tomorrow at noon? The usual place."
+VERDICT = {"label": "Phishing", "risk_score": 95, "confidence": 0.95, "model_version": "v1"}
+
+
+@pytest.fixture(scope="module")
+def detector():
+    detector = PhishingDetector(MODELS_DIR)
+    if not detector.ready:
+        pytest.skip("phishing model not found; run train.py first")
+    return detector
+
+
+def make_index(detector, **kwargs):
+    index = SimilarityIndex(**kwargs)
+    index.bind(detector)
+    return index
+
+
+def test_variant_of_an_indexed_message_ranks_first(detector):
+    index = make_index(detector)
+    index.add([UNRELATED, CAMPAIGN], [{"label": "Legitimate"}, VERDICT])
+
+    hits = index.search(VARIANT, k=5, min_score=0.3)
+
+    assert hits and hits[0]["text"] == CAMPAIGN and hits[0]["label"] == "Phishing"
+    assert all(hit["text"] != UNRELATED for hit in hits)
+
+
+def test_repeated_message_is_counted_not_stored_again(detector):
+    index = make_index(detector)
+    index.add([CAMPAIGN, CAMPAIGN], [VERDICT, {**VERDICT, "risk_score": 80}])
+
+    hit = index.search(CAMPAIGN, k=1)[0]
+
+    assert index.size == 1 and hit["seen"] == 2 and hit["risk_score"] == 80
+    assert hit["score"] == pytest.approx(1.0, abs=1e-3)
+
+
+def test_oldest_message_is_overwritten_when_full(detector):
+    index = make_index(detector, max_entries=2)
+    index.add([CAMPAIGN, UNRELATED, VARIANT], [VERDICT] * 3)
+
+    texts = [hit["text"] for hit in index.search(CAMPAIGN, k=5)]
+
+    assert index.size == 2 and CAMPAIGN not in texts and VARIANT in texts
+
+
+def test_binding_another_model_clears_the_index(detector):
+    index = make_index(detector)
+    index.add([CAMPAIGN], [VERDICT])
+
+    index.bind(SimpleNamespace(fingerprint="another-model", ready=False))
+
+    assert index.size == 0 and index.search(CAMPAIGN) == []
+
+
+def test_scored_messages_become_searchable(monkeypatch):
+    monkeypatch.setattr(main, "similarity_index", SimilarityIndex())
+
+    async def scenario():
+        async with serve() as client:
+            await client.post("/predict", json={"text": CAMPAIGN})
+            # Indexing happens on a background thread
+            deadline = time.monotonic() + 5
+            while main.similarity_index.size == 0 and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            return await client.post("/similar", json={"text": VARIANT, "k": 3})
+
+    response = asyncio.run(scenario())
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["index_size"] == 1 and body["results"][0]["text"] == CAMPAIGN
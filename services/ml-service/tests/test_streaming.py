@@ -0,0 +1,124 @@
+"""NDJSON streaming: line parsing, ordered verdicts, and cleanup when either side stops."""
+
+import asyncio
+import json
+
+import pytest
+from starlette.requests import ClientDisconnect
+
+from app.streaming import NDJSONScorer, iter_lines
+
+from .conftest import serve
+
+
+async def score_lengths(records):
+    return [{"length": len(record)} for record in records]
+
+
+def parse_text(value):
+    if not isinstance(value, str):
+        raise ValueError("Expected a string")
+    return value
+
+
+async def chunks(*parts, then=None):
+    for part in parts:
+        yield part
+    if then is not None:
+        raise then
+
+
+async def collect(stream):
+    return [json.loads(line) for piece in [piece async for piece in stream] for line in piece.splitlines()]
+
+
+def test_iter_lines_reassembles_split_lines_and_skips_long_ones():
+    async def scenario():
+        body = chunks(b'"a"\n"b', b'c"\n' + b"x" * 20, b"y" * 20 + b'\n"d"')
+        return [item async for item in iter_lines(body, max_line_bytes=16)]
+
+    assert asyncio.run(scenario()) == [(1, b'"a"'), (2, b'"bc"'), (3, None), (4, b'"d"')]
+
+
+def test_verdicts_keep_input_order_and_report_bad_lines():
+    scorer = NDJSONScorer(parse_text, score_lengths, chunk_size=2)
+    body = chunks(b'"one"\n{"id": 7}\n', b'not json\n\n"three"\n')
+
+    lines = asyncio.run(collect(scorer.stream(body)))
+
+    assert [line.get("line") for line in lines[:-1]] == [1, 2, 3, 5]
+    assert lines[0] == {"line": 1, "length": 3}
+    assert "error" in lines[1] and "error" in lines[2]
+    assert lines[3] == {"line": 5, "length": 5}
+    assert lines[-1]["summary"]["records"] == 2 and lines[-1]["summary"]["errors"] == 2
+
+
+def test_body_error_reaches_the_consumer():
+    # The producer posts its end-of-stream sentinel on failure, so the consumer
+    # sees the error instead of waiting forever on the queue
+    scorer = NDJSONScorer(parse_text, score_lengths, chunk_size=1)
+
+    async def scenario():
+        return await asyncio.wait_for(collect(scorer.stream(chunks(b'"a"\n', then=RuntimeError("boom")))), 2)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(scenario())
+
+
+def test_client_disconnect_ends_the_stream_without_summary():
+    scorer = NDJSONScorer(parse_text, score_lengths, chunk_size=1)
+
+    async def scenario():
+        return await asyncio.wait_for(collect(scorer.stream(chunks(b'"a"\n', then=ClientDisconnect()))), 2)
+
+    assert asyncio.run(scenario()) == [{"line": 1, "length": 1}]
+
+
+async def endless_body():
+    while True:
+        yield b'"spam"\n'
+
+
+async def stalled_body():
+    yield b'"spam"\n' * 4
+    await asyncio.Event().wait()
+
+
+@pytest.mark.parametrize("body", [endless_body, stalled_body])
+def test_closing_the_stream_reaps_the_producer(body):
+    # Regression: with the queue full (or the body stalled) the producer used to be
+    # left blocked after the response went away
+    scorer = NDJSONScorer(parse_text, score_lengths, chunk_size=1, prefetch=1)
+
+    async def scenario():
+        stream = scorer.stream(body())
+        await stream.__anext__()
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(stream.aclose(), 1)
+        # Let the loop finalize the closed body generators
+        await asyncio.sleep(0)
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task() and not task.done()]
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_predict_stream_endpoint():
+    body = "\n".join([
+        json.dumps({"id": "m1", "text": "Verify your password now at http://secure-login.example"}),
+        json.dumps("Lunch tomorrow at noon?"),
+        json.dumps({"text": ""}),
+    ]) + "\n"
+
+    async def scenario():
+        async with serve() as client:
+            return await client.post("/predict/stream", content=body)
+
+    response = asyncio.run(scenario())
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line.get("line") for line in lines[:-1]] == [1, 2, 3]
+    assert lines[0]["id"] == "m1" and "risk_score" in lines[0] and "risk_score" in lines[1]
+    assert "error" in lines[2]
+    assert lines[-1]["summary"]["records"] == 2 and lines[-1]["summary"]["errors"] == 1
@@ -0,0 +1,137 @@
+"""``TenantModelPool``: single-flight loads, LRU budget, failure caching, and ``X-Tenant``."""
+
+import asyncio
+import os
+import shutil
+import time
+
+import pytest
+
+from app import main
+from app.models import MODELS_DIR
+from app.registry import ModelRegistryError
+from app.tenants import TenantModelPool, TenantNotFound, _model_bytes
+
+from .conftest import serve
+
+
+def add_tenant(root, tenant):
+    shutil.copytree(MODELS_DIR, root / tenant)
+
+
+@pytest.fixture
+def tenants_root(tmp_path):
+    if not os.path.exists(os.path.join(MODELS_DIR, "phishing_model.pkl")):
+        pytest.skip("models not found; run train.py first")
+    for tenant in ("acme", "globex"):
+        add_tenant(tmp_path, tenant)
+    return tmp_path
+
+
+def test_concurrent_requests_share_one_load(tenants_root):
+    pool = TenantModelPool(str(tenants_root), max_bytes=0)
+
+    async def scenario():
+        bundles = await asyncio.gather(*(pool.get("acme") for _ in range(5)))
+        return bundles, await pool.get("acme")
+
+    bundles, again = asyncio.run(scenario())
+
+    assert all(bundle is again for bundle in bundles)
+    assert again.tenant == "acme" and again.served_version == "acme/legacy"
+    stats = pool.stats()["tenants"]["acme"]
+    assert (stats["loads"], stats["misses"], stats["coalesced"], stats["hits"]) == (1, 1, 4, 1)
+
+
+def test_least_recently_used_tenant_is_evicted(tenants_root):
+    add_tenant(tenants_root, "initech")
+    pool = TenantModelPool(str(tenants_root), max_bytes=0)
+
+    async def scenario():
+        first = await pool.get("acme")
+        # Room for two tenants
+        pool.max_bytes = 2 * _model_bytes(first) + 1
+        await pool.get("globex")
+        await pool.get("acme")
+        await pool.get("initech")
+
+    asyncio.run(scenario())
+
+    assert pool.stats()["loaded"] == ["acme", "initech"]
+    assert pool.tenants["globex"].evictions == 1
+    assert pool.loaded_bytes <= pool.max_bytes
+
+
+def test_model_bytes_count_only_the_files_in_use(tenants_root):
+    pool = TenantModelPool(str(tenants_root), max_bytes=0)
+    bundle = asyncio.run(pool.get("acme"))
+    files = {path for detector in bundle.detectors.values() for path in detector.files}
+
+    assert files and all(path.startswith(str(tenants_root / "acme")) for path in files)
+    assert _model_bytes(bundle) == sum(os.path.getsize(path) for path in files)
+    if bundle.phishing.memory_mapped:
+        # Served from the compiled artifacts: the pickles next to them are not counted
+        assert not any(path.endswith("phishing_model.pkl") for path in files)
+
+
+@pytest.mark.parametrize("tenant", ["missing", "../acme", ".hidden", "a" * 65])
+def test_unknown_and_invalid_tenants(tenants_root, tenant):
+    pool = TenantModelPool(str(tenants_root), max_bytes=0)
+
+    with pytest.raises(TenantNotFound):
+        asyncio.run(pool.get(tenant))
+
+
+def test_failed_load_is_cached_until_retry(tenants_root):
+    (tenants_root / "broken").mkdir()
+    pool = TenantModelPool(str(tenants_root), max_bytes=0, retry_after=0.2)
+
+    async def attempt():
+        try:
+            await pool.get("broken")
+            return "loaded"
+        except ModelRegistryError as e:
+            return str(e)
+
+    first = asyncio.run(attempt())
+    cached = asyncio.run(attempt())
+    stats = pool.stats()["tenants"]["broken"]
+    assert cached == first and (stats["failures"], stats["failures_cached"]) == (1, 1)
+    assert stats["retry_in_s"] is not None
+
+    # Fixed models are picked up once the retry window is over
+    shutil.rmtree(tenants_root / "broken")
+    add_tenant(tenants_root, "broken")
+    assert asyncio.run(attempt()) == first
+    time.sleep(0.25)
+    assert asyncio.run(attempt()) == "loaded"
+    assert pool.stats()["tenants"]["broken"]["retry_in_s"] is None
+
+
+def test_unload_forgets_a_failed_load(tenants_root):
+    (tenants_root / "broken").mkdir()
+    pool = TenantModelPool(str(tenants_root), max_bytes=0, retry_after=60)
+    with pytest.raises(ModelRegistryError):
+        asyncio.run(pool.get("broken"))
+
+    assert pool.unload("broken")
+    with pytest.raises(ModelRegistryError):
+        asyncio.run(pool.get("broken"))
+    assert pool.tenants["broken"].failures == 2
+
+
+def test_x_tenant_header(monkeypatch, tenants_root):
+    monkeypatch.setattr(main, "tenant_pool", TenantModelPool(str(tenants_root), max_bytes=0))
+    body = {"text": "Verify your password now at http://secure-login.example"}
+
+    async def scenario():
+        async with serve() as client:
+            return [
+                await client.post("/predict", json=body, headers={"X-Tenant": tenant})
+                for tenant in ("acme", "missing", "../acme")
+            ]
+
+    served, missing, invalid = asyncio.run(scenario())
+
+    assert served.status_code == 200 and served.json()["model_version"] == "acme/legacy"
+    assert missing.status_code == 404 and invalid.status_code == 404
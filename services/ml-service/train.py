@@ -8,22 +8,99 @@ Trains two models:
 Outputs:
 - models/phishing_model.pkl
 - models/tfidf_vectorizer.pkl
+- models/tfidf_featurizer.json + models/tfidf_idf.npy
 - models/anomaly_model.pkl
+- models/compiled/*.npy + *.json (memory-mappable forest arrays)
+- models/compiled/phishing_linear.* (cascade pre-screen, see app/cascade.py)
+
+With ``--version v2`` the same files go to models/v2/ together with a
+manifest.json (written last), and ``--activate`` points models/CURRENT at
+it so a running service hot-swaps to the new version.
+
+With ``--stream`` the models are trained from files on disk instead of the
+built-in samples, out of core and on all cores (see app/training.py):
+
+  python train.py --stream --phishing-data emails.csv --login-data logins.csv
 """
 
+import argparse
 import os
+import warnings
 import joblib
 import numpy as np
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.ensemble import RandomForestClassifier, IsolationForest
+from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
 
+from app.artifacts import COMPILED_DIR, export_anomaly, export_phishing
+from app.cascade import (
+    DEFAULT_MAX_DISAGREEMENT,
+    MIN_CALIBRATION_ROWS,
+    LinearScreen,
+    calibrate_thresholds,
+    evaluate,
+    format_report,
+)
+from app.featurizer import TfidfFeaturizer, check_parity as check_featurizer_parity
+from app.forest import (
+    CompiledForestClassifier,
+    CompiledIsolationForest,
+    check_classifier_parity,
+    check_isolation_parity,
+)
+from app.registry import write_current, write_manifest
+from app.training import StageReport, featurize_corpus, iter_labeled_texts, load_split, sample_logins
+
 MODELS_DIR = os.path.join(os.path.dirname(__file__), "models")
 os.makedirs(MODELS_DIR, exist_ok=True)
 
 
+def _display(output_dir: str) -> str:
+    return os.path.relpath(output_dir, os.path.dirname(os.path.abspath(__file__)))
+
+
+# ── Model Definitions ──────────────────────────────────────
+# Shared by the in-memory and the streaming (--stream) pipelines
+ANOMALY_FEATURES = ["login_hour", "ip_frequency", "device_change", "failed_attempts", "session_duration"]
+
+
+def make_vectorizer() -> TfidfVectorizer:
+    return TfidfVectorizer(
+        max_features=5000,
+        ngram_range=(1, 2),
+        stop_words="english",
+        min_df=1,
+        max_df=0.95,
+    )
+
+
+def make_phishing_forest(n_jobs=None) -> RandomForestClassifier:
+    return RandomForestClassifier(
+        n_estimators=100,
+        max_depth=20,
+        random_state=42,
+        class_weight="balanced",
+        n_jobs=n_jobs,
+    )
+
+
+def make_linear_screen() -> LogisticRegression:
+    return LogisticRegression(C=10.0, class_weight="balanced", max_iter=1000)
+
+
+def make_anomaly_forest(n_jobs=None) -> IsolationForest:
+    return IsolationForest(
+        n_estimators=100,
+        contamination=0.1,
+        random_state=42,
+        max_features=1.0,
+        n_jobs=n_jobs,
+    )
+
+
 def generate_phishing_dataset():
     """Generate synthetic phishing/legitimate message dataset for training."""
     phishing_messages = [
@@ -118,7 +195,7 @@ def generate_phishing_dataset():
     return texts, labels
 
 
-def train_phishing_model():
+def train_phishing_model(output_dir: str = MODELS_DIR):
     """Train TF-IDF + Random Forest phishing detection model."""
     print("[*] Training Phishing Detection Model...")
     print("=" * 50)
@@ -126,13 +203,7 @@ def train_phishing_model():
     texts, labels = generate_phishing_dataset()
 
     # TF-IDF Vectorization
-    vectorizer = TfidfVectorizer(
-        max_features=5000,
-        ngram_range=(1, 2),
-        stop_words="english",
-        min_df=1,
-        max_df=0.95,
-    )
+    vectorizer = make_vectorizer()
     X = vectorizer.fit_transform(texts)
     y = np.array(labels)
 
@@ -142,12 +213,7 @@ def train_phishing_model():
     )
 
     # Train Random Forest
-    model = RandomForestClassifier(
-        n_estimators=100,
-        max_depth=20,
-        random_state=42,
-        class_weight="balanced",
-    )
+    model = make_phishing_forest()
     model.fit(X_train, y_train)
 
     # Evaluate
@@ -155,14 +221,57 @@ def train_phishing_model():
     print("\n[+] Phishing Model Classification Report:")
     print(classification_report(y_test, y_pred, target_names=["Legitimate", "Phishing"]))
 
+    screen = fit_linear_screen(model, X_train, y_train, X_test, y_test)
+    save_phishing_model(output_dir, model, vectorizer, X, texts, screen)
+
+
+def fit_linear_screen(model, X_train, y_train, X_test, y_test) -> LinearScreen:
+    """Fit the cascade pre-screen and calibrate its band against the forest on held-out rows."""
+    screen = LinearScreen.from_sklearn(make_linear_screen().fit(X_train, y_train))
+    if X_test.shape[0] == 0:
+        print("[!] Warning: No held-out rows, cascade pre-screen will escalate everything")
+        return screen
+
+    p = screen.probability(X_test)
+    forest_predictions = model.predict(X_test)
+    screen.low, screen.high = calibrate_thresholds(p, forest_predictions, DEFAULT_MAX_DISAGREEMENT)
+    report = evaluate(p, forest_predictions, screen.low, screen.high, y_test)
+    screen.calibration = {"max_disagreement": DEFAULT_MAX_DISAGREEMENT, **report}
+    print(f"[+] Cascade pre-screen on held-out rows: {format_report(report)}")
+    if X_test.shape[0] < MIN_CALIBRATION_ROWS:
+        print(f"[!] Warning: Cascade band calibrated on only {X_test.shape[0]} rows; "
+              f"check it on real traffic with python -m app.cascade --data <file>")
+    return screen
+
+
+def save_phishing_model(output_dir: str, model, vectorizer, X, texts, screen: LinearScreen = None):
+    """Check compiled-forest parity on ``X``, then save and export the model
+    (and the cascade pre-screen, when given)."""
+    where = _display(output_dir)
+
+    # The service evaluates the forest with the compiled flat-array engine
+    parity = check_classifier_parity(model, CompiledForestClassifier.from_sklearn(model), X)
+    print(f"[{'+' if parity['ok'] else '!'}] Compiled forest parity: max diff {parity['max_abs_diff']:.2e}, "
+          f"{parity['label_mismatches']} label mismatches")
+
     # Save models
-    joblib.dump(model, os.path.join(MODELS_DIR, "phishing_model.pkl"))
-    joblib.dump(vectorizer, os.path.join(MODELS_DIR, "tfidf_vectorizer.pkl"))
-    print("[+] Phishing model saved to models/phishing_model.pkl")
-    print("[+] TF-IDF vectorizer saved to models/tfidf_vectorizer.pkl")
+    joblib.dump(model, os.path.join(output_dir, "phishing_model.pkl"))
+    joblib.dump(vectorizer, os.path.join(output_dir, "tfidf_vectorizer.pkl"))
+    print(f"[+] Phishing model saved to {where}/phishing_model.pkl")
+    print(f"[+] TF-IDF vectorizer saved to {where}/tfidf_vectorizer.pkl")
+
+    # Frozen featurizer + flat forest arrays the service memory-maps
+    fingerprint = export_phishing(output_dir, model, vectorizer)
+    parity = check_featurizer_parity(vectorizer, TfidfFeaturizer.load(output_dir), texts)
+    print(f"[+] TF-IDF featurizer exported to {where}/tfidf_featurizer.json + {where}/tfidf_idf.npy")
+    print(f"[+] Memory-mapped forest arrays exported to {where}/compiled/phishing_forest.*")
+    if screen is not None:
+        screen.save(os.path.join(output_dir, COMPILED_DIR), fingerprint)
+        print(f"[+] Cascade pre-screen exported to {where}/compiled/phishing_linear.*")
+    print(f"[{'+' if parity['ok'] else '!'}] Featurizer parity: max diff {parity['max_abs_diff']:.2e}")
 
 
-def train_anomaly_model():
+def train_anomaly_model(output_dir: str = MODELS_DIR):
     """Train Isolation Forest anomaly detection for login patterns."""
     print("\n[*] Training Login Anomaly Detection Model...")
     print("=" * 50)
@@ -192,29 +301,145 @@ def train_anomaly_model():
     # Combine for training (Isolation Forest is unsupervised, trained mostly on normal)
     train_data = pd.concat([normal_data, anomaly_data], ignore_index=True)
 
-    model = IsolationForest(
-        n_estimators=100,
-        contamination=0.1,
-        random_state=42,
-        max_features=1.0,
-    )
+    model = make_anomaly_forest()
     model.fit(train_data)
+    save_anomaly_model(output_dir, model, list(train_data.columns), train_data)
+
+
+def save_anomaly_model(output_dir: str, model, features, train_data):
+    """Save and export the model, then report detections and compiled-forest parity."""
+    where = _display(output_dir)
 
     # Save model + feature names
-    joblib.dump(model, os.path.join(MODELS_DIR, "anomaly_model.pkl"))
-    joblib.dump(list(train_data.columns), os.path.join(MODELS_DIR, "anomaly_features.pkl"))
-    print("[+] Anomaly model saved to models/anomaly_model.pkl")
-    print("[+] Feature list saved to models/anomaly_features.pkl")
+    joblib.dump(model, os.path.join(output_dir, "anomaly_model.pkl"))
+    joblib.dump(features, os.path.join(output_dir, "anomaly_features.pkl"))
+    print(f"[+] Anomaly model saved to {where}/anomaly_model.pkl")
+    print(f"[+] Feature list saved to {where}/anomaly_features.pkl")
+    export_anomaly(output_dir, model, features)
+    print(f"[+] Memory-mapped forest arrays exported to {where}/compiled/anomaly_forest.*")
 
     # Quick evaluation
     preds = model.predict(train_data)
     n_detected = (preds == -1).sum()
     print(f"[+] Anomalies detected in training data: {n_detected}/{len(train_data)}")
 
+    # Parity on a bounded slice; the streaming sample can be large
+    parity = check_isolation_parity(model, CompiledIsolationForest.from_sklearn(model), train_data[:10000])
+    print(f"[{'+' if parity['ok'] else '!'}] Compiled forest parity: max diff {parity['max_abs_diff']:.2e}, "
+          f"{parity['label_mismatches']} label mismatches, {parity['boundary_ties']} threshold ties")
+
+
+# ── Streaming (Out-of-Core) Training ───────────────────────
+def train_phishing_stream(output_dir: str, args, report: StageReport):
+    """Train the phishing model from ``args.phishing_data`` in chunks."""
+    print("[*] Training Phishing Detection Model (streaming)...")
+    print("=" * 50)
+    columns = {"text_column": args.text_column, "label_column": args.label_column}
+
+    vectorizer, chunk_dir, meta = featurize_corpus(
+        args.phishing_data, make_vectorizer(), args.cache_dir, args.chunk_size, args.workers,
+        args.vocab_sample, args.seed, report, **columns,
+    )
+
+    with report.stage("phishing: fit") as info:
+        X_train, y_train, X_test, y_test = load_split(
+            vectorizer, chunk_dir, meta, args.max_train_rows, 0.2, args.seed
+        )
+        info["rows"] = X_train.shape[0]
+        print(f"    fitting on {X_train.shape[0]} rows ({X_test.shape[0]} held out) with n_jobs={args.workers}")
+        model = make_phishing_forest(n_jobs=args.workers).fit(X_train, y_train)
+
+    with report.stage("phishing: fit pre-screen"):
+        screen = fit_linear_screen(model, X_train, y_train, X_test, y_test)
+        del X_train, y_train
+
+    with report.stage("phishing: evaluate + export") as info:
+        if X_test.shape[0]:
+            print("\n[+] Phishing Model Classification Report:")
+            print(classification_report(y_test, model.predict(X_test), labels=[0, 1],
+                                        target_names=["Legitimate", "Phishing"], zero_division=0))
+        # Parity checks run on a bounded slice of the corpus
+        texts, _ = next(iter_labeled_texts(args.phishing_data, 2000, **columns))
+        save_phishing_model(output_dir, model, vectorizer, X_test[:2000], texts, screen)
+
+
+def train_anomaly_stream(output_dir: str, args, report: StageReport):
+    """Train the login anomaly model from ``args.login_data`` in chunks."""
+    print("\n[*] Training Login Anomaly Detection Model (streaming)...")
+    print("=" * 50)
+    store_params = {
+        "ip_window": int(os.environ.get("ML_FEATURES_IP_WINDOW", "100")),
+        "failure_window": float(os.environ.get("ML_FEATURES_FAILURE_WINDOW_SECONDS", "3600")),
+        "max_users": int(os.environ.get("ML_FEATURES_MAX_USERS", "100000")),
+        "idle_ttl": float(os.environ.get("ML_FEATURES_IDLE_TTL_SECONDS", "86400")),
+    }
+    sample = sample_logins(
+        args.login_data, ANOMALY_FEATURES, args.cache_dir, args.chunk_size,
+        args.anomaly_sample, args.seed, report, store_params,
+    )
+    train_data = pd.DataFrame(sample, columns=ANOMALY_FEATURES)
+
+    with report.stage("anomaly: fit") as info:
+        info["rows"] = len(train_data)
+        model = make_anomaly_forest(n_jobs=args.workers).fit(train_data)
+
+    with report.stage("anomaly: export"):
+        save_anomaly_model(output_dir, model, ANOMALY_FEATURES, train_data)
+
 
 if __name__ == "__main__":
     print("🛡️  CyberSentinel AI – ML Training Pipeline")
     print("=" * 50)
-    train_phishing_model()
-    train_anomaly_model()
+    parser = argparse.ArgumentParser(description="Train the CyberSentinel ML models")
+    parser.add_argument("--version", help="write a registry version to models/<version>/ instead of models/")
+    parser.add_argument("--activate", action="store_true", help="point models/CURRENT at the new version")
+    stream = parser.add_argument_group("streaming training (--stream)")
+    stream.add_argument("--stream", action="store_true", help="train out of core from --phishing-data / --login-data")
+    stream.add_argument("--phishing-data", help="CSV or NDJSON with text and label (1/0, phishing/legitimate)")
+    stream.add_argument("--text-column", default="text")
+    stream.add_argument("--label-column", default="label")
+    stream.add_argument("--login-data", help="CSV of login feature rows or raw user/ip/device/success/timestamp events")
+    stream.add_argument("--chunk-size", type=int, default=50_000, help="rows read per chunk")
+    stream.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes/threads per stage")
+    stream.add_argument("--vocab-sample", type=int, default=200_000, help="texts sampled to fit the vocabulary")
+    stream.add_argument("--max-train-rows", type=int, default=1_000_000, help="rows the phishing forest is fitted on")
+    stream.add_argument("--anomaly-sample", type=int, default=200_000, help="login rows the anomaly forest is fitted on")
+    stream.add_argument("--cache-dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".train_cache"),
+                        help="featurized matrix cache")
+    stream.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if args.stream and not (args.phishing_data or args.login_data):
+        parser.error("--stream needs --phishing-data and/or --login-data")
+
+    output_dir = MODELS_DIR
+    if args.version:
+        output_dir = os.path.join(MODELS_DIR, args.version)
+        if os.path.exists(output_dir):
+            parser.error(f"models/{args.version} already exists")
+        os.makedirs(output_dir)
+
+    if args.stream:
+        # sklearn warns about feature names when the parity checks pass ndarrays
+        warnings.filterwarnings("ignore", category=UserWarning)
+        report = StageReport()
+        if args.phishing_data:
+            train_phishing_stream(output_dir, args, report)
+        else:
+            train_phishing_model(output_dir)
+        if args.login_data:
+            train_anomaly_stream(output_dir, args, report)
+        else:
+            train_anomaly_model(output_dir)
+        report.print_summary()
+    else:
+        train_phishing_model(output_dir)
+        train_anomaly_model(output_dir)
+
+    if args.version:
+        features = joblib.load(os.path.join(output_dir, "anomaly_features.pkl"))
+        write_manifest(output_dir, args.version, features)
+        print(f"[+] Manifest written to models/{args.version}/manifest.json")
+        if args.activate:
+            write_current(MODELS_DIR, args.version)
+            print(f"[+] models/CURRENT now points to {args.version}")
     print("\n✅ All models trained successfully!")